@@ -69,3 +69,57 @@ SELECT
     'E-commerce' AS source,
     SUM(sales_amount) AS total_sales
 FROM gold.fact_sales_products;
+
+
+-- ============================================================================
+-- 5. Requête sur une fenêtre de dates
+--    → Chiffre d'affaires quotidien des 30 derniers jours
+--      (filtre sur sales_date : seules les partitions utiles sont lues)
+-- ============================================================================
+SELECT
+    f.sales_date,
+    SUM(f.sales_amount) AS total_sales_amount
+FROM gold.fact_sales_books f
+WHERE f.sales_date >= CURRENT_DATE - INTERVAL '30 days'
+GROUP BY f.sales_date
+ORDER BY f.sales_date;
+
+
+-- ============================================================================
+-- 6. Requête filtrée par tag
+--    → Auteurs les plus cités sur le tag 'love'
+--      (tags @> ARRAY[...] : index GIN de gold.dim_quotes)
+-- ============================================================================
+SELECT
+    a.author_name,
+    COUNT(*) AS nb_quotes
+FROM gold.dim_quotes q
+JOIN gold.dim_authors a
+    ON q.author_key = a.author_key
+WHERE q.tags @> ARRAY['love']
+GROUP BY a.author_name
+ORDER BY nb_quotes DESC
+LIMIT 10;
+
+
+-- ============================================================================
+-- 7. Requête de co-occurrence de tags
+--    → Tags les plus souvent associés au tag 'love'
+--      (table pont gold.bridge_quote_tags : index (tag_key, quote_key)
+--       puis (quote_key, tag_key))
+-- ============================================================================
+SELECT
+    t2.tag_name,
+    COUNT(*) AS nb_quotes
+FROM gold.dim_tags t1
+JOIN gold.bridge_quote_tags b1
+    ON b1.tag_key = t1.tag_key
+JOIN gold.bridge_quote_tags b2
+    ON b2.quote_key = b1.quote_key
+   AND b2.tag_key <> b1.tag_key
+JOIN gold.dim_tags t2
+    ON t2.tag_key = b2.tag_key
+WHERE t1.tag_name = 'love'
+GROUP BY t2.tag_name
+ORDER BY nb_quotes DESC
+LIMIT 10;
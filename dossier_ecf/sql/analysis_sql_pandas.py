@@ -5,16 +5,45 @@
 # -- =============================================================================
 
 
+import os
+
 import pandas as pd
 import matplotlib.pyplot as plt
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 
 # ============================
-# Connexion PostgreSQL (Docker)
+# Connexion : PostgreSQL (Docker) ou DuckDB embarqué (export Parquet)
+#     ANALYSIS_BACKEND=duckdb python sql/analysis_sql_pandas.py
 # ============================
 DB_URI = "postgresql+psycopg2://admin:admin@db:5432/datapulse"
 
-engine = create_engine(DB_URI)
+ANALYSIS_BACKEND = os.getenv("ANALYSIS_BACKEND", "postgres")
+
+if ANALYSIS_BACKEND == "duckdb":
+    import duckdb_backend
+
+    engine = duckdb_backend.connect()
+else:
+    engine = create_engine(DB_URI)
+
+
+def run_query(sql):
+    if ANALYSIS_BACKEND == "duckdb":
+        return duckdb_backend.query(engine, sql)
+    return pd.read_sql(sql, engine)
+
+
+def search(query, lang="fr", max_results=20):
+    """Recherche plein texte classée (citations, livres, produits) via gold.search."""
+    if ANALYSIS_BACKEND == "duckdb":
+        # Export Parquet sans tsvector : recherche par mots classée (lang sans effet)
+        return duckdb_backend.search(engine, query, max_results)
+    return pd.read_sql(
+        text("SELECT * FROM gold.search(:query, :lang, :max_results)"),
+        engine,
+        params={"query": query, "lang": lang, "max_results": max_results}
+    )
+
 
 # ============================
 # SQL – Chiffre d’affaires total (Livres)
@@ -25,7 +54,7 @@ SELECT
 FROM gold.fact_sales_books;
 """
 
-df_ca_books = pd.read_sql(SQL_CA_TOTAL_BOOKS, engine)
+df_ca_books = run_query(SQL_CA_TOTAL_BOOKS)
 print("Chiffre d’affaires total (Livres) :")
 print(df_ca_books)
 
@@ -45,7 +74,7 @@ ORDER BY total_ventes DESC
 LIMIT 10;
 """
 
-df_books = pd.read_sql(SQL_TOP_BOOKS, engine)
+df_books = run_query(SQL_TOP_BOOKS)
 
 # ============================
 # Visualisation – Top 10 livres
@@ -74,7 +103,7 @@ JOIN gold.dim_books b
 GROUP BY b.title;
 """
 
-df_rank = pd.read_sql(SQL_RANKING_BOOKS, engine)
+df_rank = run_query(SQL_RANKING_BOOKS)
 print("\n Classement des livres :")
 print(df_rank.head(10))
 
@@ -92,7 +121,7 @@ GROUP BY b.category
 ORDER BY chiffre_affaires DESC;
 """
 
-df_category = pd.read_sql(SQL_CA_CATEGORY, engine)
+df_category = run_query(SQL_CA_CATEGORY)
 
 # ============================
 # Visualisation – CA par catégorie
@@ -119,6 +148,13 @@ ORDER BY chiffre_affaires DESC
 LIMIT 10;
 """
 
-df_products = pd.read_sql(SQL_CA_PRODUCTS, engine)
+df_products = run_query(SQL_CA_PRODUCTS)
 print("\n Top produits e-commerce :")
 print(df_products)
+
+# ============================
+# Recherche plein texte (index GIN tsvector ; repli par mots sous DuckDB)
+# ============================
+df_search = search("love", lang="en", max_results=10)
+print("\n Recherche « love » :")
+print(df_search)
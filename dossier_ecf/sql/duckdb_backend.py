@@ -0,0 +1,190 @@
+# -- =============================================================================
+# -- duckdb_backend.py
+# -- Exécution hors-ligne des analyses sur un export Parquet de la couche Gold
+# --     1. export : tables Gold (PostgreSQL) → fichiers Parquet (colonnaires)
+# --     2. run    : DuckDB embarqué, vues gold.* sur les fichiers Parquet,
+# --                 mêmes requêtes que analyses.sql (exécution vectorisée)
+# --     (nom distinct du dialecte SQLAlchemy « duckdb_engine » de PyPI,
+# --      qu'un import depuis sql/ masquerait sinon)
+# --     search()  : repli de gold.search (pas de tsvector dans l'export) :
+# --                 recherche par mots classée, mêmes poids A/B/C par colonne
+# --
+# -- Usage :
+# --     python sql/duckdb_backend.py export      (dans le conteneur ETL)
+# --     python sql/duckdb_backend.py run         (sur le poste analyste)
+# -- =============================================================================
+
+import argparse
+import os
+import re
+
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import create_engine, text
+
+from query_catalog import parse_analyses
+
+DB_URI = "postgresql+psycopg2://admin:admin@db:5432/datapulse"
+
+EXPORT_DIR = os.getenv(
+    "GOLD_EXPORT_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "gold_export")
+)
+
+GOLD_TABLES = [
+    "dim_books",
+    "dim_authors",
+    "dim_quotes",
+    "dim_tags",
+    "bridge_quote_tags",
+    "dim_products",
+    "fact_sales_books",
+    "fact_sales_products",
+]
+
+CHUNK_SIZE = 100_000
+
+# Documents de gold.search : (table, source, clé, libellé, [(colonne, poids)])
+# poids = ceux de ts_rank pour setweight A / B / C
+SEARCH_DOCUMENTS = [
+    ("dim_quotes", "quote", "quote_key", "quote", [("quote", 1.0)]),
+    ("dim_books", "book", "book_key", "title", [("title", 1.0), ("category", 0.4)]),
+    ("dim_products", "product", "product_key", "product_name",
+     [("product_name", 1.0), ("category", 0.4), ("description", 0.2)]),
+]
+
+
+# ============================
+# Export Gold → Parquet
+# ============================
+def stored_columns(engine, table):
+    """Colonnes de gold.<table> hors colonnes générées (search_fr / search_en, geohash...)."""
+    with engine.connect() as conn:
+        return conn.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'gold' AND table_name = :table AND is_generated = 'NEVER'
+            ORDER BY ordinal_position
+        """), {"table": table}).scalars().all()
+
+
+def export_gold(engine, export_dir=EXPORT_DIR, tables=GOLD_TABLES, chunksize=CHUNK_SIZE):
+    os.makedirs(export_dir, exist_ok=True)
+
+    for table in tables:
+        path = os.path.join(export_dir, f"{table}.parquet")
+        writer = None
+        rows = 0
+
+        # Les tsvector n'ont pas d'équivalent Parquet : seules les colonnes stockées partent
+        columns = ", ".join(f'"{c}"' for c in stored_columns(engine, table))
+        if not columns:
+            if os.path.exists(path):
+                os.remove(path)
+            print(f"gold.{table} does not exist – {path} removed")
+            continue
+
+        # Écriture dans un fichier temporaire puis remplacement : jamais d'export
+        # partiel ni de fichier d'une exécution précédente laissé en place
+        tmp_path = f"{path}.tmp"
+
+        # Lecture par blocs : la table n'est jamais chargée en entier
+        for chunk in pd.read_sql(f"SELECT {columns} FROM gold.{table}", engine, chunksize=chunksize):
+            batch = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, batch.schema, compression="zstd")
+            writer.write_table(batch.cast(writer.schema))
+            rows += len(chunk)
+
+        if writer is None:
+            # Table vide : fichier vide (mêmes colonnes), la vue DuckDB reste valide
+            empty = pd.read_sql(f"SELECT {columns} FROM gold.{table} LIMIT 0", engine)
+            pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), tmp_path, compression="zstd")
+        else:
+            writer.close()
+
+        os.replace(tmp_path, path)
+        print(f"gold.{table} → {path} ({rows} rows)")
+
+
+# ============================
+# DuckDB embarqué
+# ============================
+def connect(export_dir=EXPORT_DIR, tables=GOLD_TABLES):
+    """Connexion DuckDB en mémoire exposant les fichiers Parquet sous gold.<table>."""
+    con = duckdb.connect(database=":memory:")
+    con.execute("CREATE SCHEMA IF NOT EXISTS gold")
+
+    for table in tables:
+        path = os.path.join(export_dir, f"{table}.parquet")
+        if not os.path.exists(path):
+            continue
+        path = path.replace("'", "''")
+        con.execute(f"CREATE VIEW gold.{table} AS SELECT * FROM read_parquet('{path}')")
+
+    return con
+
+
+def query(con, sql):
+    return con.execute(sql).df()
+
+
+def search(con, query, max_results=20):
+    """
+    Équivalent de gold.search sur l'export : tous les mots doivent apparaître
+    (comme websearch_to_tsquery), score = somme des poids des colonnes qui les
+    contiennent. Sans racinisation : un mot trouve les mots qui commencent
+    par lui ("love" → "loves"), pas l'inverse.
+    """
+    terms = sorted(set(re.findall(r"\w+", query.lower())))
+    views = set(con.execute(
+        "SELECT view_name FROM duckdb_views() WHERE schema_name = 'gold'"
+    ).fetchnumpy()["view_name"])
+
+    parts = []
+    for table, source, key, label, columns in SEARCH_DOCUMENTS:
+        if table not in views:
+            continue
+        found = [f"regexp_matches(lower(CAST({c} AS VARCHAR)), '\\b' || term)" for c, _ in columns]
+        score = " + ".join(f"{w} * CAST({f} AS DOUBLE)" for (_, w), f in zip(columns, found))
+        parts.append(f"""
+            (SELECT '{source}' AS source, {key} AS item_key, CAST({label} AS VARCHAR) AS label,
+                    SUM({score}) AS rank
+             FROM gold.{table}, terms
+             GROUP BY ALL
+             HAVING bool_and({" OR ".join(found)})
+             ORDER BY rank DESC LIMIT $max_results)
+        """)
+
+    if not terms or not parts:
+        return pd.DataFrame(columns=["source", "item_key", "label", "rank"])
+
+    sql = f"""
+        WITH terms AS (SELECT unnest($terms::VARCHAR[]) AS term)
+        SELECT * FROM ({" UNION ALL ".join(parts)})
+        ORDER BY rank DESC, source, item_key
+        LIMIT $max_results
+    """
+    return con.execute(sql, {"terms": terms, "max_results": max_results}).df()
+
+
+def run_analyses(con):
+    results = {}
+    for q in parse_analyses():
+        print(f"\n== {q['name']} – {q['title']}")
+        results[q["name"]] = query(con, q["sql"])
+        print(results[q["name"]].head(10))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DuckDB offline analyses over Gold exports")
+    parser.add_argument("command", choices=["export", "run"])
+    parser.add_argument("--export-dir", default=EXPORT_DIR)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_gold(create_engine(DB_URI), args.export_dir)
+    else:
+        run_analyses(connect(args.export_dir))
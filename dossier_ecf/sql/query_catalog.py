@@ -0,0 +1,40 @@
+# -- =============================================================================
+# -- query_catalog.py
+# -- Découpe analyses.sql en requêtes nommées
+# --     chaque bloc commence par un en-tête "-- N. Titre" ;
+# --     la requête est tout le SQL qui suit jusqu'au bloc suivant
+# -- =============================================================================
+
+import os
+import re
+
+ANALYSES_SQL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "analyses.sql")
+
+_HEADER = re.compile(r"^--\s*(\d+)\.\s*(.+?)\s*$")
+
+
+def parse_analyses(path=ANALYSES_SQL):
+    """Retourne [{"name": "q1", "title": ..., "sql": ...}, ...] dans l'ordre du fichier."""
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+
+    queries = []
+    current = None
+
+    for line in lines:
+        header = _HEADER.match(line)
+        if header:
+            current = {"name": f"q{header.group(1)}", "title": header.group(2), "sql": []}
+            queries.append(current)
+            continue
+
+        # Commentaires et lignes vides hors requête ignorés
+        if current is None or line.lstrip().startswith("--"):
+            continue
+
+        current["sql"].append(line)
+
+    for q in queries:
+        q["sql"] = "\n".join(q["sql"]).strip().rstrip(";").strip()
+
+    return [q for q in queries if q["sql"]]
@@ -0,0 +1,269 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import resource
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import create_engine, text
+
+from benchmarks.synthetic_data import BENCH_DB_URI, check_not_production, generate
+from transformation import bronze_to_silver, silver_to_gold
+from transformation.gold_sql import create_views, drop_views
+from utils.logger import LOG_DIR
+from utils.pseudonymization import DEV_KEY_FLAG_ENV
+
+# ===============================================================================
+# Script Purpose:
+#     Benchmark de montée en charge de la couche transformation
+#     Pour chaque volume (--rows), remplit Bronze avec des données
+#     synthétiques puis chronomètre chaque clean_*, enrich_geo et create_* :
+#       - lignes en entrée / seconde
+#       - pic mémoire Python (tracemalloc) et hausse du RSS max du process
+#     et l'exposant d'échelle entre deux volumes successifs
+#     (1.0 = linéaire ; nettement au-dessus = falaise à investiguer).
+#
+#     --backend compare : chaque volume est traité par pandas puis par Polars,
+#     chacun dans un process neuf (le RSS max est un plus-haut du process :
+#     sans cela le second backend hériterait du pic du premier), et les
+#     clean_* sont comparés : temps, CPU (tous threads), pic tracemalloc,
+#     hausse du RSS max. tracemalloc ne voit que les allocations Python :
+#     pour Polars (mémoire Rust / Arrow), seule la colonne RSS est comparable.
+#
+#     Résultats : tableau en console + logs/benchmarks/transformations_<date>.json
+#
+# Usage (depuis src/) :
+#     python -m benchmarks.bench_transformations --rows 10000 100000 1000000 --db-uri postgresql+psycopg2://...
+#     python -m benchmarks.bench_transformations --rows 100000 1000000 --backend compare
+# ===============================================================================
+
+# Au-delà, le temps croît nettement plus vite que le volume
+CLIFF_EXPONENT = 1.3
+
+# (tâche, fonction, table lue pour compter les lignes en entrée)
+TASKS = [
+    ("clean_books", bronze_to_silver.clean_books, "bronze.books_raw"),
+    ("clean_quotes", bronze_to_silver.clean_quotes, "bronze.quotes_raw"),
+    ("clean_librairies", bronze_to_silver.clean_librairies, "bronze.librairies_raw"),
+    ("enrich_geo", bronze_to_silver.enrich_geo, "silver.librairies_clean"),
+    ("clean_ecommerce", bronze_to_silver.clean_ecommerce, "bronze.ecommerce_raw"),
+    ("create_dim_books", silver_to_gold.create_dim_books, "silver.books"),
+    ("create_dim_authors", silver_to_gold.create_dim_authors, "silver.quotes"),
+    ("create_dim_geo", silver_to_gold.create_dim_geo, "silver.librairies_clean"),
+    ("create_dim_products", silver_to_gold.create_dim_products, "silver.products_clean"),
+    ("create_fact_sales_books", silver_to_gold.create_fact_sales_books, "gold.dim_books"),
+    ("create_fact_sales_products", silver_to_gold.create_fact_sales_products, "gold.dim_products"),
+]
+
+CLEAN_TASKS = {"clean_books", "clean_quotes", "clean_librairies", "clean_ecommerce"}
+
+COMPARE = "compare"
+
+
+def _count(engine, table):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+
+
+def _max_rss():
+    # ru_maxrss : Kio sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def measure(fn, *args, trace_memory=True):
+    if trace_memory:
+        tracemalloc.start()
+    rss_before = _max_rss()
+    start, cpu_start = time.perf_counter(), time.process_time()
+
+    try:
+        fn(*args)
+    finally:
+        elapsed, cpu = time.perf_counter() - start, time.process_time() - cpu_start
+        peak = 0
+        if trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    return elapsed, cpu, peak, _max_rss() - rss_before
+
+
+def run_scale(engine, rows, backend, trace_memory=True, skip_generate=False):
+    if not skip_generate:
+        generate(engine, rows)
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS silver"))
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS gold"))
+        drop_views(conn)
+
+    results = []
+    for name, fn, source in TASKS:
+        input_rows = _count(engine, source)
+        args = (engine, backend) if name in CLEAN_TASKS else (engine,)
+
+        elapsed, cpu, peak, rss_growth = measure(fn, *args, trace_memory=trace_memory)
+        results.append({
+            "task": name,
+            "backend": backend,
+            "rows": rows,
+            "input_rows": input_rows,
+            "seconds": round(elapsed, 4),
+            "cpu_seconds": round(cpu, 4),
+            "rows_per_sec": round(input_rows / elapsed) if elapsed else None,
+            "peak_mib": round(peak / 1024 / 1024, 2),
+            "rss_growth_mib": round(rss_growth / 1024 / 1024, 2),
+        })
+
+    with engine.begin() as conn:
+        create_views(conn)
+
+    return results
+
+
+def _run_isolated(db_uri, rows, backend, trace_memory):
+    engine = create_engine(db_uri)
+    try:
+        return run_scale(engine, rows, backend, trace_memory, skip_generate=True)
+    finally:
+        engine.dispose()
+
+
+def run_compare(engine, db_uri, rows, trace_memory, skip_generate):
+    """Un jeu Bronze, puis chaque backend dans un process neuf."""
+    if not skip_generate:
+        generate(engine, rows)
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for backend in bronze_to_silver.BACKENDS:
+        # Historique SCD2 vidé : chaque backend fait le même chargement initial
+        with engine.begin() as conn:
+            conn.execute(text("DROP SCHEMA IF EXISTS silver CASCADE"))
+
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results += pool.submit(_run_isolated, db_uri, rows, backend, trace_memory).result()
+    return results
+
+
+def scaling_exponents(results):
+    """log(t2 / t1) / log(n2 / n1) pour chaque tâche et backend entre volumes successifs."""
+    by_task = {}
+    for r in results:
+        by_task.setdefault((r["task"], r["backend"]), []).append(r)
+
+    for runs in by_task.values():
+        runs.sort(key=lambda r: r["input_rows"])
+        for prev, cur in zip(runs, runs[1:]):
+            if prev["input_rows"] and cur["input_rows"] > prev["input_rows"] and prev["seconds"] > 0:
+                cur["scaling_exponent"] = round(
+                    math.log(cur["seconds"] / prev["seconds"])
+                    / math.log(cur["input_rows"] / prev["input_rows"]), 2
+                )
+
+
+def print_report(results):
+    header = (
+        f"{'task':<28} {'backend':<8} {'rows':>11} {'input':>11} {'seconds':>9} {'cpu s':>9} "
+        f"{'rows/s':>12} {'peak MiB':>9} {'RSS+ MiB':>9} {'exp':>6}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for r in results:
+        exponent = r.get("scaling_exponent")
+        flag = " ⚠" if exponent is not None and exponent > CLIFF_EXPONENT else ""
+        print(
+            f"{r['task']:<28} {r['backend']:<8} {r['rows']:>11,} {r['input_rows']:>11,} {r['seconds']:>9.3f} "
+            f"{r['cpu_seconds']:>9.3f} {r['rows_per_sec'] or 0:>12,} {r['peak_mib']:>9.1f} "
+            f"{r['rss_growth_mib']:>9.1f} {'' if exponent is None else exponent:>6}{flag}"
+        )
+
+
+def backend_comparison(results):
+    """clean_* : une ligne par (tâche, volume), pandas et Polars côte à côte."""
+    runs = {(r["task"], r["rows"], r["backend"]): r for r in results if r["task"] in CLEAN_TASKS}
+    comparison = []
+
+    for task, rows, _ in sorted(k for k in runs if k[2] == "pandas"):
+        pd_run, pl_run = runs[(task, rows, "pandas")], runs.get((task, rows, "polars"))
+        if pl_run is None:
+            continue
+        comparison.append({
+            "task": task,
+            "rows": rows,
+            **{f"{m}_{b}": run[m] for b, run in (("pandas", pd_run), ("polars", pl_run))
+               for m in ("seconds", "cpu_seconds", "peak_mib", "rss_growth_mib")},
+            "speedup": round(pd_run["seconds"] / pl_run["seconds"], 2) if pl_run["seconds"] else None,
+        })
+    return comparison
+
+
+def print_comparison(comparison):
+    header = (
+        f"{'task':<18} {'rows':>11} {'pandas s':>9} {'polars s':>9} {'speedup':>8} "
+        f"{'pd cpu':>8} {'pl cpu':>8} {'pd RSS+':>8} {'pl RSS+':>8} {'pd peak':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+
+    for c in comparison:
+        print(
+            f"{c['task']:<18} {c['rows']:>11,} {c['seconds_pandas']:>9.3f} {c['seconds_polars']:>9.3f} "
+            f"{c['speedup'] or 0:>7.2f}x {c['cpu_seconds_pandas']:>8.2f} {c['cpu_seconds_polars']:>8.2f} "
+            f"{c['rss_growth_mib_pandas']:>8.1f} {c['rss_growth_mib_polars']:>8.1f} {c['peak_mib_pandas']:>8.1f}"
+        )
+
+
+def main(scales, db_uri, backend, trace_memory, skip_generate, output):
+    engine = create_engine(db_uri)
+    # Silver / Gold sont aussi réécrits, même avec --skip-generate
+    check_not_production(engine)
+    # Données synthétiques : la clé RGPD de développement suffit
+    os.environ.setdefault(DEV_KEY_FLAG_ENV, "1")
+
+    results = []
+    for rows in sorted(scales):
+        print(f"=== {rows:,} rows ===")
+        if backend == COMPARE:
+            results += run_compare(engine, db_uri, rows, trace_memory, skip_generate)
+        else:
+            results += run_scale(engine, rows, backend, trace_memory, skip_generate)
+
+    scaling_exponents(results)
+    print_report(results)
+
+    comparison = backend_comparison(results)
+    if comparison:
+        print()
+        print_comparison(comparison)
+
+    output = output or os.path.join(
+        LOG_DIR, "benchmarks", f"transformations_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "backend": backend, "trace_memory": trace_memory, "results": results, "comparison": comparison,
+        }, f, indent=2)
+    print(f"results → {output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transformation layer scale benchmark")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--db-uri", default=BENCH_DB_URI, help="Test database (default: BENCH_DB_URI / db_bench)")
+    parser.add_argument(
+        "--backend", choices=[*bronze_to_silver.BACKENDS, COMPARE], default="pandas",
+        help=f"{COMPARE}: run every backend on the same Bronze data and compare the clean_* tasks",
+    )
+    parser.add_argument("--skip-generate", action="store_true", help="Reuse the current Bronze tables (single scale)")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Time without tracemalloc overhead")
+    parser.add_argument("--output", help="JSON results path")
+
+    args = parser.parse_args()
+    main(args.rows, args.db_uri, args.backend, not args.no_tracemalloc, args.skip_generate, args.output)
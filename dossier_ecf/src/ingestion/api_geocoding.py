@@ -1,10 +1,10 @@
-import json
 import time
 import requests
 import psycopg2
-from utils.logger import get_logger
+from utils.logger import get_hot_logger, get_logger
 from utils.minio_client import get_minio_client
-import io
+from utils.checkpoint import Checkpoint
+from utils.minio_sink import MinioNDJSONSink
 
 # ===============================================================================
 # Script Purpose:
@@ -12,6 +12,7 @@ import io
 # ===============================================================================
 
 logger = get_logger("bronze.api_geocoding")
+hot_logger = get_hot_logger("bronze.api_geocoding")
 
 BUCKET = "bronze"
 API_URL = "https://api-adresse.data.gouv.fr/search/"
@@ -24,7 +25,7 @@ conn = psycopg2.connect(
 )
 
 
-def run():
+def run(resume=False):
     logger.info("START Bronze geocoding → PostgreSQL & MinIO")
 
     cur = conn.cursor()
@@ -49,72 +50,83 @@ def run():
         "10 rue de Rivoli Paris"
     ]
 
-    results = []
+    checkpoint = Checkpoint(conn, "geocoding")
+    start = checkpoint.load(resume).get("address_index", -1) + 1
 
-    for addr in addresses:
-        try:
-            logger.info(f"Geocoding address: {addr}")
+    if checkpoint.completed:
+        cur.close()
+        conn.close()
+        return
 
-            r = requests.get(
-                API_URL,
-                params={"q": addr, "limit": 1},
-                timeout=10
-            )
-            r.raise_for_status()
+    # Adresses en échec lors de l'exécution interrompue d'abord, puis la suite
+    indexes = checkpoint.failed + list(range(start, len(addresses)))
 
-            data = r.json()
-
-            if not data.get("features"):
-                logger.warning(f"No result for address: {addr}")
-                continue
+    minio_client = get_minio_client()
 
-            f = data["features"][0]
+    if not minio_client.bucket_exists(BUCKET):
+        minio_client.make_bucket(BUCKET)
 
-            record = {
-                "address": addr,
-                "city": f["properties"].get("city"),
-                "postal_code": f["properties"].get("postcode"),
-                "latitude": f["geometry"]["coordinates"][1],
-                "longitude": f["geometry"]["coordinates"][0]
-            }
+    # Les records partent vers MinIO au fil des appels API (NDJSON compressé),
+    # un objet publié à chaque commit du checkpoint
+    with MinioNDJSONSink(minio_client, BUCKET, checkpoint.object_prefix("geocoding/geocoding_raw")) as sink:
+        checkpoint.add_sink(sink, "geocoding/geocoding_raw")
 
-            results.append(record)
+        for i in indexes:
+            addr = addresses[i]
+            try:
+                hot_logger.info("Geocoding address: %s", addr)
 
-            cur.execute("""
-                INSERT INTO bronze.geocoding_raw (
-                    address, city, postal_code, latitude, longitude
+                r = requests.get(
+                    API_URL,
+                    params={"q": addr, "limit": 1},
+                    timeout=10
                 )
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                record["address"],
-                record["city"],
-                record["postal_code"],
-                record["latitude"],
-                record["longitude"]
-            ))
-
-        except Exception as e:
-            logger.error(f"Error while geocoding '{addr}': {e}")
-
-        time.sleep(0.05)
-
-    conn.commit()
+                r.raise_for_status()
+
+                data = r.json()
+
+                # Pas de résultat : réponse valide, l'adresse est traitée
+                if not data.get("features"):
+                    logger.warning(f"No result for address: {addr}")
+                else:
+                    f = data["features"][0]
+
+                    record = {
+                        "address": addr,
+                        "city": f["properties"].get("city"),
+                        "postal_code": f["properties"].get("postcode"),
+                        "latitude": f["geometry"]["coordinates"][1],
+                        "longitude": f["geometry"]["coordinates"][0]
+                    }
+
+                    sink.write(record)
+
+                    cur.execute("""
+                        INSERT INTO bronze.geocoding_raw (
+                            address, city, postal_code, latitude, longitude
+                        )
+                        VALUES (%s, %s, %s, %s, %s)
+                    """, (
+                        record["address"],
+                        record["city"],
+                        record["postal_code"],
+                        record["latitude"],
+                        record["longitude"]
+                    ))
+
+            except Exception as e:
+                # Gardée dans le checkpoint : la reprise la retentera
+                logger.error(f"Error while geocoding '{addr}': {e}")
+                checkpoint.fail(i)
+            else:
+                checkpoint.retried(i)
+
+            checkpoint.advance({"address_index": max(i, checkpoint.cursor.get("address_index", -1))}, 1)
+
+            time.sleep(0.05)
+
+    checkpoint.complete()
     cur.close()
     conn.close()
 
-    logger.info("Uploading geocoding raw data to MinIO")
-
-    minio_client = get_minio_client()
-    
-
-    data_bytes = json.dumps(results, indent=2).encode("utf-8")
-    data_stream = io.BytesIO(data_bytes)
-
-    minio_client.put_object(
-        bucket_name=BUCKET,
-        object_name="geocoding/geocoding_raw.json",
-        data=data_stream,
-        length=len(data_bytes),
-        content_type="application/json"
-    )
     logger.info("SUCCESS Bronze geocoding ingestion completed")
\ No newline at end of file
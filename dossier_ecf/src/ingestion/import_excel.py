@@ -1,9 +1,18 @@
-import json
-import pandas as pd
+import argparse
+import csv
+import hashlib
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+from openpyxl import load_workbook
 from sqlalchemy import create_engine, text
-from utils.logger import get_logger
+from sqlalchemy.pool import NullPool
+from utils.logger import get_logger, get_run_id, setup_logging
 from utils.minio_client import get_minio_client
-import io
+from utils.minio_sink import MinioNDJSONSink
 
 
 # ===============================================================================
@@ -23,6 +32,19 @@ import io
 #date_partenariat
 #specialite
 
+#     Import d'un répertoire de fichiers partenaires (.xlsx / .csv) :
+#     - empreinte sha256 de chaque fichier ; les fichiers déjà présents dans
+#       bronze.ingested_files sont ignorés → relancer l'import ne recharge rien
+#     - un fichier par processus (ProcessPoolExecutor, WORKERS au plus)
+#     - lecture en flux : openpyxl read_only (ligne à ligne) / csv.reader,
+#       jamais de DataFrame du fichier entier
+#     - chargement par lots de BATCH_ROWS via COPY, empreinte enregistrée dans
+#       la même transaction → un fichier est chargé entièrement ou pas du tout
+#     - copie brute dans MinIO (librairies/<fichier>_<empreinte>.ndjson.gz)
+#     - colonnes de données en TEXT (valeurs telles que reçues : "01 42 78 90 12",
+#       "15/03/2021", "385 000") ; conversion des types en Silver
+#     - première exécution sur une base déjà chargée par l'ancien import :
+#       l'empreinte de LEGACY_FILE est enregistrée sans recharger le classeur
 
 #NB : pandas.to_sql() ne fonctionne PAS avec psycopg directement , il faut SQLAlchemy
 
@@ -33,56 +55,306 @@ import io
 
 logger = get_logger("bronze.import_excel")
 DB_URI = "postgresql+psycopg2://admin:admin@db:5432/datapulse"
-engine = create_engine(DB_URI)
 
-with engine.begin() as conn:
-    conn.execute(text("CREATE SCHEMA IF NOT EXISTS bronze"))
 BUCKET = "bronze"
-EXCEL_PATH = "data/partenaire_librairies.xlsx"
+PARTNER_DIR = os.getenv("DATAPULSE_PARTNER_DIR", "data")
+PARTNER_EXTENSIONS = (".xlsx", ".csv")
+SOURCES = {".xlsx": "excel_partenaire", ".csv": "csv_partenaire"}
 
+# Classeur chargé (sans empreinte) par l'import précédent, fichier unique
+LEGACY_FILE = "partenaire_librairies.xlsx"
 
-def run():
-    logger.info("START Bronze Excel → PostgreSQL & MinIO")
+WORKERS = min(4, os.cpu_count() or 1)
+BATCH_ROWS = 10_000
+HASH_BLOCK = 1024 * 1024
 
-    # Load Excel file
-    df = pd.read_excel(EXCEL_PATH)
-    logger.info(f"{len(df)} rows loaded from Excel")
+COLUMNS = [
+    "nom_librairie", "adresse", "code_postal", "ville", "contact_nom",
+    "contact_email", "contact_telephone", "ca_annuel", "date_partenariat", "specialite"
+]
 
-    # Add Bronze metadata
-    df["ingestion_date"] = pd.Timestamp.utcnow()
-    df["source"] = "excel_partenaire"
+LIBRAIRIES_DDL = f"""
+    CREATE TABLE IF NOT EXISTS bronze.librairies_raw (
+        {", ".join(f"{c} TEXT" for c in COLUMNS)},
+        ingestion_date TIMESTAMP,
+        source TEXT
+    )
+"""
 
-    # Ensure bronze schema exists
-    with engine.begin() as conn:
-        conn.execute(text("CREATE SCHEMA IF NOT EXISTS bronze;"))
+INGESTED_FILES_DDL = """
+    CREATE TABLE IF NOT EXISTS bronze.ingested_files (
+        checksum TEXT PRIMARY KEY,
+        file_name TEXT NOT NULL,
+        source TEXT,
+        rows BIGINT,
+        ingested_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
 
-    logger.info("Insert data into bronze.librairies_raw")
 
-    df.to_sql(
-        name="librairies_raw",
-        con=engine,
-        schema="bronze",
-        if_exists="append",
-        index=False
-    )
+# ==============================================================================
+# FICHIERS
+# ==============================================================================
+def partner_files(path):
+    """Fichiers partenaires d'un répertoire (non récursif), ou le fichier lui-même."""
+    path = Path(path)
+    if path.is_file():
+        return [path]
+    return sorted(p for p in path.iterdir() if p.is_file() and p.suffix.lower() in PARTNER_EXTENSIONS)
+
+
+def file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _header_index(header, path):
+    names = [str(h).strip().lower() if h is not None else "" for h in header]
+    unknown = [n for n in names if n and n not in COLUMNS]
+    if unknown:
+        logger.warning(f"{path.name}: ignored columns {unknown}")
+    return [names.index(c) if c in names else None for c in COLUMNS]
+
+
+def iter_rows(path):
+    """Lignes du fichier, une à une, dans l'ordre de COLUMNS (None si colonne absente)."""
+    if path.suffix.lower() == ".xlsx":
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            yield from _project(rows, path)
+        finally:
+            workbook.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            try:
+                dialect = csv.Sniffer().sniff(f.read(64 * 1024), delimiters=",;\t")
+            except csv.Error:
+                dialect = csv.excel
+            f.seek(0)
+            yield from _project(csv.reader(f, dialect), path)
 
-    # Store raw data in MinIO
-    logger.info("Uploading raw Excel data to MinIO")
 
-    minio_client = get_minio_client()
+def _project(rows, path):
+    index = _header_index(next(rows, []), path)
+    for row in rows:
+        if not any(v not in (None, "") for v in row):
+            continue
+        yield [row[i] if i is not None and i < len(row) else None for i in index]
 
-    if not minio_client.bucket_exists(BUCKET):
-        minio_client.make_bucket(BUCKET)
 
-    data_bytes = df.to_json(orient="records", indent=2).encode("utf-8")
-    data_stream = io.BytesIO(data_bytes)
+def _csv_value(value):
+    # Tout arrive en texte : seules les cellules typées d'Excel sont formatées
+    if value is None:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))       # 385000.0 lu par openpyxl → "385000"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, str):
+        return value.strip() or None
+    return str(value)
 
-    minio_client.put_object(
-        bucket_name=BUCKET,
-        object_name="librairies/librairies_raw.json",
-        data=data_stream,
-        length=len(data_bytes),
-        content_type="application/json"
+
+# ==============================================================================
+# CHARGEMENT D'UN FICHIER (processus de travail)
+# ==============================================================================
+def _init_worker(run_id):
+    # Le thread d'écriture des logs ne survit pas au fork : on le relance
+    setup_logging(run_id=run_id)
+
+
+def load_file(path, checksum, db_uri=DB_URI, upload=True):
+    """COPY du fichier dans bronze.librairies_raw par lots de BATCH_ROWS ; renvoie le nombre de lignes."""
+    path = Path(path)
+    source = SOURCES[path.suffix.lower()]
+    ingestion_date = datetime.now(timezone.utc).replace(tzinfo=None).isoformat()
+    copy_sql = (
+        f"COPY bronze.librairies_raw ({', '.join(COLUMNS)}, ingestion_date, source) "
+        "FROM STDIN WITH (FORMAT csv)"
     )
 
-    logger.info("SUCCESS Bronze Excel ingestion completed")
\ No newline at end of file
+    engine = create_engine(db_uri, poolclass=NullPool)
+    raw = engine.raw_connection()
+    sink = None
+    rows = 0
+
+    try:
+        with raw.cursor() as cur:
+            # Réserve l'empreinte en premier : un import concurrent du même
+            # fichier attend ici puis est ignoré
+            cur.execute(
+                "INSERT INTO bronze.ingested_files (checksum, file_name, source) VALUES (%s, %s, %s) "
+                "ON CONFLICT (checksum) DO NOTHING",
+                (checksum, path.name, source)
+            )
+            if cur.rowcount == 0:
+                raw.rollback()
+                return 0
+
+            if upload:
+                client = get_minio_client()
+                sink = MinioNDJSONSink(client, BUCKET, f"librairies/{path.stem}_{checksum[:12]}").open()
+
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            pending = 0
+
+            for values in iter_rows(path):
+                values = [_csv_value(v) for v in values]
+                writer.writerow(values + [ingestion_date, source])
+                if sink is not None:
+                    sink.write({**dict(zip(COLUMNS, values)), "ingestion_date": ingestion_date, "source": source})
+                pending += 1
+
+                if pending == BATCH_ROWS:
+                    buffer.seek(0)
+                    cur.copy_expert(copy_sql, buffer)
+                    rows += pending
+                    buffer.seek(0)
+                    buffer.truncate()
+                    pending = 0
+
+            if pending:
+                buffer.seek(0)
+                cur.copy_expert(copy_sql, buffer)
+                rows += pending
+
+            cur.execute("UPDATE bronze.ingested_files SET rows = %s WHERE checksum = %s", (rows, checksum))
+
+        if sink is not None:
+            sink.close()
+            sink = None
+        raw.commit()
+
+    except Exception:
+        raw.rollback()
+        if sink is not None:
+            sink.abort()
+        raise
+
+    finally:
+        raw.close()
+        engine.dispose()
+
+    return rows
+
+
+# ==============================================================================
+# TABLES
+# ==============================================================================
+def _text_columns(conn):
+    """Tables créées par l'ancien import (types devinés par pandas) : colonnes passées en TEXT."""
+    typed = conn.execute(text("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = 'bronze' AND table_name = 'librairies_raw'
+          AND column_name = ANY(:columns) AND data_type <> 'text'
+    """), {"columns": COLUMNS}).scalars().all()
+
+    for col in typed:
+        logger.info(f"bronze.librairies_raw.{col} → TEXT")
+        conn.execute(text(f"ALTER TABLE bronze.librairies_raw ALTER COLUMN {col} TYPE TEXT USING {col}::TEXT"))
+
+
+def _backfill_legacy(conn, checksums):
+    """Le classeur déjà chargé par l'ancien import est enregistré, pas rechargé."""
+    rows = conn.execute(text(
+        "SELECT COUNT(*) FROM bronze.librairies_raw WHERE source = :source"
+    ), {"source": SOURCES[".xlsx"]}).scalar()
+    if not rows:
+        return
+
+    for checksum, f in checksums.items():
+        if f.name == LEGACY_FILE:
+            conn.execute(text("""
+                INSERT INTO bronze.ingested_files (checksum, file_name, source, rows)
+                VALUES (:checksum, :file_name, :source, :rows)
+                ON CONFLICT (checksum) DO NOTHING
+            """), {"checksum": checksum, "file_name": f.name, "source": SOURCES[".xlsx"], "rows": rows})
+            logger.info(f"{f.name}: already in bronze.librairies_raw ({rows} rows) – registered, not reloaded")
+
+
+# ==============================================================================
+# RUN
+# ==============================================================================
+def run(path=PARTNER_DIR, workers=WORKERS, upload=True):
+    logger.info(f"START Bronze partner files → PostgreSQL & MinIO ({path})")
+
+    engine = create_engine(DB_URI)
+
+    files = partner_files(path)
+    checksums = {}
+    for f in files:
+        checksums.setdefault(file_checksum(f), f)      # copies identiques : une seule
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS bronze"))
+        first_run = conn.execute(text("SELECT to_regclass('bronze.ingested_files') IS NULL")).scalar()
+
+        conn.execute(text(LIBRAIRIES_DDL))
+        _text_columns(conn)
+        conn.execute(text(INGESTED_FILES_DDL))
+
+        if first_run:
+            _backfill_legacy(conn, checksums)
+
+    with engine.connect() as conn:
+        known = set(conn.execute(
+            text("SELECT checksum FROM bronze.ingested_files WHERE checksum = ANY(:c)"),
+            {"c": list(checksums)}
+        ).scalars())
+
+    todo = {c: f for c, f in checksums.items() if c not in known}
+    logger.info(f"{len(files)} partner files, {len(files) - len(todo)} already ingested or duplicated")
+
+    if not todo:
+        logger.info("SUCCESS Bronze partner import: nothing new")
+        return 0
+
+    if upload:
+        minio_client = get_minio_client()
+        if not minio_client.bucket_exists(BUCKET):
+            minio_client.make_bucket(BUCKET)
+
+    total = 0
+    failed = []
+
+    with ProcessPoolExecutor(
+        max_workers=max(1, min(workers, len(todo))),
+        initializer=_init_worker,
+        initargs=(get_run_id(),)
+    ) as pool:
+        futures = {
+            pool.submit(load_file, str(f), c, DB_URI, upload): f
+            for c, f in todo.items()
+        }
+        for future in as_completed(futures):
+            f = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                logger.error(f"{f.name}: import failed: {e}")
+                failed.append(f.name)
+                continue
+            total += rows
+            logger.info(f"{f.name}: {rows} rows loaded into bronze.librairies_raw")
+
+    if failed:
+        raise RuntimeError(f"Partner import failed for {failed}")
+
+    logger.info(f"SUCCESS Bronze partner import: {total} rows from {len(todo)} files")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import partner spreadsheets into bronze.librairies_raw")
+    parser.add_argument("path", nargs="?", default=PARTNER_DIR, help="Directory of .xlsx/.csv files, or a single file")
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--no-upload", action="store_true", help="Skip the raw copy to MinIO")
+    args = parser.parse_args()
+
+    run(args.path, workers=args.workers, upload=not args.no_upload)
@@ -1,12 +1,13 @@
-import json
 import time
 import requests
 import psycopg2
-import io
 
 from bs4 import BeautifulSoup
-from utils.logger import get_logger
+from utils.logger import get_hot_logger, get_logger
 from utils.minio_client import get_minio_client
+from utils.checkpoint import Checkpoint
+from utils.minio_sink import MinioNDJSONSink
+from utils.sketches import SketchSet
 
 
 # ===============================================================================
@@ -18,10 +19,12 @@ from utils.minio_client import get_minio_client
 
 
 logger = get_logger("bronze.scrape_books")
+hot_logger = get_hot_logger("bronze.scrape_books")
 
 BUCKET = "bronze"
 BASE_URL = "https://books.toscrape.com/catalogue/page-{}.html"
 HEADERS = {"User-Agent": "DataPulseBot/1.0"}
+LAST_PAGE = 50
 
 DB_CONN = psycopg2.connect(
     host="db",
@@ -31,7 +34,7 @@ DB_CONN = psycopg2.connect(
 )
 
 
-def run():
+def run(resume=False):
     logger.info("START Bronze scraping → PostgreSQL & MinIO (Books)")
 
     cursor = DB_CONN.cursor()
@@ -55,62 +58,76 @@ def run():
     if not minio_client.bucket_exists(BUCKET):
         minio_client.make_bucket(BUCKET)
 
-    books = []
-
-    for page in range(1, 51):
-        try:
-            url = BASE_URL.format(page)
-            logger.info(f"Scraping page {page}")
-
-            r = requests.get(url, headers=HEADERS, timeout=10)
-            r.raise_for_status()
-
-        except Exception as e:
-            logger.error(f"Failed to fetch page {page}: {e}")
-            continue
-
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        for b in soup.select("article.product_pod"):
-            record = {
-                "title": b.h3.a["title"],
-                "price": b.select_one(".price_color").text[1:],
-                "rating": b.p["class"][1],  # Raw value (e.g. 'Three')
-                "category": "Books",
-                "source": "books.toscrape.com"
-            }
-
-            books.append(record)
-
-            cursor.execute("""
-                INSERT INTO bronze.books_raw (
-                    title, price, rating, category, source
-                )
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                record["title"],
-                record["price"],
-                record["rating"],
-                record["category"],
-                record["source"]
-            ))
-
-        time.sleep(1)  # polite scraping
-
-    DB_CONN.commit()
+    checkpoint = Checkpoint(DB_CONN, "books")
+    # Sketches du jour (distincts / top-K), fusionnés à chaque commit du checkpoint
+    sketch_set = SketchSet("bronze.books_raw")
+    checkpoint.add_hook(sketch_set.save)
+    start_page = checkpoint.load(resume).get("page", 0) + 1
+
+    if checkpoint.completed:
+        cursor.close()
+        DB_CONN.close()
+        return
+
+    # Pages en échec lors de l'exécution interrompue d'abord, puis la suite
+    pages = checkpoint.failed + list(range(start_page, LAST_PAGE + 1))
+
+    # Les records partent vers MinIO au fil du scraping (NDJSON compressé),
+    # un objet publié à chaque commit du checkpoint
+    with MinioNDJSONSink(minio_client, BUCKET, checkpoint.object_prefix("books/books_raw")) as sink:
+        checkpoint.add_sink(sink, "books/books_raw")
+
+        for page in pages:
+            try:
+                url = BASE_URL.format(page)
+                hot_logger.info("Scraping page %s", page)
+
+                r = requests.get(url, headers=HEADERS, timeout=10)
+                r.raise_for_status()
+
+            except Exception as e:
+                # Gardée dans le checkpoint : la reprise la retentera
+                logger.error(f"Failed to fetch page {page}: {e}")
+                checkpoint.fail(page)
+                continue
+
+            soup = BeautifulSoup(r.text, "html.parser")
+            items = soup.select("article.product_pod")
+
+            page_records = []
+            for b in items:
+                record = {
+                    "title": b.h3.a["title"],
+                    "price": b.select_one(".price_color").text[1:],
+                    "rating": b.p["class"][1],  # Raw value (e.g. 'Three')
+                    "category": "Books",
+                    "source": "books.toscrape.com"
+                }
+
+                sink.write(record)
+                page_records.append(record)
+
+                cursor.execute("""
+                    INSERT INTO bronze.books_raw (
+                        title, price, rating, category, source
+                    )
+                    VALUES (%s, %s, %s, %s, %s)
+                """, (
+                    record["title"],
+                    record["price"],
+                    record["rating"],
+                    record["category"],
+                    record["source"]
+                ))
+
+            sketch_set.update(page_records)
+            checkpoint.retried(page)
+            checkpoint.advance({"page": max(page, checkpoint.cursor.get("page", 0))}, len(items))
+
+            time.sleep(1)  # polite scraping
+
+    checkpoint.complete()
     cursor.close()
     DB_CONN.close()
 
-    logger.info("Uploading books raw data to MinIO")
-
-    data_bytes = json.dumps(books, indent=2).encode("utf-8")
-    data_stream = io.BytesIO(data_bytes)
-
-    minio_client.put_object(
-        bucket_name=BUCKET,
-        object_name="books/books_raw.json",
-        data=data_stream,
-        length=len(data_bytes),
-        content_type="application/json"
-    )
     logger.info("SUCCESS Bronze books ingestion completed")
\ No newline at end of file
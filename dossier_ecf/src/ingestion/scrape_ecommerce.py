@@ -5,6 +5,7 @@ import psycopg2
 from bs4 import BeautifulSoup
 from sqlalchemy import create_engine
 from utils.logger import get_logger
+from utils.checkpoint import Checkpoint
 
 # ===============================================================================
 # DDL Script: Create Bronze ecommerce Table
@@ -27,7 +28,7 @@ conn = psycopg2.connect(
 )
 
 
-def run():
+def run(resume=False):
     logger.info("START Bronze scraping – E-commerce")
 
     cur = conn.cursor()
@@ -46,6 +47,14 @@ def run():
         );
     """)
 
+    checkpoint = Checkpoint(conn, "ecommerce")
+    start = checkpoint.load(resume).get("product_index", -1) + 1
+
+    if checkpoint.completed:
+        cur.close()
+        conn.close()
+        return
+
     try:
         r = requests.get(BASE_URL, headers=HEADERS, timeout=10)
         r.raise_for_status()
@@ -57,7 +66,10 @@ def run():
 
     products_count = 0
 
-    for p in soup.select(".thumbnail"):
+    for i, p in enumerate(soup.select(".thumbnail")):
+        if i < start:
+            continue
+
         try:
             product_name = p.select_one(".title").text.strip()
             price = float(p.select_one(".price").text.replace("$", ""))
@@ -78,13 +90,14 @@ def run():
             ))
 
             products_count += 1
+            checkpoint.advance({"product_index": i}, 1)
 
         except Exception as e:
             logger.warning(f"Product parse error: {e}")
 
         time.sleep(0.2)
 
-    conn.commit()
+    checkpoint.complete()
     cur.close()
     conn.close()
 
@@ -1,11 +1,12 @@
-import json
 import time
 import requests
 import psycopg2
 from bs4 import BeautifulSoup
-from utils.logger import get_logger
+from utils.logger import get_hot_logger, get_logger
 from utils.minio_client import get_minio_client
-import io
+from utils.checkpoint import Checkpoint
+from utils.minio_sink import MinioNDJSONSink
+from utils.sketches import SketchSet
 
 
 # ===============================================================================
@@ -18,6 +19,7 @@ import io
 
 
 logger = get_logger("bronze.scrape_quotes")
+hot_logger = get_hot_logger("bronze.scrape_quotes")
 
 BASE_URL = "https://quotes.toscrape.com"
 HEADERS = {"User-Agent": "DataPulseBot/1.0 (ECF project)"}
@@ -31,7 +33,7 @@ conn = psycopg2.connect(
 )
 
 
-def run():
+def run(resume=False):
     logger.info("START Bronze scraping → PostgreSQL & MinIO (Quotes)")
 
     cur = conn.cursor()
@@ -54,75 +56,86 @@ def run():
     if not minio_client.bucket_exists(BUCKET):
         minio_client.make_bucket(BUCKET)
 
-    quotes = []
-    page = 1
-
-    while True:
-        url = f"{BASE_URL}/page/{page}/"
-        logger.info(f"Scraping page {page}")
-
-        try:
-            r = requests.get(url, headers=HEADERS, timeout=10)
-            if r.status_code == 404:
+    checkpoint = Checkpoint(conn, "quotes")
+    # Sketches du jour (distincts / top-K), fusionnés à chaque commit du checkpoint
+    sketch_set = SketchSet("bronze.quotes_raw")
+    checkpoint.add_hook(sketch_set.save)
+    page = checkpoint.load(resume).get("page", 0) + 1
+
+    if checkpoint.completed:
+        cur.close()
+        conn.close()
+        return
+
+    failure = None
+
+    # Les records partent vers MinIO au fil du scraping (NDJSON compressé),
+    # un objet publié à chaque commit du checkpoint
+    with MinioNDJSONSink(minio_client, BUCKET, checkpoint.object_prefix("quotes/quotes_raw")) as sink:
+        checkpoint.add_sink(sink, "quotes/quotes_raw")
+
+        while True:
+            url = f"{BASE_URL}/page/{page}/"
+            hot_logger.info("Scraping page %s", page)
+
+            try:
+                r = requests.get(url, headers=HEADERS, timeout=10)
+                if r.status_code == 404:
+                    break
+                r.raise_for_status()
+            except Exception as e:
+                # On garde les pages terminées : la reprise repartira de cette page
+                logger.error(f"HTTP error page {page}: {e}")
+                failure = e
                 break
-            r.raise_for_status()
-        except Exception as e:
-            logger.error(f"HTTP error page {page}: {e}")
-            break
 
-        soup = BeautifulSoup(r.text, "html.parser")
-        items = soup.select(".quote")
+            soup = BeautifulSoup(r.text, "html.parser")
+            items = soup.select(".quote")
 
-        if not items:
-            break
+            if not items:
+                break
 
-        for q in items:
-            tags_list = [t.text for t in q.select(".tag")]
-            tags_str = ",".join(tags_list)
+            page_records = []
+            for q in items:
+                tags_list = [t.text for t in q.select(".tag")]
+                tags_str = ",".join(tags_list)
 
-            record = {
-                "quote": q.select_one(".text").text.strip(),
-                "author": q.select_one(".author").text.strip(),
-                "tags": tags_str
+                record = {
+                    "quote": q.select_one(".text").text.strip(),
+                    "author": q.select_one(".author").text.strip(),
+                    "tags": tags_str
                 
-            }
-
-            quotes.append(record)
-
-            cur.execute("""
-                INSERT INTO bronze.quotes_raw (
-                    quote, author, tags
-                )
-                VALUES (%s, %s, %s)
-            """, (
-                record["quote"],
-                record["author"],
-                record["tags"]
+                }
+
+                sink.write(record)
+                page_records.append(record)
+
+                cur.execute("""
+                    INSERT INTO bronze.quotes_raw (
+                        quote, author, tags
+                    )
+                    VALUES (%s, %s, %s)
+                """, (
+                    record["quote"],
+                    record["author"],
+                    record["tags"]
                 
-            ))
-
-        page += 1
-        time.sleep(1)  # polite scraping
-
-    conn.commit()
-    cur.close()
-    conn.close()
-
-    logger.info("Uploading quotes raw data to MinIO")
+                ))
 
+            sketch_set.update(page_records)
+            checkpoint.advance({"page": page}, len(items))
 
-    
-    logger.info("SUCCESS Bronze books ingestion completed")
+            page += 1
+            time.sleep(1)  # polite scraping
 
-    data_bytes = json.dumps(quotes, indent=2).encode("utf-8")
-    data_stream = io.BytesIO(data_bytes)
+    if failure is not None:
+        checkpoint.commit()
+        cur.close()
+        conn.close()
+        raise failure
 
+    checkpoint.complete()
+    cur.close()
+    conn.close()
 
-    minio_client.put_object(
-            bucket_name=BUCKET,
-            object_name="quotes/quotes_raw.json",
-            data=data_stream,
-            length=len(data_bytes),
-            content_type="application/json"
-        )
     logger.info("SUCCESS Bronze quotes ingestion completed")
\ No newline at end of file
@@ -1,5 +1,9 @@
 import argparse
-from utils.logger import get_logger
+from datetime import datetime
+
+from utils import arrow_cache
+from utils.logger import LOG_DIR, get_logger, get_run_id, setup_logging
+from utils.profiling import enable as enable_profiling, profile_task
 
 from ingestion.scrape_books import run as scrape_books
 from ingestion.scrape_quotes import run as scrape_quotes
@@ -23,30 +27,15 @@ from transformation.silver_to_gold import run as silver_to_gold
 logger = get_logger("pipeline")
 
 
-def main(step: str):
-    logger.info(f"PIPELINE START – step={step}")
-
-    try:
-        if step == "bronze":
-            logger.info("Running Bronze ingestion")
-
-            
-            scrape_books()
-            scrape_quotes()
-            import_excel() 
-            scrape_products()
-            api_geocoding()
+def main(step: str, resume: bool = False, silver_backend: str = "pandas", gold_mode: str = "pandas", profile: str = None):
+    logger.info(f"PIPELINE START – step={step} run_id={get_run_id()}")
 
-        elif step == "silver":
-            logger.info("Running Bronze → Silver transformation")
-            bronze_to_silver()
+    if profile:
+        enable_profiling(profile, f"{step}_{datetime.now():%Y%m%d_%H%M%S}")
 
-        elif step == "gold":
-            logger.info("Running Silver → Gold transformation")
-            silver_to_gold()
-
-        else:
-            raise ValueError("Invalid step. Use: bronze | silver | gold")
+    try:
+        with profile_task(step, level="step"):
+            run_step(step, resume, silver_backend, gold_mode)
 
     except Exception as e:
         logger.error(f"Pipeline failed at step={step}: {e}", exc_info=True)
@@ -55,14 +44,92 @@ def main(step: str):
     logger.info(f"PIPELINE END – step={step}")
 
 
+def run_step(step: str, resume: bool, silver_backend: str, gold_mode: str):
+    if step == "bronze":
+        logger.info("Running Bronze ingestion")
+
+        with profile_task("scrape_books"):
+            scrape_books(resume=resume)
+        with profile_task("scrape_quotes"):
+            scrape_quotes(resume=resume)
+        with profile_task("import_excel"):
+            import_excel()
+        with profile_task("scrape_products"):
+            scrape_products(resume=resume)
+        with profile_task("api_geocoding"):
+            api_geocoding(resume=resume)
+
+    elif step == "silver":
+        logger.info("Running Bronze → Silver transformation")
+        bronze_to_silver(backend=silver_backend)
+
+    elif step == "gold":
+        logger.info("Running Silver → Gold transformation")
+        silver_to_gold(mode=gold_mode)
+
+    else:
+        raise ValueError("Invalid step. Use: bronze | silver | gold")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="DataPulse ETL Pipeline")
     parser.add_argument(
         "--step",
         required=True,
+        nargs="+",
         choices=["bronze", "silver", "gold"],
-        help="Pipeline step to run"
+        help="Pipeline step(s) to run, in the given order"
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume interrupted Bronze scrapes from their last checkpoint"
+    )
+    parser.add_argument(
+        "--silver-backend",
+        choices=["pandas", "polars"],
+        default="pandas",
+        help="DataFrame engine used by the Bronze → Silver cleaning"
+    )
+    parser.add_argument(
+        "--gold-mode",
+        choices=["pandas", "sql"],
+        default="pandas",
+        help="Build Gold with pandas, or in-database via gold_staging and an atomic swap"
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="step",
+        choices=["step", "tasks"],
+        help="Profile the whole step or each task (cProfile + tracemalloc, written under logs/<run_id>/profiles/)"
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        help="Log output format (default: DATAPULSE_LOG_FORMAT or text)"
+    )
+    parser.add_argument(
+        "--run-id",
+        help="Run identifier shared by separate step invocations (logs and Arrow cache)"
+    )
+    parser.add_argument(
+        "--arrow-cache",
+        action="store_true",
+        help="Hand Silver frames to Gold through a local memory-mapped Arrow cache"
     )
 
     args = parser.parse_args()
-    main(args.step)
+    setup_logging(fmt=args.log_format, run_id=args.run_id, log_dir=LOG_DIR)
+
+    if args.arrow_cache:
+        arrow_cache.enable(get_run_id())
+
+    for step in args.step:
+        main(
+            step,
+            resume=args.resume,
+            silver_backend=args.silver_backend,
+            gold_mode=args.gold_mode,
+            profile=args.profile
+        )
@@ -0,0 +1,185 @@
+import re
+from difflib import SequenceMatcher
+
+import numpy as np
+import pandas as pd
+
+# ===============================================================================
+# Script Purpose:
+#     Rapprochement d'adresses librairies ↔ géocodage
+#     - clé de jointure normalisée (casse, accents, ponctuation, abréviations
+#       de types de voie, nom de ville en fin d'adresse)
+#     - blocage des candidats par code postal (à défaut : par ville)
+#     - score flou uniquement à l'intérieur de chaque bloc
+#     → le coût dépend de la taille des blocs, pas de librairies × géocodages
+# ===============================================================================
+
+MATCH_THRESHOLD = 0.85
+
+STREET_TYPES = {
+    "all": "allee",
+    "av": "avenue",
+    "ave": "avenue",
+    "bd": "boulevard",
+    "bld": "boulevard",
+    "blvd": "boulevard",
+    "ch": "chemin",
+    "che": "chemin",
+    "crs": "cours",
+    "fbg": "faubourg",
+    "imp": "impasse",
+    "pl": "place",
+    "pass": "passage",
+    "qu": "quai",
+    "r": "rue",
+    "rte": "route",
+    "sq": "square",
+    "st": "saint",
+    "ste": "sainte",
+}
+
+STOPWORDS = {"d", "de", "des", "du", "l", "la", "le", "les"}
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_STREET_NUMBER = re.compile(r"^(\d+)\s*(?:bis|ter)?\b")
+
+
+# ==============================================================================
+# NORMALISATION
+# ==============================================================================
+def _strip_accents(s):
+    return (
+        s.str.normalize("NFKD")
+        .str.encode("ascii", errors="ignore")
+        .str.decode("ascii")
+    )
+
+
+def normalize_text(s):
+    # astype avant fillna : une colonne category refuse une valeur hors catégories
+    s = s.astype("string").fillna("").str.lower()
+    s = _strip_accents(s)
+    return s.str.replace(_NON_ALNUM, " ", regex=True).str.strip()
+
+
+def normalize_postal_code(s):
+    digits = s.astype("string").str.extract(r"(\d{4,5})", expand=False)
+    return digits.str.zfill(5)
+
+
+def _normalize_tokens(address, city):
+    tokens = [STREET_TYPES.get(t, t) for t in address.split()]
+    city_tokens = city.split()
+
+    # "15 rue des Francs Bourgeois Paris" → la ville n'appartient pas à la voie
+    if city_tokens and tokens[-len(city_tokens):] == city_tokens:
+        tokens = tokens[:-len(city_tokens)]
+
+    return " ".join(t for t in tokens if t not in STOPWORDS)
+
+
+def address_key(address, city=None):
+    address = normalize_text(address)
+    city = normalize_text(city) if city is not None else pd.Series("", index=address.index)
+
+    return pd.Series(
+        [_normalize_tokens(a, c) for a, c in zip(address, city)],
+        index=address.index,
+        dtype=object,
+    )
+
+
+def _block_keys(index, postal_code, city):
+    city = normalize_text(city) if city is not None else pd.Series("", index=index)
+
+    if postal_code is None:
+        return city
+    return normalize_postal_code(postal_code).fillna(city)
+
+
+def _street_number(key):
+    m = _STREET_NUMBER.match(key)
+    return m.group(1) if m else None
+
+
+# ==============================================================================
+# INDEX
+# ==============================================================================
+class AddressIndex:
+    """Index précalculé des adresses géocodées, bloqué par code postal."""
+
+    def __init__(self, addresses, postal_codes=None, cities=None):
+        keys = address_key(addresses, cities)
+        blocks = _block_keys(keys.index, postal_codes, cities)
+
+        self.blocks = {}
+        self.exact = {}
+
+        for pos, (block, key) in enumerate(zip(blocks, keys)):
+            if not key:
+                continue
+            self.exact.setdefault((block, key), pos)
+            self.blocks.setdefault(block, []).append((pos, key, _street_number(key)))
+
+    def _best_in_block(self, block, key):
+        number = _street_number(key)
+        best_pos, best_score = -1, 0.0
+
+        for pos, candidate, candidate_number in self.blocks.get(block, ()):
+            # Numéros de voie différents : pas la même adresse
+            if number and candidate_number and number != candidate_number:
+                continue
+
+            score = SequenceMatcher(None, key, candidate).ratio()
+            if score > best_score:
+                best_pos, best_score = pos, score
+
+        return best_pos, best_score
+
+    def match(self, addresses, postal_codes=None, cities=None, threshold=MATCH_THRESHOLD):
+        """Retourne, pour chaque adresse, la position du géocodage retenu (-1 sinon) et son score."""
+        keys = address_key(addresses, cities)
+        blocks = _block_keys(keys.index, postal_codes, cities)
+
+        positions = np.full(len(keys), -1, dtype=np.int64)
+        scores = np.zeros(len(keys), dtype=float)
+
+        for i, (block, key) in enumerate(zip(blocks, keys)):
+            if not key:
+                continue
+
+            exact = self.exact.get((block, key))
+            if exact is not None:
+                positions[i], scores[i] = exact, 1.0
+                continue
+
+            pos, score = self._best_in_block(block, key)
+            if score >= threshold:
+                positions[i], scores[i] = pos, score
+
+        return positions, scores
+
+
+def match_addresses(left, right, left_cols, right_cols, threshold=MATCH_THRESHOLD):
+    """
+    Jointure gauche floue de `left` sur `right`.
+    left_cols / right_cols : (adresse, code postal, ville) ; None si absente.
+    """
+    def _cols(df, cols):
+        return [df[c] if c is not None and c in df.columns else None for c in cols]
+
+    index = AddressIndex(*_cols(right, right_cols))
+    positions, scores = index.match(*_cols(left, left_cols), threshold=threshold)
+
+    matched = right.reset_index(drop=True).reindex(positions)
+    matched.index = left.index
+
+    # Mêmes suffixes que DataFrame.merge pour les colonnes communes
+    overlap = left.columns.intersection(matched.columns)
+    result = pd.concat([
+        left.rename(columns={c: f"{c}_x" for c in overlap}),
+        matched.rename(columns={c: f"{c}_y" for c in overlap}),
+    ], axis=1)
+    result["match_score"] = np.where(positions >= 0, scores, np.nan)
+
+    return result
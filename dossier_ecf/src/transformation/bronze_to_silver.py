@@ -2,7 +2,18 @@
 
 import pandas as pd
 from sqlalchemy import create_engine, text
+from utils import arrow_cache, sketches
 from utils.logger import get_logger
+from utils.profiling import profile_task
+from utils.pseudonymization import apply_rgpd_policy
+from transformation import scd2
+from transformation.address_matching import match_addresses, normalize_postal_code
+from transformation.schemas import fillna_keep_dtype, parse_date, parse_number, read_table
+
+try:
+    from transformation import polars_backend
+except ImportError:  # polars optionnel : le backend pandas reste la référence
+    polars_backend = None
 
 # ===============================================================================
 # Script Purpose:
@@ -23,16 +34,19 @@ logger = get_logger("bronze_to_silver")
 
 DB_URI = "postgresql+psycopg2://admin:admin@db:5432/datapulse"
 
+# pandas : exécution eager (référence)
+# polars : plan lazy optimisé et multi-threadé, mêmes règles de nettoyage
+BACKENDS = ("pandas", "polars")
+
 
 # ==============================================================================
 # BOOKS
 # ==============================================================================
-def clean_books(engine):
-    logger.info("Cleaning books data")
-
-    df = pd.read_sql("SELECT * FROM bronze.books_raw", engine)
-
-    df.drop_duplicates(subset=["title"], inplace=True)
+def transform_books(df):
+    # Bronze en ajout seul : on garde le dernier prix ingéré par titre
+    if "ingestion_date" in df.columns:
+        df = df.sort_values("ingestion_date", kind="stable", na_position="first")
+    df = df.drop_duplicates(subset=["title"], keep="last")
     df.dropna(subset=["title", "price"], inplace=True)
 
     # Nettoyage devises
@@ -48,29 +62,57 @@ def clean_books(engine):
     df.dropna(subset=["price"], inplace=True)
 
     df["title"] = df["title"].str.strip()
-    df["category"] = df["category"].fillna("Unknown")
+    df["category"] = fillna_keep_dtype(df["category"], "Unknown")
 
-    df.to_sql(
-        "books",
-        engine,
-        schema="silver",
-        if_exists="replace",
-        index=False
-    )
+    return df
 
+
+def clean_books(engine, backend="pandas"):
+    logger.info(f"Cleaning books data ({backend})")
+
+    if backend == "polars":
+        df = polars_backend.clean_books(engine)
+    else:
+        df = transform_books(read_table("SELECT * FROM bronze.books_raw", engine, "bronze.books_raw"))
+
+    # Historique SCD2 : seules les lignes nouvelles ou modifiées sont écrites
+    df = scd2.merge(engine, "books", df)
+
+    arrow_cache.put("silver.books", df)
+    sketches.record_snapshot(engine, "silver.books", df)
     logger.info("silver.books created")
 
 
 # ==============================================================================
 # QUOTES
 # ==============================================================================
-def clean_quotes(engine):
-    logger.info("Cleaning quotes data")
+def normalize_tags(tags):
+    """Tags normalisés : "Love, life,love" → "life,love" ; une ligne par tag (explode), minuscules, sans doublon, triés."""
+    parts = tags.str.split(",").explode().str.strip().str.lower()
+    parts = parts[parts.fillna("") != ""]
+
+    pairs = parts.rename("tag").rename_axis("row").reset_index()
+    pairs = pairs.drop_duplicates().sort_values(["row", "tag"])
+    joined = pairs.groupby("row", sort=False)["tag"].agg(",".join)
 
-    df = pd.read_sql("SELECT * FROM bronze.quotes_raw", engine)
+    return joined.reindex(tags.index).fillna("").where(tags.notna()).astype(tags.dtype)
 
-    df.drop_duplicates(subset=["quote"], inplace=True)
+
+def transform_quotes(df):
+    df = df.drop_duplicates(subset=["quote"], ignore_index=True)
     df["author"] = df["author"].str.strip()
+    df["tags"] = normalize_tags(df["tags"])
+
+    return df
+
+
+def clean_quotes(engine, backend="pandas"):
+    logger.info(f"Cleaning quotes data ({backend})")
+
+    if backend == "polars":
+        df = polars_backend.clean_quotes(engine)
+    else:
+        df = transform_quotes(read_table("SELECT * FROM bronze.quotes_raw", engine, "bronze.quotes_raw"))
 
     df.to_sql(
         "quotes",
@@ -80,29 +122,39 @@ def clean_quotes(engine):
         index=False
     )
 
+    arrow_cache.put("silver.quotes", df)
+    sketches.record_snapshot(engine, "silver.quotes", df)
     logger.info("silver.quotes created")
 
 
 # ==============================================================================
 # LIBRAIRIES (RGPD)
 # ==============================================================================
-def clean_librairies(engine):
-    logger.info("Cleaning librairies data with RGPD")
+def transform_librairies(df):
+    # Sécurisation colonnes RGPD (suppression + pseudonymisation à clé)
+    df = apply_rgpd_policy(df, "librairies")
 
-    df = pd.read_sql("SELECT * FROM bronze.librairies_raw", engine)
+    # Code postal : chaîne de 5 chiffres (01000), une seule fois ici
+    if "code_postal" in df.columns:
+        df["code_postal"] = normalize_postal_code(df["code_postal"])
 
-    # Sécurisation colonnes RGPD
-    for col in ["contact_email", "contact_telephone"]:
-        if col in df.columns:
-            df.drop(columns=[col], inplace=True)
-
-    if "contact_nom" in df.columns:
-        df["contact_nom"] = df["contact_nom"].apply(
-            lambda x: f"user_{abs(hash(str(x))) % 10000}"
-        )
+    # Bronze en TEXT : formats français ("385 000", "15/03/2021") convertis ici
+    if "ca_annuel" in df.columns:
+        df["ca_annuel"] = parse_number(df["ca_annuel"]).round().astype("Int64")
 
     if "date_partenariat" in df.columns:
-        df["date_partenariat"] = pd.to_datetime(df["date_partenariat"], errors="coerce")
+        df["date_partenariat"] = parse_date(df["date_partenariat"])
+
+    return df
+
+
+def clean_librairies(engine, backend="pandas"):
+    logger.info(f"Cleaning librairies data with RGPD ({backend})")
+
+    if backend == "polars":
+        df = polars_backend.clean_librairies(engine)
+    else:
+        df = transform_librairies(read_table("SELECT * FROM bronze.librairies_raw", engine, "bronze.librairies_raw"))
 
     df.to_sql(
         "librairies_clean",
@@ -112,6 +164,7 @@ def clean_librairies(engine):
         index=False
     )
 
+    arrow_cache.put("silver.librairies_clean", df)
     logger.info("silver.librairies_clean created")
 
 
@@ -121,16 +174,22 @@ def clean_librairies(engine):
 def enrich_geo(engine):
     logger.info("Enriching librairies with geocoding")
 
-    geo = pd.read_sql("SELECT * FROM bronze.geocoding_raw", engine)
-    libs = pd.read_sql("SELECT * FROM silver.librairies_clean", engine)
+    geo = read_table("SELECT * FROM bronze.geocoding_raw", engine, "bronze.geocoding_raw")
+    libs = arrow_cache.get("silver.librairies_clean")
+    if libs is None:
+        libs = read_table("SELECT * FROM silver.librairies_clean", engine, "silver.librairies_clean")
 
-    df = libs.merge(
+    # Clé d'adresse normalisée + blocage par code postal + score flou par bloc
+    df = match_addresses(
+        libs,
         geo,
-        left_on="adresse",
-        right_on="address",
-        how="left"
+        left_cols=("adresse", "code_postal", "ville"),
+        right_cols=("address", "postal_code", "city")
     )
 
+    matched = df["match_score"].notna().sum()
+    logger.info(f"{matched}/{len(df)} librairies matched to a geocoded address")
+
     df.to_sql(
         "librairies_geo",
         engine,
@@ -139,18 +198,15 @@ def enrich_geo(engine):
         index=False
     )
 
+    arrow_cache.put("silver.librairies_geo", df)
     logger.info("silver.librairies_geo created")
 
 
 # ==============================================================================
 # E-COMMERCE
 # ==============================================================================
-def clean_ecommerce(engine):
-    logger.info("Cleaning ecommerce data")
-
-    df = pd.read_sql("SELECT * FROM bronze.ecommerce_raw", engine)
-
-    df.dropna(subset=["product_name", "price"], inplace=True)
+def transform_ecommerce(df):
+    df = df.dropna(subset=["product_name", "price"])
     df.drop_duplicates(
         subset=["product_name", "category", "price"],
         inplace=True
@@ -162,22 +218,35 @@ def clean_ecommerce(engine):
     df["price"] = pd.to_numeric(df["price"], errors="coerce")
     df.dropna(subset=["price"], inplace=True)
 
-    df.to_sql(
-        "products_clean",
-        engine,
-        schema="silver",
-        if_exists="replace",
-        index=False
-    )
+    return df
+
 
+def clean_ecommerce(engine, backend="pandas"):
+    logger.info(f"Cleaning ecommerce data ({backend})")
+
+    if backend == "polars":
+        df = polars_backend.clean_ecommerce(engine)
+    else:
+        df = transform_ecommerce(read_table("SELECT * FROM bronze.ecommerce_raw", engine, "bronze.ecommerce_raw"))
+
+    # Historique SCD2 : seules les lignes nouvelles ou modifiées sont écrites
+    df = scd2.merge(engine, "products_clean", df)
+
+    arrow_cache.put("silver.products_clean", df)
+    sketches.record_snapshot(engine, "silver.products_clean", df)
     logger.info("silver.products_clean created")
 
 
 # ==============================================================================
 # RUN
 # ==============================================================================
-def run():
-    logger.info("START Bronze → Silver")
+def run(backend="pandas"):
+    logger.info(f"START Bronze → Silver (backend={backend})")
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Invalid backend. Use: {' | '.join(BACKENDS)}")
+    if backend == "polars" and polars_backend is None:
+        raise ImportError("The polars backend requires the 'polars' package")
 
     engine = create_engine(DB_URI)
 
@@ -185,10 +254,15 @@ def run():
     with engine.begin() as conn:
         conn.execute(text("CREATE SCHEMA IF NOT EXISTS silver"))
 
-    clean_books(engine)
-    clean_quotes(engine)
-    clean_librairies(engine)
-    enrich_geo(engine)
-    clean_ecommerce(engine)
+    with profile_task("clean_books"):
+        clean_books(engine, backend)
+    with profile_task("clean_quotes"):
+        clean_quotes(engine, backend)
+    with profile_task("clean_librairies"):
+        clean_librairies(engine, backend)
+    with profile_task("enrich_geo"):
+        enrich_geo(engine)
+    with profile_task("clean_ecommerce"):
+        clean_ecommerce(engine, backend)
 
     logger.info("END Bronze → Silver")
\ No newline at end of file
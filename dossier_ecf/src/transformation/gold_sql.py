@@ -0,0 +1,540 @@
+# src/transformation/gold_sql.py
+
+from datetime import date
+
+from sqlalchemy import text
+
+from utils.logger import get_logger
+from transformation.partitions import create_partition_table, swap_partition
+from transformation.spatial_index import GEOHASH_PRECISION, LOCATION_SQL
+
+# ===============================================================================
+# Script Purpose:
+#     Construction de la couche Gold directement dans PostgreSQL
+#     1. toutes les dimensions et faits sont créés en SQL ensembliste
+#        dans le schéma 'gold_staging' (aucun aller-retour pandas)
+#     2. contrôles : tables non vides, clés uniques et non nulles,
+#        clés étrangères des faits présentes dans les dimensions
+#     3. bascule atomique : une seule transaction remplace les tables de
+#        'gold' et recrée les vues → un lecteur voit l'ancien Gold ou le
+#        nouveau, jamais un état partiel
+#     Recherche plein texte : colonnes tsvector générées (french / english,
+#     recalculées par PostgreSQL à chaque INSERT / UPDATE) + index GIN,
+#     interrogées par la fonction gold.search(query, lang, max_results)
+#     Géo : gold.dim_geo.location (POINT projeté en km, index GiST pour les
+#     KNN <->) et geohash (préfixes), voir transformation/spatial_index.py
+# ===============================================================================
+
+logger = get_logger("gold_sql")
+
+STAGING = "gold_staging"
+LOCK_TIMEOUT = "30s"
+
+# Ordre de création (les faits lisent les dimensions de staging)
+STAGING_TABLES = {
+    "dim_books": """
+        CREATE TABLE {staging}.dim_books AS
+        SELECT
+            title,
+            category,
+            price
+        FROM (SELECT DISTINCT title, category, price FROM silver.books WHERE is_current) s
+    """,
+    "dim_authors": """
+        CREATE TABLE {staging}.dim_authors AS
+        SELECT
+            author AS author_name
+        FROM (SELECT DISTINCT author FROM silver.quotes WHERE author IS NOT NULL) s
+    """,
+    # Tags : tableau trié par citation (index GIN), dimension et table pont
+    "dim_quotes": """
+        CREATE TABLE {staging}.dim_quotes AS
+        SELECT
+            q.quote,
+            a.author_key,
+            ARRAY(
+                SELECT DISTINCT t FROM unnest(string_to_array(q.tags, ',')) t
+                WHERE t <> '' ORDER BY t
+            ) AS tags
+        FROM (SELECT DISTINCT ON (quote) quote, author, tags FROM silver.quotes WHERE quote IS NOT NULL ORDER BY quote) q
+        LEFT JOIN {staging}.dim_authors a ON a.author_name = q.author
+    """,
+    "dim_tags": """
+        CREATE TABLE {staging}.dim_tags AS
+        SELECT
+            tag AS tag_name
+        FROM (SELECT DISTINCT unnest(tags) AS tag FROM {staging}.dim_quotes) s
+    """,
+    "bridge_quote_tags": """
+        CREATE TABLE {staging}.bridge_quote_tags AS
+        SELECT q.quote_key, t.tag_key
+        FROM {staging}.dim_quotes q
+        CROSS JOIN LATERAL unnest(q.tags) AS u(tag)
+        JOIN {staging}.dim_tags t ON t.tag_name = u.tag
+    """,
+    # Une ligne par librairie partenaire, coordonnées issues de enrich_geo
+    "dim_geo": """
+        CREATE TABLE {staging}.dim_geo AS
+        SELECT
+            nom_librairie,
+            adresse,
+            postal_code,
+            city,
+            CASE WHEN left(postal_code, 2) IN ('97', '98') THEN left(postal_code, 3)
+                 ELSE left(postal_code, 2) END AS department,
+            'France' AS country,
+            latitude,
+            longitude
+        FROM (
+            -- une ligne par librairie (clé métier), géocodée de préférence
+            SELECT DISTINCT ON (nom_librairie, adresse)
+                nom_librairie,
+                adresse,
+                code_postal AS postal_code,
+                ville AS city,
+                latitude,
+                longitude
+            FROM silver.librairies_geo
+            ORDER BY nom_librairie, adresse, latitude IS NULL
+        ) s
+    """,
+    "dim_products": """
+        CREATE TABLE {staging}.dim_products AS
+        SELECT
+            product_name,
+            category,
+            price,
+            description
+        FROM (
+            SELECT DISTINCT product_name, category, price, description
+            FROM silver.products_clean WHERE is_current
+        ) s
+    """,
+}
+
+# Clés de substitution stables d'une exécution à l'autre : les partitions de
+# faits des jours précédents et les références sauvegardées (citations, tags)
+# gardent des clés valides. Registre gold.<dim>_keys
+# (clé métier ROW(...)::TEXT → clé), jamais renuméroté ; une clé métier
+# nouvelle reçoit la clé suivante
+SURROGATE_KEYS = {
+    "dim_books": ("book_key", ["title"]),
+    "dim_authors": ("author_key", ["author_name"]),
+    "dim_quotes": ("quote_key", ["quote"]),
+    "dim_tags": ("tag_key", ["tag_name"]),
+    "dim_geo": ("geo_key", ["nom_librairie", "adresse"]),
+    "dim_products": ("product_key", ["product_name", "category"]),
+}
+
+# Tables construites seulement si leur source Silver existe et n'est pas vide
+# (sinon Gold garde l'ancienne)
+OPTIONAL_SOURCES = {
+    "dim_geo": "silver.librairies_geo",
+}
+
+# Faits : une partition du jour, chargée dans une table de même structure
+FACT_INSERTS = {
+    "fact_sales_books": """
+        INSERT INTO {staging}.fact_sales_books (
+            book_key, price, author_key, geo_key, sales_date, quantity, sales_amount
+        )
+        SELECT
+            f.book_key,
+            f.price,
+            f.author_key,
+            {geo_key} AS geo_key,
+            :sales_date AS sales_date,
+            1 AS quantity,
+            1 * f.price AS sales_amount
+        FROM (
+            SELECT c.*, ROW_NUMBER() OVER (ORDER BY c.book_key, c.author_key) - 1 AS pos
+            FROM (
+                SELECT b.book_key, b.price, a.author_key
+                FROM {staging}.dim_books b
+                CROSS JOIN {staging}.dim_authors a
+                ORDER BY b.book_key, a.author_key
+                LIMIT 100
+            ) c
+        ) f
+        {geo_join}
+        ORDER BY f.book_key, f.author_key
+    """,
+    "fact_sales_products": """
+        INSERT INTO {staging}.fact_sales_products (
+            product_key, sales_date, quantity, price, sales_amount
+        )
+        SELECT
+            product_key,
+            :sales_date AS sales_date,
+            2 AS quantity,
+            price,
+            2 * price AS sales_amount
+        FROM {staging}.dim_products
+    """,
+}
+
+PRIMARY_KEYS = {
+    "dim_books": "book_key",
+    "dim_authors": "author_key",
+    "dim_quotes": "quote_key",
+    "dim_tags": "tag_key",
+    "bridge_quote_tags": "tag_key, quote_key",
+    "dim_geo": "geo_key",
+    "dim_products": "product_key",
+}
+
+# Filtres par tag (tags @> ARRAY[...]) et co-occurrences (pont ⨝ pont sur quote_key)
+INDEXES = {
+    "dim_quotes": [
+        "CREATE INDEX dim_quotes_tags_gin ON {schema}.dim_quotes USING GIN (tags)",
+    ],
+    "dim_tags": [
+        "CREATE UNIQUE INDEX dim_tags_tag_name ON {schema}.dim_tags (tag_name)",
+    ],
+    "bridge_quote_tags": [
+        "CREATE INDEX bridge_quote_tags_quote_key ON {schema}.bridge_quote_tags (quote_key, tag_key)",
+    ],
+    # KNN : ORDER BY location <-> point(...) ; rayon : location <@ box(...)
+    "dim_geo": [
+        "CREATE INDEX dim_geo_location_gist ON {schema}.dim_geo USING GIST (location)",
+        "CREATE INDEX dim_geo_geohash ON {schema}.dim_geo (geohash text_pattern_ops)",
+    ],
+}
+
+# Colonnes calculées par PostgreSQL (nom, type, expression)
+GENERATED_COLUMNS = {
+    "dim_geo": [
+        ("location", "POINT", LOCATION_SQL),
+        ("geohash", "TEXT", f"gold.geohash(latitude, longitude, {GEOHASH_PRECISION})"),
+    ],
+}
+
+# Encodage geohash (base 32, bits longitude / latitude alternés) sans PostGIS
+GEOHASH_FUNCTION = """
+    CREATE OR REPLACE FUNCTION gold.geohash(lat DOUBLE PRECISION, lon DOUBLE PRECISION, len INT)
+    RETURNS TEXT LANGUAGE plpgsql IMMUTABLE STRICT AS $$
+    DECLARE
+        base32 CONSTANT TEXT := '0123456789bcdefghjkmnpqrstuvwxyz';
+        lat_lo DOUBLE PRECISION := -90;
+        lat_hi DOUBLE PRECISION := 90;
+        lon_lo DOUBLE PRECISION := -180;
+        lon_hi DOUBLE PRECISION := 180;
+        mid DOUBLE PRECISION;
+        is_lon BOOLEAN := TRUE;
+        bits INT := 0;
+        ch INT := 0;
+        hash TEXT := '';
+    BEGIN
+        WHILE length(hash) < len LOOP
+            IF is_lon THEN
+                mid := (lon_lo + lon_hi) / 2;
+                IF lon >= mid THEN ch := ch * 2 + 1; lon_lo := mid; ELSE ch := ch * 2; lon_hi := mid; END IF;
+            ELSE
+                mid := (lat_lo + lat_hi) / 2;
+                IF lat >= mid THEN ch := ch * 2 + 1; lat_lo := mid; ELSE ch := ch * 2; lat_hi := mid; END IF;
+            END IF;
+            is_lon := NOT is_lon;
+            bits := bits + 1;
+            IF bits = 5 THEN
+                hash := hash || substr(base32, ch + 1, 1);
+                bits := 0;
+                ch := 0;
+            END IF;
+        END LOOP;
+        RETURN hash;
+    END
+    $$
+"""
+
+# Documents indexés : expression tsvector pondérée par table ({config} : french / english)
+SEARCH_CONFIGS = {"fr": "french", "en": "english"}
+
+SEARCH_DOCUMENTS = {
+    "dim_quotes": "setweight(to_tsvector('{config}', coalesce(quote, '')), 'A')",
+    "dim_books": (
+        "setweight(to_tsvector('{config}', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('{config}', coalesce(category, '')), 'B')"
+    ),
+    "dim_products": (
+        "setweight(to_tsvector('{config}', coalesce(product_name, '')), 'A') || "
+        "setweight(to_tsvector('{config}', coalesce(category, '')), 'B') || "
+        "setweight(to_tsvector('{config}', coalesce(description, '')), 'C')"
+    ),
+}
+
+FOREIGN_KEYS = {
+    "fact_sales_books": [("book_key", "dim_books"), ("author_key", "dim_authors")],
+    "fact_sales_products": [("product_key", "dim_products")],
+    "bridge_quote_tags": [("quote_key", "dim_quotes"), ("tag_key", "dim_tags")],
+}
+
+# Vues métier prêtes pour le reporting (dépendent des tables Gold)
+VIEWS = {
+    "v_sales_books": ("""
+        CREATE VIEW gold.v_sales_books AS
+        SELECT
+            f.sales_date,
+            b.title,
+            b.category,
+            a.author_name,
+            f.quantity,
+            f.price,
+            f.sales_amount
+        FROM gold.fact_sales_books f
+        JOIN gold.dim_books b ON f.book_key = b.book_key
+        JOIN gold.dim_authors a ON f.author_key = a.author_key
+    """, ["fact_sales_books", "dim_books", "dim_authors"]),
+    "v_sales_products": ("""
+        CREATE VIEW gold.v_sales_products AS
+        SELECT
+            f.sales_date,
+            p.product_name,
+            p.category,
+            f.quantity,
+            f.price,
+            f.sales_amount
+        FROM gold.fact_sales_products f
+        JOIN gold.dim_products p ON f.product_key = p.product_key
+    """, ["fact_sales_products", "dim_products"]),
+}
+
+
+# Recherche classée sur les trois tables ; lang choisit la colonne (donc l'index GIN)
+SEARCH_FUNCTION = ("""
+    CREATE OR REPLACE FUNCTION gold.search(query TEXT, lang TEXT DEFAULT 'fr', max_results INT DEFAULT 20)
+    RETURNS TABLE (source TEXT, item_key INT, label TEXT, rank REAL)
+    LANGUAGE plpgsql STABLE AS $$
+    DECLARE
+        config REGCONFIG := CASE lang WHEN 'en' THEN 'english' ELSE 'french' END;
+        col TEXT := CASE lang WHEN 'en' THEN 'search_en' ELSE 'search_fr' END;
+    BEGIN
+        RETURN QUERY EXECUTE format($q$
+            WITH q AS (SELECT websearch_to_tsquery($1, $2) AS tsq)
+            SELECT * FROM (
+                (SELECT 'quote'::TEXT, quote_key, quote::TEXT, ts_rank_cd(%1$I, q.tsq)
+                 FROM gold.dim_quotes, q WHERE %1$I @@ q.tsq ORDER BY 4 DESC LIMIT $3)
+                UNION ALL
+                (SELECT 'book'::TEXT, book_key, title::TEXT, ts_rank_cd(%1$I, q.tsq)
+                 FROM gold.dim_books, q WHERE %1$I @@ q.tsq ORDER BY 4 DESC LIMIT $3)
+                UNION ALL
+                (SELECT 'product'::TEXT, product_key, product_name::TEXT, ts_rank_cd(%1$I, q.tsq)
+                 FROM gold.dim_products, q WHERE %1$I @@ q.tsq ORDER BY 4 DESC LIMIT $3)
+            ) r
+            ORDER BY 4 DESC
+            LIMIT $3
+        $q$, col) USING config, query, max_results;
+    END
+    $$
+""", ["dim_quotes", "dim_books", "dim_products"])
+
+
+class GoldValidationError(Exception):
+    pass
+
+
+def _exists(conn, relation):
+    return conn.execute(text("SELECT to_regclass(:r) IS NOT NULL"), {"r": relation}).scalar()
+
+
+def _has_rows(conn, relation):
+    return _exists(conn, relation) and conn.execute(text(f"SELECT EXISTS (SELECT 1 FROM {relation})")).scalar()
+
+
+# ==============================================================================
+# VUES
+# ==============================================================================
+def drop_views(conn):
+    for name in VIEWS:
+        conn.execute(text(f"DROP VIEW IF EXISTS gold.{name}"))
+
+
+def create_views(conn):
+    for name, (ddl, tables) in VIEWS.items():
+        if all(_exists(conn, f"gold.{t}") for t in tables):
+            conn.execute(text(ddl))
+        else:
+            logger.warning(f"Missing Gold tables – skipping view gold.{name}")
+
+    ddl, tables = SEARCH_FUNCTION
+    if all(_exists(conn, f"gold.{t}") for t in tables):
+        # exec_driver_sql : les $1 / %1$I du corps ne sont pas des paramètres SQLAlchemy
+        conn.exec_driver_sql(ddl.replace("%", "%%"))
+    else:
+        logger.warning("Missing Gold tables – skipping function gold.search")
+
+
+# ==============================================================================
+# CLÉS ET INDEX
+# ==============================================================================
+def assign_keys(conn, schema, table):
+    """Ajoute à {schema}.{table} sa clé stable (première colonne), lue / créée dans gold.{table}_keys."""
+    key, columns = SURROGATE_KEYS[table]
+    registry = f"gold.{table}_keys"
+    business_key = f"ROW({', '.join(columns)})::TEXT"
+
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {registry} (
+            business_key TEXT PRIMARY KEY,
+            {key} INT GENERATED BY DEFAULT AS IDENTITY UNIQUE,
+            first_seen TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """))
+    conn.execute(text(f"""
+        INSERT INTO {registry} (business_key)
+        SELECT {business_key}
+        FROM {schema}.{table} s
+        WHERE NOT EXISTS (SELECT 1 FROM {registry} k WHERE k.business_key = {business_key})
+        ORDER BY {', '.join(columns)}
+        ON CONFLICT (business_key) DO NOTHING
+    """))
+
+    conn.execute(text(f"ALTER TABLE {schema}.{table} RENAME TO {table}_unkeyed"))
+    conn.execute(text(f"""
+        CREATE TABLE {schema}.{table} AS
+        SELECT k.{key}, s.*
+        FROM {schema}.{table}_unkeyed s
+        JOIN {registry} k ON k.business_key = {business_key}
+    """))
+    conn.execute(text(f"DROP TABLE {schema}.{table}_unkeyed"))
+
+
+def add_search_columns(conn, schema, table):
+    for lang, config in SEARCH_CONFIGS.items():
+        document = SEARCH_DOCUMENTS[table].format(config=config)
+        conn.execute(text(
+            f"ALTER TABLE {schema}.{table} "
+            f"ADD COLUMN search_{lang} TSVECTOR GENERATED ALWAYS AS ({document}) STORED"
+        ))
+        conn.execute(text(
+            f"CREATE INDEX {table}_search_{lang}_gin ON {schema}.{table} USING GIN (search_{lang})"
+        ))
+
+
+def add_generated_columns(conn, schema, table):
+    if table == "dim_geo":
+        conn.exec_driver_sql(GEOHASH_FUNCTION)
+
+    for name, kind, expression in GENERATED_COLUMNS[table]:
+        conn.execute(text(
+            f"ALTER TABLE {schema}.{table} ADD COLUMN {name} {kind} GENERATED ALWAYS AS ({expression}) STORED"
+        ))
+
+
+def finalize_tables(conn, schema, tables):
+    """Colonnes générées, clés primaires, INDEXES, puis ANALYZE : les index servent dès la première requête."""
+    for table in tables:
+        if table in GENERATED_COLUMNS:
+            add_generated_columns(conn, schema, table)
+        if table in SEARCH_DOCUMENTS:
+            add_search_columns(conn, schema, table)
+        if table in PRIMARY_KEYS:
+            conn.execute(text(f"ALTER TABLE {schema}.{table} ADD PRIMARY KEY ({PRIMARY_KEYS[table]})"))
+        for ddl in INDEXES.get(table, []):
+            conn.execute(text(ddl.format(schema=schema)))
+        conn.execute(text(f"ANALYZE {schema}.{table}"))
+
+
+# ==============================================================================
+# STAGING
+# ==============================================================================
+def build_staging(conn, sales_date):
+    conn.execute(text(f"DROP SCHEMA IF EXISTS {STAGING} CASCADE"))
+    conn.execute(text(f"CREATE SCHEMA {STAGING}"))
+
+    built = []
+    for table, ddl in STAGING_TABLES.items():
+        source = OPTIONAL_SOURCES.get(table)
+        if source and not _has_rows(conn, source):
+            logger.warning(f"{source} missing or empty – keeping the current gold.{table}")
+            continue
+        logger.info(f"Building {STAGING}.{table}")
+        conn.execute(text(ddl.format(staging=STAGING)))
+        if table in SURROGATE_KEYS:
+            assign_keys(conn, STAGING, table)
+        built.append(table)
+
+    finalize_tables(conn, STAGING, built)
+
+    # GEO OPTIONNEL : même règle que le mode pandas
+    # Une librairie par ligne de fait, attribuée à tour de rôle (pas de produit
+    # cartésien : il tronquerait les combinaisons livre × auteur)
+    geo_table = next((t for t in (f"{STAGING}.dim_geo", "gold.dim_geo") if _has_rows(conn, t)), None)
+    if geo_table:
+        geo = {
+            "geo_key": "g.geo_key::INT",
+            "geo_join": f"""
+                LEFT JOIN (
+                    SELECT geo_key, ROW_NUMBER() OVER (ORDER BY geo_key) - 1 AS pos
+                    FROM {geo_table}
+                ) g ON g.pos = f.pos % (SELECT COUNT(*) FROM {geo_table})
+            """,
+        }
+    else:
+        geo = {"geo_key": "NULL::INT", "geo_join": ""}
+
+    for table, sql in FACT_INSERTS.items():
+        logger.info(f"Building {STAGING}.{table} (partition {sales_date})")
+        # gold.{table} n'est pas touché ici : la migration éventuelle vers une
+        # table partitionnée a lieu dans swap_into_gold, après validate_staging
+        create_partition_table(conn, table, sales_date, schema=STAGING, name=table)
+        conn.execute(text(sql.format(staging=STAGING, **geo)), {"sales_date": sales_date})
+
+
+def validate_staging(conn):
+    errors = []
+
+    built = [t for t in STAGING_TABLES if _exists(conn, f"{STAGING}.{t}")]
+
+    for table in [*built, *FACT_INSERTS]:
+        rows = conn.execute(text(f"SELECT COUNT(*) FROM {STAGING}.{table}")).scalar()
+        logger.info(f"{STAGING}.{table}: {rows} rows")
+        if rows == 0:
+            errors.append(f"{table} is empty")
+
+    for fact, refs in FOREIGN_KEYS.items():
+        for col, dim in refs:
+            orphans = conn.execute(text(f"""
+                SELECT COUNT(*)
+                FROM {STAGING}.{fact} f
+                LEFT JOIN {STAGING}.{dim} d ON f.{col} = d.{col}
+                WHERE d.{col} IS NULL
+            """)).scalar()
+            if orphans:
+                errors.append(f"{fact}.{col}: {orphans} keys missing from {dim}")
+
+    if errors:
+        raise GoldValidationError("; ".join(errors))
+
+
+def swap_into_gold(conn, sales_date):
+    conn.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    drop_views(conn)
+
+    for table in STAGING_TABLES:
+        if not _exists(conn, f"{STAGING}.{table}"):
+            continue
+        conn.execute(text(f"DROP TABLE IF EXISTS gold.{table}"))
+        conn.execute(text(f"ALTER TABLE {STAGING}.{table} SET SCHEMA gold"))
+
+    # Faits : seule la partition du jour est remplacée (table mère créée ou
+    # ancienne table migrée au passage, vues déjà supprimées)
+    for table in FACT_INSERTS:
+        swap_partition(conn, table, sales_date, STAGING, table)
+
+    create_views(conn)
+    conn.execute(text(f"DROP SCHEMA {STAGING}"))
+
+
+def build_gold(engine, sales_date=None):
+    sales_date = sales_date or date.today()
+
+    # Staging + contrôles : en cas d'échec, Gold reste intact
+    with engine.begin() as conn:
+        build_staging(conn, sales_date)
+        validate_staging(conn)
+
+    # Bascule : une seule transaction
+    with engine.begin() as conn:
+        swap_into_gold(conn, sales_date)
+
+    logger.info("gold tables swapped from staging")
@@ -0,0 +1,182 @@
+# src/transformation/partitions.py
+
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from utils.logger import get_logger
+
+# ===============================================================================
+# Script Purpose:
+#     Tables de faits Gold partitionnées par jour (RANGE sur sales_date)
+#     - un index BRIN sur sales_date (données insérées dans l'ordre du temps)
+#     - chaque exécution charge SA partition dans une table de travail,
+#       puis l'échange avec la partition existante (DETACH / DROP / ATTACH)
+#       dans une seule transaction → l'historique n'est plus réécrit
+#     - les requêtes filtrées sur sales_date ne lisent que les partitions utiles
+# ===============================================================================
+
+logger = get_logger("partitions")
+
+FACT_COLUMNS = {
+    "fact_sales_books": [
+        ("book_key", "INTEGER"),
+        ("price", "DOUBLE PRECISION"),
+        ("author_key", "INTEGER"),
+        ("geo_key", "INTEGER"),
+        ("sales_date", "TIMESTAMP"),
+        ("quantity", "INTEGER"),
+        ("sales_amount", "DOUBLE PRECISION"),
+    ],
+    "fact_sales_products": [
+        ("product_key", "INTEGER"),
+        ("sales_date", "TIMESTAMP"),
+        ("quantity", "INTEGER"),
+        ("price", "DOUBLE PRECISION"),
+        ("sales_amount", "DOUBLE PRECISION"),
+    ],
+}
+
+
+def partition_name(table, day):
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def _bounds(day):
+    return f"'{day:%Y-%m-%d}'", f"'{day + timedelta(days=1):%Y-%m-%d}'"
+
+
+def _relkind(conn, schema, name):
+    return conn.execute(text("""
+        SELECT c.relkind
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = :schema AND c.relname = :name
+    """), {"schema": schema, "name": name}).scalar()
+
+
+def _is_attached(conn, schema, name):
+    return conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = :schema AND c.relname = :name
+        )
+    """), {"schema": schema, "name": name}).scalar()
+
+
+def _column_defs(table):
+    return ",\n".join(
+        f"{col} {kind}{' NOT NULL' if col == 'sales_date' else ''}"
+        for col, kind in FACT_COLUMNS[table]
+    )
+
+
+def _create_parent(conn, table):
+    conn.execute(text(f"""
+        CREATE TABLE gold.{table} (
+            {_column_defs(table)}
+        ) PARTITION BY RANGE (sales_date)
+    """))
+    conn.execute(text(
+        f"CREATE INDEX {table}_sales_date_brin ON gold.{table} USING BRIN (sales_date)"
+    ))
+
+
+def _migrate_legacy(conn, table):
+    """Ancienne table non partitionnée → table partitionnée, historique conservé."""
+    logger.info(f"Migrating gold.{table} to a partitioned table")
+
+    legacy = f"{table}_legacy"
+    conn.execute(text(f"ALTER TABLE gold.{table} RENAME TO {legacy}"))
+    _create_parent(conn, table)
+
+    days = conn.execute(text(
+        f"SELECT DISTINCT sales_date::DATE FROM gold.{legacy} WHERE sales_date IS NOT NULL"
+    )).scalars().all()
+
+    for day in days:
+        low, high = _bounds(day)
+        conn.execute(text(f"""
+            CREATE TABLE gold.{partition_name(table, day)}
+            PARTITION OF gold.{table} FOR VALUES FROM ({low}) TO ({high})
+        """))
+
+    cols = [col for col, _ in FACT_COLUMNS[table]]
+    casts = ", ".join(f"{col}::{kind}" for col, kind in FACT_COLUMNS[table])
+    conn.execute(text(f"""
+        INSERT INTO gold.{table} ({", ".join(cols)})
+        SELECT {casts} FROM gold.{legacy} WHERE sales_date IS NOT NULL
+    """))
+    # Les vues suivent le renommage : elles sont recréées par l'appelant
+    conn.execute(text(f"DROP TABLE gold.{legacy} CASCADE"))
+
+
+def ensure_partitioned(conn, table):
+    kind = _relkind(conn, "gold", table)
+
+    if kind == "p":
+        return
+    if kind == "r":
+        _migrate_legacy(conn, table)
+    else:
+        _create_parent(conn, table)
+
+
+def create_partition_table(conn, table, day, schema="gold", name=None):
+    """
+    Table de travail ayant la structure de la partition du jour ; retourne son nom.
+    Structure lue dans FACT_COLUMNS : gold.{table} n'est ni lu ni modifié.
+    """
+    name = name or f"{partition_name(table, day)}_new"
+    low, high = _bounds(day)
+
+    conn.execute(text(f"DROP TABLE IF EXISTS {schema}.{name}"))
+    conn.execute(text(f"""
+        CREATE TABLE {schema}.{name} (
+            {_column_defs(table)}
+        )
+    """))
+    # Contrainte identique aux bornes : ATTACH n'a pas à re-scanner la table
+    conn.execute(text(f"""
+        ALTER TABLE {schema}.{name}
+        ADD CONSTRAINT {name}_bounds CHECK (sales_date >= {low} AND sales_date < {high})
+    """))
+    return name
+
+
+def swap_partition(conn, table, day, schema, name):
+    """Remplace la partition du jour par {schema}.{name} (à appeler dans une transaction)."""
+    # Création / migration de la table mère ici seulement : rien ne touche
+    # gold.{table} avant la bascule
+    ensure_partitioned(conn, table)
+    part = partition_name(table, day)
+    low, high = _bounds(day)
+
+    if _relkind(conn, "gold", part) is not None:
+        if _is_attached(conn, "gold", part):
+            conn.execute(text(f"ALTER TABLE gold.{table} DETACH PARTITION gold.{part}"))
+        conn.execute(text(f"DROP TABLE gold.{part}"))
+
+    conn.execute(text(f"ALTER TABLE {schema}.{name} RENAME TO {part}"))
+    if schema != "gold":
+        conn.execute(text(f"ALTER TABLE {schema}.{part} SET SCHEMA gold"))
+
+    conn.execute(text(f"""
+        ALTER TABLE gold.{table}
+        ATTACH PARTITION gold.{part} FOR VALUES FROM ({low}) TO ({high})
+    """))
+    logger.info(f"gold.{part} attached to gold.{table}")
+
+
+def load_fact_partition(engine, table, df, day):
+    """Mode pandas : charge le DataFrame dans la partition du jour, puis l'échange."""
+    with engine.begin() as conn:
+        name = create_partition_table(conn, table, day)
+
+    df.to_sql(name, engine, schema="gold", if_exists="append", index=False)
+
+    with engine.begin() as conn:
+        swap_partition(conn, table, day, "gold", name)
@@ -0,0 +1,147 @@
+# src/transformation/polars_backend.py
+
+import polars as pl
+
+from transformation.schemas import DATE_FORMATS, NUMBER_SPACES
+from utils.pseudonymization import RGPD_POLICY, get_pseudo_key, pseudonymize_values
+
+# ===============================================================================
+# Script Purpose:
+#     Backend Polars (lazy) des nettoyages Bronze → Silver
+#     Mêmes règles que les fonctions transform_* de bronze_to_silver (pandas),
+#     exprimées en un seul plan de requête : Polars fusionne les passes
+#     (dédoublonnage, filtres, nettoyage devises, conversions) et les exécute
+#     en multi-thread, sans copie intermédiaire du DataFrame.
+#
+#     Les fonctions *_plan prennent et rendent un LazyFrame ;
+#     les fonctions clean_* lisent Bronze et rendent un DataFrame pandas
+#     prêt pour to_sql.
+# ===============================================================================
+
+CURRENCY_SYMBOLS = r"[£$€]"
+
+
+def read_lazy(query, engine):
+    return pl.read_database(query, connection=engine).lazy()
+
+
+def _to_float(col):
+    # Équivalent de pd.to_numeric(errors="coerce")
+    return (
+        pl.col(col)
+        .cast(pl.Utf8)
+        .str.strip_chars()
+        .cast(pl.Float64, strict=False)
+    )
+
+
+# ==============================================================================
+# PLANS
+# ==============================================================================
+def books_plan(lf):
+    if "ingestion_date" in lf.collect_schema().names():
+        lf = lf.sort("ingestion_date", nulls_last=False, maintain_order=True)
+
+    return (
+        lf.unique(subset=["title"], keep="last", maintain_order=True)
+        .filter(pl.col("title").is_not_null() & pl.col("price").is_not_null())
+        .with_columns(
+            pl.col("price").cast(pl.Utf8).str.replace_all(CURRENCY_SYMBOLS, "").alias("price")
+        )
+        .with_columns(_to_float("price").alias("price"))
+        .filter(pl.col("price").is_not_null())
+        .with_columns(
+            pl.col("title").str.strip_chars(),
+            pl.col("category").fill_null("Unknown"),
+        )
+    )
+
+
+def quotes_plan(lf):
+    return (
+        lf.unique(subset=["quote"], keep="first", maintain_order=True)
+        .with_columns(
+            pl.col("author").str.strip_chars(),
+            pl.col("tags").str.split(",")
+            .list.eval(pl.element().str.strip_chars().str.to_lowercase().filter(pl.element() != ""))
+            .list.unique().list.sort().list.join(","),
+        )
+    )
+
+
+def _pseudonymize(series, key):
+    uniques = series.drop_nulls().unique(maintain_order=True).cast(pl.Utf8)
+    hashed = pseudonymize_values(uniques.to_list(), key)
+
+    return series.cast(pl.Utf8).replace_strict(uniques, hashed, default=None, return_dtype=pl.Utf8)
+
+
+def librairies_plan(lf, key=None):
+    columns = lf.collect_schema().names()
+    policy = RGPD_POLICY.get("librairies", {})
+
+    to_drop = [c for c, rule in policy.items() if rule == "drop" and c in columns]
+    to_hash = [c for c, rule in policy.items() if rule == "pseudonymize" and c in columns]
+
+    lf = lf.drop(to_drop)
+
+    if to_hash:
+        key = key if key is not None else get_pseudo_key()
+        lf = lf.with_columns(
+            pl.col(c).map_batches(lambda s: _pseudonymize(s, key), return_dtype=pl.Utf8)
+            for c in to_hash
+        )
+
+    if "code_postal" in columns:
+        lf = lf.with_columns(
+            pl.col("code_postal").cast(pl.Utf8).str.extract(r"(\d{4,5})").str.zfill(5)
+        )
+
+    if "ca_annuel" in columns:
+        lf = lf.with_columns(
+            pl.col("ca_annuel").cast(pl.Utf8)
+            .str.replace_all(NUMBER_SPACES, "").str.replace(",", ".", literal=True)
+            .cast(pl.Float64, strict=False).round(0).cast(pl.Int64)
+        )
+
+    if "date_partenariat" in columns:
+        if lf.collect_schema()["date_partenariat"] == pl.Utf8:
+            text = pl.col("date_partenariat").str.strip_chars()
+            lf = lf.with_columns(
+                pl.coalesce(text.str.to_datetime(fmt, time_unit="ns", strict=False) for fmt in DATE_FORMATS)
+                .alias("date_partenariat")
+            )
+
+    return lf
+
+
+def ecommerce_plan(lf):
+    return (
+        lf.filter(pl.col("product_name").is_not_null() & pl.col("price").is_not_null())
+        .unique(subset=["product_name", "category", "price"], keep="first", maintain_order=True)
+        .with_columns(
+            pl.col("product_name").str.strip_chars(),
+            pl.col("category").str.to_lowercase(),
+            _to_float("price").alias("price"),
+        )
+        .filter(pl.col("price").is_not_null())
+    )
+
+
+# ==============================================================================
+# EXÉCUTION
+# ==============================================================================
+def clean_books(engine):
+    return books_plan(read_lazy("SELECT * FROM bronze.books_raw", engine)).collect().to_pandas()
+
+
+def clean_quotes(engine):
+    return quotes_plan(read_lazy("SELECT * FROM bronze.quotes_raw", engine)).collect().to_pandas()
+
+
+def clean_librairies(engine):
+    return librairies_plan(read_lazy("SELECT * FROM bronze.librairies_raw", engine)).collect().to_pandas()
+
+
+def clean_ecommerce(engine):
+    return ecommerce_plan(read_lazy("SELECT * FROM bronze.ecommerce_raw", engine)).collect().to_pandas()
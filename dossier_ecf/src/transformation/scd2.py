@@ -0,0 +1,171 @@
+# src/transformation/scd2.py
+
+import pandas as pd
+from sqlalchemy import inspect, text
+
+from utils.logger import get_logger
+
+# ===============================================================================
+# Script Purpose:
+#     Historique de type 2 (SCD2) des tables Silver books et products_clean
+#     - row_hash : empreinte 64 bits des attributs suivis, calculée en une
+#       passe vectorisée (pd.util.hash_pandas_object)
+#     - comparaison du lot entrant aux seules lignes courantes (clé + hash)
+#     - écritures proportionnelles aux changements :
+#         nouvelle clé          → insertion
+#         hash différent        → ancienne version fermée + nouvelle insérée
+#         clé absente du lot    → version courante fermée
+#         inchangé              → rien n'est écrit
+#     - colonnes ajoutées : row_hash, valid_from, valid_to, is_current
+#       (les lecteurs de Silver filtrent sur is_current)
+# ===============================================================================
+
+logger = get_logger("scd2")
+
+SCD2_TABLES = {
+    "books": {
+        "key": ["title"],
+        "tracked": ["price", "rating", "category", "source"],
+    },
+    "products_clean": {
+        "key": ["product_name", "category"],
+        "tracked": ["price", "description", "source"],
+    },
+}
+
+HASH_FLOAT_DECIMALS = 6
+
+
+def _normalized(series):
+    # Les backends pandas / polars peuvent différer au dernier bit sur un prix
+    if pd.api.types.is_float_dtype(series):
+        series = series.round(HASH_FLOAT_DECIMALS)
+    return series.astype("string")
+
+
+def row_hash(df, columns):
+    """Empreinte par ligne, identique quels que soient les types pandas / polars en entrée."""
+    values = pd.DataFrame({col: _normalized(df[col]) for col in columns if col in df.columns})
+    hashed = pd.util.hash_pandas_object(values, index=False)
+    return pd.Series(hashed.to_numpy().view("int64"), index=df.index)
+
+
+def _has_history(engine, table):
+    inspector = inspect(engine)
+    if not inspector.has_table(table, schema="silver"):
+        return False
+    return "is_current" in {c["name"] for c in inspector.get_columns(table, schema="silver")}
+
+
+def _key_match(left, right, key):
+    # Clés NOT NULL (filtrées dans merge) : "=" peut utiliser l'index partiel is_current
+    return " AND ".join(f"{left}.{col} = {right}.{col}" for col in key)
+
+
+def _initial_load(engine, table, df, key):
+    df.to_sql(table, engine, schema="silver", if_exists="replace", index=False)
+
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE INDEX {table}_current_key ON silver.{table} ({', '.join(key)}) WHERE is_current"
+        ))
+
+    logger.info(f"silver.{table}: SCD2 history initialised ({len(df)} current rows)")
+
+
+def prepare_batch(table, df, loaded_at):
+    """
+    Lot entrant → lignes courantes candidates : clés nulles écartées, une ligne
+    par clé (la plus récemment ingérée), row_hash et colonnes de validité.
+    """
+    spec = SCD2_TABLES[table]
+    key = spec["key"]
+
+    missing = df[key].isna().any(axis=1)
+    if missing.any():
+        logger.warning(f"silver.{table}: {int(missing.sum())} rows without {key} dropped")
+        df = df[~missing]
+
+    # Bronze est en ajout seul et lu sans ordre : la dernière ingestion gagne
+    if "ingestion_date" in df.columns:
+        df = df.sort_values("ingestion_date", kind="stable", na_position="first")
+
+    before = len(df)
+    df = df.drop_duplicates(subset=key, keep="last").copy()
+    if len(df) < before:
+        logger.info(f"silver.{table}: {before - len(df)} duplicate keys dropped from the batch")
+
+    df["row_hash"] = row_hash(df, spec["tracked"])
+    df["valid_from"] = loaded_at
+    df["valid_to"] = pd.NaT
+    df["is_current"] = True
+    return df
+
+
+def diff_current(df, current, key):
+    """
+    Compare le lot préparé aux lignes courantes (clé + row_hash).
+    Retourne (clés à fermer, lignes à insérer, compteurs).
+    """
+    # Une seule jointure vectorisée : nouvelles clés, clés disparues, hash modifiés
+    diff = df[key + ["row_hash"]].merge(
+        current[key + ["row_hash"]], on=key, how="outer", suffixes=("", "_current"), indicator=True
+    )
+    is_new = diff["_merge"] == "left_only"
+    is_gone = diff["_merge"] == "right_only"
+    is_changed = (diff["_merge"] == "both") & (diff["row_hash"] != diff["row_hash_current"])
+
+    to_close = diff.loc[is_gone | is_changed, key].reset_index(drop=True)
+    to_insert = df.merge(diff.loc[is_new | is_changed, key], on=key, how="inner")
+
+    stats = {
+        "inserted": int(is_new.sum()),
+        "changed": int(is_changed.sum()),
+        "closed": int(is_gone.sum()),
+        "unchanged": int(((diff["_merge"] == "both") & ~is_changed).sum()),
+    }
+    return to_close, to_insert, stats
+
+
+def merge(engine, table, df, loaded_at=None):
+    """
+    Applique le lot df (état courant de la source) à l'historique silver.{table}.
+    Par clé, la ligne la plus récemment ingérée (ingestion_date) est retenue.
+    Retourne le lot dédoublonné sur la clé, c'est-à-dire les lignes courantes.
+    """
+    key = SCD2_TABLES[table]["key"]
+    loaded_at = loaded_at or pd.Timestamp.now()
+
+    df = prepare_batch(table, df, loaded_at)
+
+    if not _has_history(engine, table):
+        _initial_load(engine, table, df, key)
+        return df
+
+    current = pd.read_sql(
+        f"SELECT {', '.join(key)}, row_hash FROM silver.{table} WHERE is_current",
+        engine
+    )
+    to_close, to_insert, stats = diff_current(df, current, key)
+
+    # Fermetures et insertions dans une seule transaction
+    if not to_close.empty or not to_insert.empty:
+        with engine.begin() as conn:
+            if not to_close.empty:
+                to_close.to_sql(f"{table}_scd2_close", conn, schema="silver", if_exists="replace", index=False)
+                conn.execute(text(f"""
+                    UPDATE silver.{table} t
+                    SET valid_to = :loaded_at, is_current = FALSE
+                    FROM silver.{table}_scd2_close c
+                    WHERE t.is_current AND {_key_match("t", "c", key)}
+                """), {"loaded_at": loaded_at})
+                conn.execute(text(f"DROP TABLE silver.{table}_scd2_close"))
+
+            if not to_insert.empty:
+                to_insert.to_sql(table, conn, schema="silver", if_exists="append", index=False)
+
+    logger.info(
+        f"silver.{table}: {stats['inserted']} new, {stats['changed']} changed, "
+        f"{stats['closed']} closed, {stats['unchanged']} unchanged"
+    )
+    return df
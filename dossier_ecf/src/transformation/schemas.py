@@ -0,0 +1,204 @@
+# src/transformation/schemas.py
+
+import pandas as pd
+
+from utils.logger import get_logger
+
+# ===============================================================================
+# Script Purpose:
+#     Types cibles des DataFrames Silver / Gold, appliqués dès la lecture
+#     - "category"  : colonnes à faible cardinalité (catégorie, note, auteur...)
+#     - "string"    : texte libre stocké en chaînes Arrow (string[pyarrow]) ;
+#                     aussi villes et codes postaux (zéro initial : 01000)
+#     - "Int32"     : clés de substitution Gold (entiers nullables)
+#     - "Int64"     : row_hash de l'historique SCD2 Silver (empreinte 64 bits)
+#     - "int"       : entiers réduits au plus petit type possible
+#     - "float64"   : montants (pas de float32 : arrondis visibles sur les prix)
+#     Les colonnes absentes du schéma gardent leur type d'origine.
+#     Bronze et Silver n'ont pas de clé entière : leurs clés naturelles
+#     (titre, citation, produit, librairie) sont du texte ("string").
+# ===============================================================================
+
+logger = get_logger("schemas")
+
+STRING_DTYPE = "string[pyarrow]"
+
+SCHEMAS = {
+    # --- Bronze (lu par bronze_to_silver) ------------------------------------
+    "bronze.books_raw": {
+        "title": "string",
+        "price": "string",
+        "rating": "category",
+        "category": "category",
+        "source": "category",
+    },
+    "bronze.quotes_raw": {
+        "quote": "string",
+        "author": "category",
+        "tags": "string",
+    },
+    "bronze.librairies_raw": {
+        "nom_librairie": "string",
+        "adresse": "string",
+        "code_postal": "string",
+        "ville": "string",
+        "ca_annuel": "string",
+        "specialite": "category",
+        "source": "category",
+    },
+    "bronze.ecommerce_raw": {
+        "product_name": "string",
+        "price": "float64",
+        "description": "string",
+        "category": "category",
+        "source": "category",
+    },
+    "bronze.geocoding_raw": {
+        "address": "string",
+        "city": "string",
+        "postal_code": "string",
+        "latitude": "float64",
+        "longitude": "float64",
+    },
+
+    # --- Silver (lu par enrich_geo et silver_to_gold) ------------------------
+    "silver.books": {
+        "title": "string",
+        "price": "float64",
+        "rating": "category",
+        "category": "category",
+        "source": "category",
+        "row_hash": "Int64",
+    },
+    "silver.quotes": {
+        "quote": "string",
+        "author": "category",
+        "tags": "string",
+    },
+    "silver.librairies_clean": {
+        "nom_librairie": "string",
+        "adresse": "string",
+        "code_postal": "string",
+        "ville": "string",
+        "contact_nom": "string",
+        "ca_annuel": "int",
+        "specialite": "category",
+        "source": "category",
+    },
+    "silver.products_clean": {
+        "product_name": "string",
+        "price": "float64",
+        "description": "string",
+        "category": "category",
+        "source": "category",
+        "row_hash": "Int64",
+    },
+
+    # --- Gold (lu pour construire les faits) ---------------------------------
+    "gold.dim_books": {
+        "book_key": "Int32",
+        "price": "float64",
+    },
+    "gold.dim_authors": {
+        "author_key": "Int32",
+    },
+    "gold.dim_quotes": {
+        "quote_key": "Int32",
+        "author_key": "Int32",
+    },
+    "gold.dim_tags": {
+        "tag_key": "Int32",
+    },
+    "gold.bridge_quote_tags": {
+        "quote_key": "Int32",
+        "tag_key": "Int32",
+    },
+    "gold.dim_geo": {
+        "geo_key": "Int32",
+        "latitude": "float64",
+        "longitude": "float64",
+    },
+    "gold.dim_products": {
+        "product_key": "Int32",
+        "price": "float64",
+    },
+}
+
+
+# Fichiers partenaires : Bronze reçoit du texte, Silver le convertit
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%d/%m/%Y"]
+NUMBER_SPACES = "[\\s\u00a0\u202f]"  # caractères littéraux : RE2 (pyarrow) refuse \u
+
+
+def parse_date(series):
+    """Texte → datetime64 : premier format de DATE_FORMATS qui correspond exactement, sinon NaT."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+
+    text = series.astype("string").str.strip()
+    result = pd.Series(pd.NaT, index=series.index, dtype="datetime64[ns]")
+    for fmt in DATE_FORMATS:
+        result = result.fillna(pd.to_datetime(text, format=fmt, errors="coerce"))
+    return result
+
+
+def parse_number(series):
+    """Montant texte → nombre : "385 000" / "385000,50" → 385000.0 (espaces, espaces insécables, virgule décimale)."""
+    text = (
+        series.astype("string")
+        .str.replace(NUMBER_SPACES, "", regex=True)
+        .str.replace(",", ".", regex=False)
+    )
+    return pd.to_numeric(text, errors="coerce")
+
+
+def _convert(series, kind):
+    if kind == "category":
+        return series.astype("category")
+    if kind == "string":
+        return series.astype(STRING_DTYPE)
+    if kind == "int":
+        converted = pd.to_numeric(series, errors="coerce")
+        if converted.isna().any():
+            return converted.astype("Int64")
+        return pd.to_numeric(converted, downcast="integer")
+    if kind == "float64":
+        return pd.to_numeric(series, errors="coerce").astype("float64")
+    return series.astype(kind)
+
+
+def apply_schema(df, table):
+    schema = SCHEMAS.get(table, {})
+
+    for col, kind in schema.items():
+        if col in df.columns:
+            df[col] = _convert(df[col], kind)
+
+    return df
+
+
+def frame_memory(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+def read_table(sql, engine, table):
+    """pd.read_sql + types compacts de SCHEMAS[table], avec rapport mémoire."""
+    df = pd.read_sql(sql, engine)
+    before = frame_memory(df)
+
+    df = apply_schema(df, table)
+    after = frame_memory(df)
+
+    ratio = before / after if after else 0
+    logger.info(
+        f"{table}: {len(df)} rows, {before / 1024 / 1024:.2f} MiB → "
+        f"{after / 1024 / 1024:.2f} MiB (x{ratio:.1f})"
+    )
+    return df
+
+
+def fillna_keep_dtype(series, value):
+    """fillna qui accepte une nouvelle valeur dans une colonne catégorielle."""
+    if isinstance(series.dtype, pd.CategoricalDtype) and value not in series.cat.categories:
+        series = series.cat.add_categories([value])
+    return series.fillna(value)
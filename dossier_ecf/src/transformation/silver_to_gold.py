@@ -1,8 +1,16 @@
 # src/transformation/silver_to_gold.py
 
+import numpy as np
 import pandas as pd
 from sqlalchemy import create_engine, text
+from sqlalchemy.dialects.postgresql import ARRAY, TEXT
+from utils import arrow_cache
 from utils.logger import get_logger
+from utils.profiling import profile_task
+from transformation.schemas import apply_schema, read_table
+from transformation.gold_sql import assign_keys, build_gold, create_views, drop_views, finalize_tables
+from transformation.partitions import load_fact_partition
+from transformation.scd2 import SCD2_TABLES
 
 
 # ===============================================================================
@@ -21,87 +29,183 @@ logger = get_logger("silver_to_gold")
 
 DB_URI = "postgresql+psycopg2://admin:admin@db:5432/datapulse"
 
+# pandas : dimensions/faits construits en DataFrame puis to_sql, table par table
+# sql    : construction ensembliste dans gold_staging puis bascule atomique
+MODES = ("pandas", "sql")
+
+FACT_BOOKS_ROWS = 100
+
+
+def read_distinct(engine, table, columns, notnull=None):
+    """SELECT DISTINCT columns FROM table : cache Arrow de l'exécution si présent, sinon PostgreSQL."""
+    df = arrow_cache.get(table, columns)
+
+    if df is None:
+        conditions = [f"{notnull} IS NOT NULL"] if notnull else []
+        # Tables historisées (SCD2) : versions courantes uniquement
+        if table.split(".")[-1] in SCD2_TABLES:
+            conditions.append("is_current")
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return read_table(f"SELECT DISTINCT {', '.join(columns)} FROM {table}{where}", engine, table)
+
+    if notnull:
+        df = df.dropna(subset=[notnull])
+    return apply_schema(df.drop_duplicates(ignore_index=True), table)
+
+
 # ==============================================================================
 # DIMENSIONS
 # ==============================================================================
 def create_dim_books(engine):
     logger.info("Creating gold.dim_books")
 
-    df = pd.read_sql(
-        "SELECT DISTINCT title, category, price FROM silver.books",
-        engine
-    )
+    df = read_distinct(engine, "silver.books", ["title", "category", "price"])
 
     if df.empty:
         logger.warning("silver.books is empty – skipping dim_books")
         return
 
-    df = df.reset_index(drop=True)
-    df["book_key"] = df.index + 1
-
-    df = df[["book_key", "title", "category", "price"]]
+    df = apply_schema(df[["title", "category", "price"]], "gold.dim_books")
 
     df.to_sql("dim_books", engine, schema="gold", if_exists="replace", index=False)
 
+    # book_key stable (registre gold.dim_books_keys), pas la position dans df
+    with engine.begin() as conn:
+        assign_keys(conn, "gold", "dim_books")
+        finalize_tables(conn, "gold", ["dim_books"])
+
 
 def create_dim_authors(engine):
     logger.info("Creating gold.dim_authors")
 
-    df = pd.read_sql(
-        "SELECT DISTINCT author FROM silver.quotes WHERE author IS NOT NULL",
-        engine
-    )
+    df = read_distinct(engine, "silver.quotes", ["author"], notnull="author")
 
     if df.empty:
         logger.warning("silver.quotes is empty – skipping dim_authors")
         return
 
-    df = df.reset_index(drop=True)
-    df["author_key"] = df.index + 1
     df.rename(columns={"author": "author_name"}, inplace=True)
 
-    df = df[["author_key", "author_name"]]
+    df = apply_schema(df[["author_name"]], "gold.dim_authors")
 
     df.to_sql("dim_authors", engine, schema="gold", if_exists="replace", index=False)
 
+    with engine.begin() as conn:
+        assign_keys(conn, "gold", "dim_authors")
+        finalize_tables(conn, "gold", ["dim_authors"])
+
+
+def create_dim_quotes_tags(engine):
+    """gold.dim_quotes (tableau tags + GIN), gold.dim_tags et le pont gold.bridge_quote_tags."""
+    logger.info("Creating gold.dim_quotes / gold.dim_tags / gold.bridge_quote_tags")
+
+    quotes = read_distinct(engine, "silver.quotes", ["quote", "author", "tags"], notnull="quote")
+
+    if quotes.empty:
+        logger.warning("silver.quotes is empty – skipping dim_quotes / dim_tags")
+        return
+
+    authors = read_table("SELECT author_key, author_name FROM gold.dim_authors", engine, "gold.dim_authors")
+
+    quotes = quotes.drop_duplicates(subset=["quote"]).sort_values("quote", ignore_index=True)
+    quotes = quotes.merge(authors, left_on="author", right_on="author_name", how="left")
+
+    # Une ligne par (citation, tag) : explode vectorisé, puis dimension et pont
+    pairs = quotes.set_index("quote")["tags"].str.split(",").explode().rename("tag_name")
+    pairs = pairs[pairs.fillna("") != ""].reset_index().drop_duplicates()
+
+    dim_tags = pd.DataFrame({"tag_name": pairs["tag_name"].drop_duplicates().sort_values(ignore_index=True)})
+
+    arrays = pairs.sort_values("tag_name").groupby("quote")["tag_name"].agg(list)
+    quotes["tags"] = quotes["quote"].map(arrays)
+    quotes["tags"] = [t if isinstance(t, list) else [] for t in quotes["tags"]]
+
+    dim_quotes = apply_schema(quotes[["quote", "author_key", "tags"]], "gold.dim_quotes")
+    dim_tags = apply_schema(dim_tags[["tag_name"]], "gold.dim_tags")
+
+    dim_quotes.to_sql(
+        "dim_quotes", engine, schema="gold", if_exists="replace", index=False,
+        dtype={"tags": ARRAY(TEXT)}
+    )
+    dim_tags.to_sql("dim_tags", engine, schema="gold", if_exists="replace", index=False)
+
+    # quote_key / tag_key stables (registres gold.dim_quotes_keys / dim_tags_keys)
+    with engine.begin() as conn:
+        assign_keys(conn, "gold", "dim_quotes")
+        assign_keys(conn, "gold", "dim_tags")
+
+    quote_keys = pd.read_sql("SELECT quote_key, quote FROM gold.dim_quotes", engine)
+    tag_keys = pd.read_sql("SELECT tag_key, tag_name FROM gold.dim_tags", engine)
+
+    bridge = pairs.merge(quote_keys, on="quote").merge(tag_keys, on="tag_name")[["quote_key", "tag_key"]]
+    bridge = apply_schema(bridge, "gold.bridge_quote_tags")
+    bridge.to_sql("bridge_quote_tags", engine, schema="gold", if_exists="replace", index=False)
+
+    with engine.begin() as conn:
+        finalize_tables(conn, "gold", ["dim_quotes", "dim_tags", "bridge_quote_tags"])
+
+    logger.info(f"gold.dim_tags: {len(dim_tags)} tags, {len(bridge)} quote/tag pairs")
+
 
 def create_dim_geo(engine):
+    """Une ligne par librairie partenaire ; location / geohash / index GiST ajoutés par finalize_tables."""
     logger.info("Creating gold.dim_geo")
 
+    columns = ["nom_librairie", "adresse", "code_postal", "ville", "latitude", "longitude"]
     try:
-        df = pd.read_sql("""
-            SELECT DISTINCT
-                city,
-                postal_code
-            FROM silver.librairies_clean
-            WHERE city IS NOT NULL
-        """, engine)
+        df = read_distinct(engine, "silver.librairies_geo", columns)
     except Exception:
-        logger.warning("silver.librairies_clean missing – skipping dim_geo")
+        logger.warning("silver.librairies_geo missing – skipping dim_geo")
+        return
+
+    if df.empty:
+        logger.warning("silver.librairies_geo is empty – skipping dim_geo")
         return
 
+    df["postal_code"] = df["code_postal"].astype("string")
+    df["city"] = df["ville"]
+    overseas = df["postal_code"].str[:2].isin(["97", "98"])
+    df["department"] = df["postal_code"].str[:2].where(~overseas, df["postal_code"].str[:3])
+    df["country"] = "France"
+
+    # Une ligne par librairie (clé métier), géocodée de préférence
+    df = df.sort_values(["nom_librairie", "adresse", "latitude"], na_position="last", ignore_index=True)
+    df = df.drop_duplicates(subset=["nom_librairie", "adresse"], ignore_index=True)
+
+    df = apply_schema(df[[
+        "nom_librairie", "adresse", "postal_code", "city",
+        "department", "country", "latitude", "longitude"
+    ]], "gold.dim_geo")
+
+    df.to_sql("dim_geo", engine, schema="gold", if_exists="replace", index=False)
+
+    with engine.begin() as conn:
+        assign_keys(conn, "gold", "dim_geo")
+        finalize_tables(conn, "gold", ["dim_geo"])
+
+    logger.info(f"gold.dim_geo: {len(df)} partners, {int(df['latitude'].notna().sum())} geocoded")
+
+
 def create_dim_products(engine):
     logger.info("Creating gold.dim_products")
 
-    df = pd.read_sql("""
-        SELECT DISTINCT
-            product_name,
-            category,
-            price
-        FROM silver.products_clean
-    """, engine)
+    df = read_distinct(engine, "silver.products_clean", ["product_name", "category", "price", "description"])
 
     if df.empty:
         logger.warning("silver.products_clean is empty – skipping dim_products")
         return
 
-    df = df.reset_index(drop=True)
-    df["product_key"] = df.index + 1
-
-    df = df[["product_key", "product_name", "category", "price"]]
+    df = apply_schema(
+        df[["product_name", "category", "price", "description"]],
+        "gold.dim_products"
+    )
 
     df.to_sql("dim_products", engine, schema="gold", if_exists="replace", index=False)
 
+    with engine.begin() as conn:
+        assign_keys(conn, "gold", "dim_products")
+        finalize_tables(conn, "gold", ["dim_products"])
+
 
 # ==============================================================================
 # FACT TABLES
@@ -110,8 +214,8 @@ def create_fact_sales_books(engine):
     logger.info("Creating gold.fact_sales_books")
 
     try:
-        books = pd.read_sql("SELECT book_key, price FROM gold.dim_books", engine)
-        authors = pd.read_sql("SELECT author_key FROM gold.dim_authors", engine)
+        books = read_table("SELECT book_key, price FROM gold.dim_books ORDER BY book_key", engine, "gold.dim_books")
+        authors = read_table("SELECT author_key FROM gold.dim_authors ORDER BY author_key", engine, "gold.dim_authors")
     except Exception:
         logger.warning("Missing book/author dimensions – skipping fact_sales_books")
         return
@@ -120,27 +224,31 @@ def create_fact_sales_books(engine):
         logger.warning("Empty dimensions – skipping fact_sales_books")
         return
 
-    # 👉 GEO OPTIONNEL
+    # Seules les FACT_BOOKS_ROWS premières combinaisons sont gardées :
+    # on tronque avant chaque produit cartésien au lieu de le matérialiser
+    fact = books.head(FACT_BOOKS_ROWS).merge(authors.head(FACT_BOOKS_ROWS), how="cross")
+    fact = fact.head(FACT_BOOKS_ROWS)
+
+    # 👉 GEO OPTIONNEL : une librairie par ligne, attribuée à tour de rôle
     try:
-        geo = pd.read_sql("SELECT geo_key FROM gold.dim_geo", engine)
-        fact = books.merge(authors, how="cross").merge(geo, how="cross")
+        geo = read_table("SELECT geo_key FROM gold.dim_geo ORDER BY geo_key", engine, "gold.dim_geo")
     except Exception:
+        geo = None
+
+    if geo is None or geo.empty:
         logger.warning("No geo dimension – building fact without geo")
-        fact = books.merge(authors, how="cross")
-        fact["geo_key"] = None
+        fact["geo_key"] = pd.Series(pd.NA, index=fact.index, dtype="Int32")
+    else:
+        positions = np.arange(len(fact)) % len(geo)
+        fact["geo_key"] = geo["geo_key"].array[positions]
+
+    sales_date = pd.Timestamp.today().normalize()
 
-    fact = fact.head(100)
-    fact["sales_date"] = pd.Timestamp.today().normalize()
-    fact["quantity"] = 1
+    fact["sales_date"] = sales_date
+    fact["quantity"] = pd.Series(1, index=fact.index, dtype="int16")
     fact["sales_amount"] = fact["quantity"] * fact["price"]
 
-    fact.to_sql(
-        "fact_sales_books",
-        engine,
-        schema="gold",
-        if_exists="replace",
-        index=False
-    )
+    load_fact_partition(engine, "fact_sales_books", fact, sales_date.date())
 
     logger.info("gold.fact_sales_books created")
 
@@ -148,18 +256,21 @@ def create_fact_sales_books(engine):
 def create_fact_sales_products(engine):
     logger.info("Creating gold.fact_sales_products")
 
-    products = pd.read_sql(
-        "SELECT product_key, price FROM gold.dim_products",
-        engine
+    products = read_table(
+        "SELECT product_key, price FROM gold.dim_products ORDER BY product_key",
+        engine,
+        "gold.dim_products"
     )
 
     if products.empty:
         logger.warning("gold.dim_products is empty – skipping fact_sales_products")
         return
 
+    sales_date = pd.Timestamp.today().normalize()
+
     fact = products.copy()
-    fact["sales_date"] = pd.Timestamp.today().normalize()
-    fact["quantity"] = 2
+    fact["sales_date"] = sales_date
+    fact["quantity"] = pd.Series(2, index=fact.index, dtype="int16")
     fact["sales_amount"] = fact["quantity"] * fact["price"]
 
     fact = fact[[
@@ -170,32 +281,52 @@ def create_fact_sales_products(engine):
         "sales_amount"
     ]]
 
-    fact.to_sql(
-        "fact_sales_products",
-        engine,
-        schema="gold",
-        if_exists="replace",
-        index=False
-    )
+    load_fact_partition(engine, "fact_sales_products", fact, sales_date.date())
 
 
 # ==============================================================================
 # RUN
 # ==============================================================================
-def run():
-    logger.info("START Silver → Gold")
+def run(mode="pandas"):
+    logger.info(f"START Silver → Gold (mode={mode})")
+
+    if mode not in MODES:
+        raise ValueError(f"Invalid mode. Use: {' | '.join(MODES)}")
 
     engine = create_engine(DB_URI)
 
     with engine.begin() as conn:
         conn.execute(text("CREATE SCHEMA IF NOT EXISTS gold"))
 
-    create_dim_books(engine)
-    create_dim_authors(engine)
-    create_dim_geo(engine)
-    create_dim_products(engine)
+    if mode == "sql":
+        with profile_task("build_gold"):
+            build_gold(engine)
+
+        logger.info("END Silver → Gold")
+        return
+
+    # Les vues dépendent des tables : to_sql(if_exists="replace") ne peut
+    # pas supprimer une table encore référencée
+    with engine.begin() as conn:
+        drop_views(conn)
+
+    with profile_task("create_dim_books"):
+        create_dim_books(engine)
+    with profile_task("create_dim_authors"):
+        create_dim_authors(engine)
+    with profile_task("create_dim_quotes_tags"):
+        create_dim_quotes_tags(engine)
+    with profile_task("create_dim_geo"):
+        create_dim_geo(engine)
+    with profile_task("create_dim_products"):
+        create_dim_products(engine)
+
+    with profile_task("create_fact_sales_books"):
+        create_fact_sales_books(engine)
+    with profile_task("create_fact_sales_products"):
+        create_fact_sales_products(engine)
 
-    create_fact_sales_books(engine)
-    create_fact_sales_products(engine)
+    with engine.begin() as conn:
+        create_views(conn)
 
     logger.info("END Silver → Gold")
\ No newline at end of file
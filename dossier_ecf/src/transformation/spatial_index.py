@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+# ===============================================================================
+# Script Purpose:
+#     Index spatial des librairies partenaires (gold.dim_geo)
+#     - projection équirectangulaire en km centrée sur la France
+#       (GEO_REF_LAT) : x = R·lon·cos(GEO_REF_LAT), y = R·lat
+#     - Python : grille de cellules de CELL_KM sur (x, y) ; un voisinage ne
+#       lit que les cellules proches, la distance exacte (haversine) n'est
+#       calculée que pour ces candidats ; résultats : liste de dicts
+#       (colonnes de dim_geo + distance_km), du plus proche au plus lointain
+#     - PostgreSQL : même projection dans gold.dim_geo.location (POINT,
+#       index GiST) → KNN par ORDER BY location <-> point, rayon par boîte
+#       englobante, puis haversine sur les seuls candidats
+#
+#     La projection déforme les distances d'au plus ~10 % en métropole :
+#     les recherches élargissent la zone de PROJECTION_MARGIN puis filtrent
+#     et trient sur la distance haversine exacte.
+# ===============================================================================
+
+EARTH_RADIUS_KM = 6371.0088
+GEO_REF_LAT = 46.5
+PROJECTION_MARGIN = 1.25
+CELL_KM = 10.0
+GEOHASH_PRECISION = 7       # cellules d'environ 150 m × 150 m
+
+# Expression SQL de la projection (colonne générée gold.dim_geo.location)
+LOCATION_SQL = (
+    f"point(radians(longitude) * {EARTH_RADIUS_KM} * cos(radians({GEO_REF_LAT})), "
+    f"radians(latitude) * {EARTH_RADIUS_KM})"
+)
+
+HAVERSINE_SQL = f"""
+    2 * {EARTH_RADIUS_KM} * asin(sqrt(
+        power(sin(radians(latitude - :lat) / 2), 2)
+        + cos(radians(:lat)) * cos(radians(latitude)) * power(sin(radians(longitude - :lon) / 2), 2)
+    ))
+"""
+
+DIM_GEO_COLUMNS = ["geo_key", "nom_librairie", "adresse", "postal_code", "city", "latitude", "longitude"]
+
+
+# ==============================================================================
+# GÉOMÉTRIE
+# ==============================================================================
+def project(lat, lon):
+    lat = np.radians(np.asarray(lat, dtype="float64"))
+    lon = np.radians(np.asarray(lon, dtype="float64"))
+    return lon * EARTH_RADIUS_KM * np.cos(np.radians(GEO_REF_LAT)), lat * EARTH_RADIUS_KM
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype="float64")) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+# ==============================================================================
+# INDEX EN MÉMOIRE (GRILLE)
+# ==============================================================================
+class GeoIndex:
+    """Grille de cellules CELL_KM × CELL_KM sur les points géocodés de df."""
+
+    def __init__(self, df, cell_km=CELL_KM):
+        self.frame = df.dropna(subset=["latitude", "longitude"]).reset_index(drop=True)
+        self.cell_km = cell_km
+
+        # Résultats : dicts préconstruits, une requête ne crée pas de DataFrame
+        self.records = self.frame.to_dict("records")
+        self.lat = self.frame["latitude"].to_numpy(dtype="float64")
+        self.lon = self.frame["longitude"].to_numpy(dtype="float64")
+        x, y = project(self.lat, self.lon)
+
+        cx = np.floor(x / cell_km).astype(np.int64)
+        cy = np.floor(y / cell_km).astype(np.int64)
+
+        # Points triés par cellule : une cellule = une tranche contiguë
+        order = np.lexsort((cy, cx))
+        keys = np.stack([cx[order], cy[order]], axis=1)
+        cells, starts = np.unique(keys, axis=0, return_index=True)
+        ends = np.append(starts[1:], len(order))
+
+        self.cells = {
+            (int(c[0]), int(c[1])): order[s:e] for c, s, e in zip(cells, starts, ends)
+        }
+        self.extent = (
+            (int(cx.min()), int(cx.max()), int(cy.min()), int(cy.max())) if len(order) else None
+        )
+
+    @classmethod
+    def from_gold(cls, engine, cell_km=CELL_KM):
+        df = pd.read_sql(
+            f"SELECT {', '.join(DIM_GEO_COLUMNS)} FROM gold.dim_geo WHERE latitude IS NOT NULL",
+            engine
+        )
+        return cls(df, cell_km)
+
+    def __len__(self):
+        return len(self.frame)
+
+    def _cell(self, lat, lon):
+        x, y = project(lat, lon)
+        return int(np.floor(x / self.cell_km)), int(np.floor(y / self.cell_km))
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+    def _result(self, idx, distances):
+        order = np.argsort(distances, kind="stable")
+        return [
+            {**self.records[i], "distance_km": float(d)}
+            for i, d in zip(idx[order].tolist(), distances[order].tolist())
+        ]
+
+    def within(self, lat, lon, radius_km):
+        """Partenaires à moins de radius_km du point, du plus proche au plus lointain."""
+        if self.extent is None:
+            return []
+
+        cx, cy = self._cell(lat, lon)
+        reach = int(np.ceil(radius_km * PROJECTION_MARGIN / self.cell_km))
+
+        found = [
+            self.cells[cell]
+            for r in range(reach + 1)
+            for cell in self._ring(cx, cy, r)
+            if cell in self.cells
+        ]
+        idx = np.concatenate(found) if found else np.array([], dtype=np.int64)
+
+        distances = haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+        keep = distances <= radius_km
+        return self._result(idx[keep], distances[keep])
+
+    def nearest(self, lat, lon, k=5):
+        """k partenaires les plus proches : anneaux de cellules jusqu'à ce que le k-ième soit certain."""
+        if self.extent is None or k <= 0:
+            return []
+
+        k = min(k, len(self))
+        cx, cy = self._cell(lat, lon)
+        x_min, x_max, y_min, y_max = self.extent
+        max_ring = max(abs(cx - x_min), abs(cx - x_max), abs(cy - y_min), abs(cy - y_max))
+
+        found = []
+        r = 0
+        while True:
+            found.extend(self.cells[cell] for cell in self._ring(cx, cy, r) if cell in self.cells)
+            count = sum(len(f) for f in found)
+
+            if count >= k:
+                idx = np.concatenate(found)
+                distances = haversine_km(lat, lon, self.lat[idx], self.lon[idx])
+                kth = np.partition(distances, k - 1)[k - 1]
+                # Tout point hors des anneaux lus est à plus de r·CELL_KM (projeté)
+                if kth <= r * self.cell_km / PROJECTION_MARGIN or r >= max_ring:
+                    top = np.argpartition(distances, k - 1)[:k]
+                    return self._result(idx[top], distances[top])
+
+            r += 1
+
+
+# ==============================================================================
+# REQUÊTES POSTGRESQL (index GiST de gold.dim_geo.location)
+# ==============================================================================
+def nearest_partners(engine, lat, lon, k=5):
+    """
+    KNN exact en deux passes indexées (GiST) :
+    1. les k plus proches au sens projeté (ORDER BY location <-> point)
+       → leur plus grande distance haversine borne celle des k vrais voisins
+    2. boîte englobante de cette borne (× PROJECTION_MARGIN), tri haversine
+    """
+    x, y = project(lat, lon)
+    sql = text(f"""
+        WITH bound AS (
+            SELECT max({HAVERSINE_SQL}) * :margin AS half
+            FROM (
+                SELECT latitude, longitude
+                FROM gold.dim_geo
+                WHERE location IS NOT NULL
+                ORDER BY location <-> point(:x, :y)
+                LIMIT :k
+            ) knn
+        )
+        SELECT {', '.join(DIM_GEO_COLUMNS)}, {HAVERSINE_SQL} AS distance_km
+        FROM gold.dim_geo, bound
+        WHERE location <@ box(point(:x - bound.half, :y - bound.half), point(:x + bound.half, :y + bound.half))
+        ORDER BY distance_km
+        LIMIT :k
+    """)
+    params = {"lat": lat, "lon": lon, "x": float(x), "y": float(y), "k": k, "margin": PROJECTION_MARGIN}
+    with engine.connect() as conn:
+        return [dict(row) for row in conn.execute(sql, params).mappings()]
+
+
+def partners_within(engine, lat, lon, radius_km):
+    """Rayon : boîte englobante sur location (GiST), puis filtre haversine."""
+    x, y = project(lat, lon)
+    half = radius_km * PROJECTION_MARGIN
+    sql = text(f"""
+        SELECT *
+        FROM (
+            SELECT {', '.join(DIM_GEO_COLUMNS)}, {HAVERSINE_SQL} AS distance_km
+            FROM gold.dim_geo
+            WHERE location <@ box(point(:x - :half, :y - :half), point(:x + :half, :y + :half))
+        ) c
+        WHERE distance_km <= :radius
+        ORDER BY distance_km
+    """)
+    params = {"lat": lat, "lon": lon, "x": float(x), "y": float(y), "half": half, "radius": radius_km}
+    with engine.connect() as conn:
+        return [dict(row) for row in conn.execute(sql, params).mappings()]
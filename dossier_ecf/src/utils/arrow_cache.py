@@ -0,0 +1,144 @@
+import os
+import shutil
+import time
+
+from utils.logger import get_logger
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow optionnel : sans lui, tout passe par PostgreSQL
+    pa = None
+
+# ===============================================================================
+# Script Purpose:
+#     Cache local de passage de relais Silver → Gold (Arrow IPC)
+#     Les DataFrames écrits par une étape sont aussi déposés dans
+#     <CACHE_DIR>/<run_id>/<schema.table>.arrow (format fichier IPC non
+#     compressé) ; l'étape suivante de la même exécution les relit par
+#     memory-map, sans copie ni aller-retour PostgreSQL.
+#
+#     - désactivé par défaut : enable(run_id) (pipeline.py --arrow-cache)
+#     - un fichier absent → get() rend None et l'appelant lit PostgreSQL
+#     - éviction à chaque enable() / put() : exécutions plus vieilles que
+#       CACHE_MAX_AGE_HOURS, puis les plus anciennes tant que le cache
+#       dépasse CACHE_MAX_MB (l'exécution courante n'est jamais évincée)
+# ===============================================================================
+
+logger = get_logger("arrow_cache")
+
+CACHE_DIR = os.getenv("DATAPULSE_CACHE_DIR", "data/cache")
+CACHE_MAX_AGE_HOURS = float(os.getenv("DATAPULSE_CACHE_MAX_AGE_HOURS", "24"))
+CACHE_MAX_MB = float(os.getenv("DATAPULSE_CACHE_MAX_MB", "2048"))
+
+_state = {"run_id": None, "dir": CACHE_DIR}
+
+
+def enable(run_id, cache_dir=CACHE_DIR):
+    if pa is None:
+        raise ImportError("The Arrow hand-off cache requires the 'pyarrow' package")
+
+    os.makedirs(os.path.join(cache_dir, run_id), exist_ok=True)
+    _state.update(run_id=run_id, dir=cache_dir)
+    logger.info(f"Arrow cache enabled → {os.path.join(cache_dir, run_id)}")
+
+    evict()
+
+
+def enabled():
+    return _state["run_id"] is not None
+
+
+def _path(table, run_id=None):
+    return os.path.join(_state["dir"], run_id or _state["run_id"], f"{table}.arrow")
+
+
+# ==============================================================================
+# ÉCRITURE / LECTURE
+# ==============================================================================
+def put(table, df):
+    if not enabled():
+        return
+
+    path = _path(table)
+    tmp = f"{path}.tmp"
+
+    try:
+        arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        # Renommage atomique : un lecteur ne voit jamais un fichier partiel
+        os.replace(tmp, path)
+    except (pa.ArrowException, OSError) as e:
+        logger.warning(f"{table}: not cached ({e})")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+
+    logger.info(f"{table}: cached ({os.path.getsize(path) / 1024 / 1024:.1f} MiB)")
+    evict()
+
+
+def get(table, columns=None):
+    """DataFrame de l'exécution courante (memory-map) ou None si absent."""
+    if not enabled():
+        return None
+
+    path = _path(table)
+    if not os.path.exists(path):
+        return None
+
+    # Les buffers Arrow pointent dans le fichier mappé : pas de lecture
+    # anticipée ; to_pandas(split_blocks) évite de recopier les colonnes
+    # en un seul bloc pandas
+    source = pa.memory_map(path, "r")
+    arrow_table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        arrow_table = arrow_table.select(columns)
+
+    df = arrow_table.to_pandas(split_blocks=True)
+    logger.info(f"{table}: {len(df)} rows read from the Arrow cache")
+    return df
+
+
+# ==============================================================================
+# ÉVICTION
+# ==============================================================================
+def _runs():
+    root = _state["dir"]
+    if not os.path.isdir(root):
+        return []
+
+    runs = []
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in os.listdir(path)]
+            size = sum(os.path.getsize(f) for f in files)
+            mtime = max([os.path.getmtime(f) for f in files] or [os.path.getmtime(path)])
+            runs.append((mtime, size, name, path))
+
+    return sorted(runs)
+
+
+def evict(max_age_hours=CACHE_MAX_AGE_HOURS, max_mb=CACHE_MAX_MB):
+    current = _state["run_id"]
+    oldest_allowed = time.time() - max_age_hours * 3600
+
+    runs = []
+    for mtime, size, name, path in _runs():
+        if name != current and mtime < oldest_allowed:
+            shutil.rmtree(path, ignore_errors=True)
+            logger.info(f"Evicted cached run {name} (older than {max_age_hours}h)")
+        else:
+            runs.append((mtime, size, name, path))
+
+    total = sum(size for _, size, _, _ in runs)
+    for mtime, size, name, path in runs:
+        if total <= max_mb * 1024 * 1024:
+            break
+        if name == current:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        logger.info(f"Evicted cached run {name} (cache above {max_mb:.0f} MiB)")
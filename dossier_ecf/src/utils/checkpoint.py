@@ -0,0 +1,153 @@
+import json
+
+from utils.logger import get_logger
+
+# ===============================================================================
+# Script Purpose:
+#     Points de reprise persistants des scrapers (table bronze.crawl_checkpoints)
+#     - un curseur JSON par source (dernière page, dernier index, ...)
+#     - commit périodique : données + curseur dans la MÊME transaction,
+#       donc un curseur enregistré correspond toujours à des lignes commitées
+#     - reprise avec `pipeline.py --step bronze --resume` : les sources déjà
+#       terminées (status 'done') sont sautées, les autres reprennent au curseur
+#     - éléments en échec (page, adresse...) : fail(item) les garde dans le
+#       curseur ("failed"), la reprise les retente ; une source terminée avec
+#       des échecs reste 'partial' tant qu'ils n'ont pas abouti
+#     - add_hook(fn) : fn(conn) est appelée avant chaque commit, pour écrire
+#       dans la même transaction ce qui dépend des lignes commitées (sketches)
+#     - add_sink(sink, prefix) : dump MinIO découpé comme les commits ; l'objet
+#       des lignes d'un commit est publié juste avant celui-ci. Un crash
+#       n'abandonne que l'objet des lignes non commitées (absentes de Bronze
+#       aussi) ; la reprise continue dans l'objet suivant
+# ===============================================================================
+
+logger = get_logger("bronze.checkpoint")
+
+COMMIT_EVERY = 200
+
+CHECKPOINT_DDL = """
+    CREATE SCHEMA IF NOT EXISTS bronze;
+
+    CREATE TABLE IF NOT EXISTS bronze.crawl_checkpoints (
+        source TEXT PRIMARY KEY,
+        cursor JSONB NOT NULL,
+        records INTEGER NOT NULL DEFAULT 0,
+        status TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+
+class Checkpoint:
+    def __init__(self, conn, source, commit_every=COMMIT_EVERY):
+        self.conn = conn
+        self.source = source
+        self.commit_every = commit_every
+        self.cursor = {}
+        self.records = 0
+        self.pending = 0
+        self.completed = False
+        self.failed = []
+        self.hooks = []
+
+        with conn.cursor() as cur:
+            cur.execute(CHECKPOINT_DDL)
+        conn.commit()
+
+    def load(self, resume):
+        """
+        Curseur de la dernière exécution ({} si aucune ou si resume=False).
+        Source déjà terminée : completed = True, l'appelant n'a rien à refaire.
+        """
+        if not resume:
+            return {}
+
+        with self.conn.cursor() as cur:
+            cur.execute(
+                "SELECT cursor, records, status FROM bronze.crawl_checkpoints WHERE source = %s",
+                (self.source,)
+            )
+            row = cur.fetchone()
+
+        if row is None:
+            logger.info(f"[{self.source}] no checkpoint – starting from scratch")
+            return {}
+
+        cursor, records, status = row
+        if status == "done":
+            self.completed = True
+            logger.info(f"[{self.source}] already completed ({records} records) – skipping")
+            return cursor
+
+        self.failed = list(cursor.pop("failed", []))
+        self.cursor, self.records = cursor, records
+        logger.info(
+            f"[{self.source}] resuming from checkpoint {self.cursor} ({self.records} records, "
+            f"{len(self.failed)} failed items to retry)"
+        )
+        return self.cursor
+
+    def object_prefix(self, prefix):
+        """Objet MinIO des prochaines lignes : suffixé par le nombre de lignes déjà commitées."""
+        return f"{prefix}_{self.records:08d}"
+
+    def add_sink(self, sink, prefix):
+        """
+        Sink créé avec object_prefix(prefix) : avant chaque commit, son objet en
+        cours est publié et les lignes suivantes partent dans un nouvel objet.
+        """
+        self.add_hook(lambda conn: sink.rotate(self.object_prefix(prefix)))
+
+    def advance(self, cursor, records=0):
+        """Enregistre la progression ; commit dès que COMMIT_EVERY lignes sont en attente."""
+        self.cursor = cursor
+        self.records += records
+        self.pending += records
+
+        if self.pending >= self.commit_every:
+            self.commit()
+
+    def fail(self, item):
+        """item en échec : enregistré avec le curseur, retenté à la prochaine reprise."""
+        if item not in self.failed:
+            self.failed.append(item)
+
+    def retried(self, item):
+        if item in self.failed:
+            self.failed.remove(item)
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def _save(self, status):
+        for hook in self.hooks:
+            hook(self.conn)
+
+        with self.conn.cursor() as cur:
+            cur.execute("""
+                INSERT INTO bronze.crawl_checkpoints (source, cursor, records, status, updated_at)
+                VALUES (%s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (source) DO UPDATE SET
+                    cursor = EXCLUDED.cursor,
+                    records = EXCLUDED.records,
+                    status = EXCLUDED.status,
+                    updated_at = EXCLUDED.updated_at
+            """, (self.source, json.dumps({**self.cursor, "failed": self.failed}), self.records, status))
+
+    def commit(self):
+        self._save("running")
+        self.conn.commit()
+        self.pending = 0
+
+    def complete(self):
+        if self.failed:
+            self._save("partial")
+            logger.error(
+                f"[{self.source}] crawl finished with {len(self.failed)} failed items {self.failed} "
+                f"({self.records} records) – retried by --resume"
+            )
+        else:
+            self._save("done")
+            logger.info(f"[{self.source}] crawl completed ({self.records} records)")
+        self.conn.commit()
+        self.pending = 0
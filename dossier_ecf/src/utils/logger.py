@@ -1,9 +1,245 @@
-
+import atexit
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+# ===============================================================================
+# Script Purpose:
+#     Journalisation non bloquante du pipeline
+#     - les loggers n'écrivent jamais eux-mêmes : un QueueHandler dépose les
+#       records dans une file, un QueueListener (thread dédié) les formate
+#       et les écrit → pas d'I/O ni de verrou de handler dans les boucles
+#     - sortie texte (défaut) ou JSON une ligne par record
+#       (DATAPULSE_LOG_FORMAT=json ou pipeline.py --log-format json)
+#     - identifiant d'exécution (run_id) ajouté à chaque record pour
+#       corréler les lignes d'une même exécution
+#     - setup_logging(log_dir=...) : copie des logs dans
+#       <log_dir>/<run_id>/pipeline.log, à côté des profils de l'exécution
+#       (utils.profiling → <log_dir>/<run_id>/profiles/)
+#     - get_hot_logger() : logger échantillonné / limité en débit pour les
+#       boucles chaudes (une ligne par page, par adresse géocodée...)
+# ===============================================================================
+
+LOG_DIR = os.getenv("DATAPULSE_LOG_DIR", "logs")
+LOG_FILE = "pipeline.log"
+LOG_LEVEL = os.getenv("DATAPULSE_LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("DATAPULSE_LOG_FORMAT", "text")
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(run_id)s | %(name)s | %(message)s"
+FORMATS = ("text", "json")
+
+# Boucles chaudes : au plus HOT_LOG_RATE lignes / seconde et par logger
+HOT_LOG_RATE = float(os.getenv("DATAPULSE_HOT_LOG_RATE", "5"))
+
+# Attributs standard d'un LogRecord : le reste vient de extra={...}
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "run_id"}
+
+_state = {
+    "run_id": os.getenv("DATAPULSE_RUN_ID") or uuid.uuid4().hex[:12],
+    "listener": None,
+    "handler": None,
+    "outputs": [],
+    "log_dir": None,
+    "lock": threading.Lock(),
+}
+
+
+# ==============================================================================
+# FORMATS
+# ==============================================================================
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "run_id": getattr(record, "run_id", None),
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRS})
+
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _RunIdFilter(logging.Filter):
+    def filter(self, record):
+        record.run_id = _state["run_id"]
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Ne fige que le message et la trace : le formatage complet se fait dans le listener."""
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+# ==============================================================================
+# CONFIGURATION
+# ==============================================================================
+def _make_formatter(fmt):
+    if fmt == "json":
+        return JsonFormatter()
+    return logging.Formatter(TEXT_FORMAT)
+
+
+def run_dir(log_dir=None):
+    """Répertoire de l'exécution courante : <log_dir>/<run_id>."""
+    return os.path.join(log_dir or _state["log_dir"] or LOG_DIR, _state["run_id"])
+
+
+def setup_logging(fmt=None, level=None, run_id=None, stream=None, log_dir=None):
+    """
+    (Re)configure la journalisation ; appelée implicitement par get_logger().
+    log_dir : ajoute le fichier <log_dir>/<run_id>/pipeline.log (conservé
+    par les appels suivants, ex. processus de travail).
+    """
+    fmt = fmt or LOG_FORMAT
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid log format. Use: {' | '.join(FORMATS)}")
+
+    with _state["lock"]:
+        if run_id:
+            _state["run_id"] = run_id
+        if log_dir:
+            _state["log_dir"] = log_dir
+
+        root = logging.getLogger()
+        _stop_listener()
+
+        outputs = [logging.StreamHandler(stream or sys.stderr)]
+        if _state["log_dir"]:
+            path = os.path.join(run_dir(), LOG_FILE)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            outputs.append(logging.FileHandler(path, encoding="utf-8"))
+
+        for output in outputs:
+            output.setFormatter(_make_formatter(fmt))
+
+        records = queue.SimpleQueue()
+        handler = _QueueHandler(records)
+        handler.addFilter(_RunIdFilter())
+
+        listener = logging.handlers.QueueListener(records, *outputs, respect_handler_level=True)
+        listener.start()
+
+        if _state["handler"] is not None:
+            root.removeHandler(_state["handler"])
+        root.addHandler(handler)
+        root.setLevel(level or LOG_LEVEL)
+
+        _state.update(listener=listener, handler=handler, outputs=outputs)
+
+    return _state["run_id"]
+
+
+def _stop_listener():
+    if _state["listener"] is not None:
+        # stop() vide la file avant de rendre la main
+        _state["listener"].stop()
+        _state["listener"] = None
+
+    # Le flux (stderr) n'est pas à nous : seuls les fichiers sont fermés
+    for output in _state["outputs"]:
+        if isinstance(output, logging.FileHandler):
+            output.close()
+    _state["outputs"] = []
+
+
+def shutdown():
+    with _state["lock"]:
+        _stop_listener()
+
+
+atexit.register(shutdown)
+
+
+def get_run_id():
+    return _state["run_id"]
+
 
 def get_logger(name):
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-    )
+    if _state["handler"] is None:
+        setup_logging()
     return logging.getLogger(name)
+
+
+# ==============================================================================
+# BOUCLES CHAUDES
+# ==============================================================================
+class HotLogger:
+    """
+    Logger pour boucles chaudes :
+    - every=N : ne garde qu'un appel sur N
+    - per_second=R : seau à jetons, au plus R lignes / seconde (rafale de R)
+    Les appels écartés coûtent un compteur ; le nombre d'appels écartés
+    depuis la dernière ligne est joint au record (champ "suppressed").
+    """
+
+    def __init__(self, logger, every=1, per_second=HOT_LOG_RATE):
+        self.logger = logger
+        self.every = max(int(every), 1)
+        self.per_second = per_second
+        self._tokens = per_second
+        self._last = time.monotonic()
+        self._calls = 0
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def _allow(self):
+        with self._lock:
+            self._calls += 1
+            if self._calls % self.every:
+                self._suppressed += 1
+                return None
+
+            if self.per_second:
+                now = time.monotonic()
+                self._tokens = min(self.per_second, self._tokens + (now - self._last) * self.per_second)
+                self._last = now
+                if self._tokens < 1:
+                    self._suppressed += 1
+                    return None
+                self._tokens -= 1
+
+            suppressed, self._suppressed = self._suppressed, 0
+            return suppressed
+
+    def log(self, level, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+
+        suppressed = self._allow()
+        if suppressed is None:
+            return
+
+        if suppressed:
+            kwargs["extra"] = {**kwargs.get("extra", {}), "suppressed": suppressed}
+            msg = f"{msg} (+{suppressed} suppressed)"
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+
+def get_hot_logger(name, every=1, per_second=HOT_LOG_RATE):
+    return HotLogger(get_logger(name), every=every, per_second=per_second)
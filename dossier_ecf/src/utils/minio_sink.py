@@ -0,0 +1,254 @@
+import json
+import queue
+import threading
+import zlib
+
+from utils.logger import get_logger
+
+try:
+    import zstandard
+except ImportError:  # dans requirements.txt ; sans lui, gzip reste disponible
+    zstandard = None
+
+# ===============================================================================
+# Script Purpose:
+#     Écriture en flux des données brutes vers MinIO
+#     - enregistrements sérialisés en NDJSON (une ligne JSON par record)
+#     - compression à la volée (gzip ou zstd)
+#     - upload multipart en flux (put_object, length=-1)
+#     - tampon borné entre le producteur et l'upload → mémoire bornée :
+#         ≈ 2 × part_size (part en cours de lecture + part envoyée)
+#           + (MAX_PENDING_CHUNKS + 1) × CHUNK_SIZE        ≈ 25 Mio par défaut
+#       parallel_uploads=1 par défaut : put_object envoie chaque part avant
+#       de lire la suivante, le producteur continue de remplir le tampon.
+#       Au-delà de 1, minio met les parts lues dans la file non bornée de son
+#       ThreadPool : si le réseau est plus lent que le producteur, chaque
+#       part en attente garde part_size octets en mémoire (aucune borne).
+#     - rotate(prefix) : publie l'objet en cours et continue dans un nouvel
+#       objet (un objet par commit de checkpoint, voir utils/checkpoint.py) ;
+#       un objet n'est démarré qu'à la première écriture (pas d'objet vide)
+#
+#     Le client n'a besoin que de put_object() : un MinIO local ou tout
+#     substitut compatible S3 peut être injecté pour les tests.
+# ===============================================================================
+
+logger = get_logger("minio_sink")
+
+PART_SIZE = 8 * 1024 * 1024      # >= 5 MiB (minimum S3 d'une part multipart)
+PARALLEL_UPLOADS = 1             # > 1 : mémoire non bornée (voir en-tête)
+CHUNK_SIZE = 1024 * 1024         # taille des blocs compressés passés à l'upload
+MAX_PENDING_CHUNKS = 8           # tampon producteur → upload
+
+EXTENSIONS = {"gzip": ".gz", "zstd": ".zst", None: ""}
+
+_EOF = object()
+_ABORT = object()
+
+
+def _compressor(compression):
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 → en-tête gzip
+    if compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        return zstandard.ZstdCompressor(level=3).compressobj()
+    if compression is None:
+        return None
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class _PipeReader:
+    """Côté lecture (put_object) d'un tube borné alimenté par le producteur."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.buffer = b""
+        self.eof = False
+
+    def read(self, size=-1):
+        while not self.eof and (size < 0 or len(self.buffer) < size):
+            chunk = self.chunks.get()
+            if chunk is _ABORT:
+                raise IOError("upload aborted by producer")
+            if chunk is _EOF:
+                self.eof = True
+                break
+            self.buffer += chunk
+
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+class MinioNDJSONSink:
+    def __init__(
+        self,
+        client,
+        bucket,
+        object_prefix,
+        compression="gzip",
+        part_size=PART_SIZE,
+        parallel_uploads=PARALLEL_UPLOADS,
+    ):
+        self.client = client
+        self.bucket = bucket
+        self.object_name = f"{object_prefix}.ndjson{EXTENSIONS[compression]}"
+        self.compression = compression
+        self.part_size = part_size
+        self.parallel_uploads = parallel_uploads
+        _compressor(compression)  # option invalide ou zstd absent : erreur dès la construction
+
+        self.records = 0
+        self.raw_bytes = 0
+        self.sent_bytes = 0
+        self.objects = []
+
+        self._thread = None
+
+    # --------------------------------------------------------------------------
+    # Cycle de vie
+    # --------------------------------------------------------------------------
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def open(self):
+        # L'upload démarre à la première écriture
+        return self
+
+    def _start(self):
+        self._compressor = _compressor(self.compression)
+        self._pending = []
+        self._pending_size = 0
+        self._chunks = queue.Queue(maxsize=MAX_PENDING_CHUNKS)
+        self._error = None
+        self._started_at = (self.records, self.raw_bytes, self.sent_bytes)
+
+        self._thread = threading.Thread(target=self._upload, daemon=True)
+        self._thread.start()
+
+    def _upload(self):
+        try:
+            self.client.put_object(
+                bucket_name=self.bucket,
+                object_name=self.object_name,
+                data=_PipeReader(self._chunks),
+                length=-1,
+                part_size=self.part_size,
+                num_parallel_uploads=self.parallel_uploads,
+                content_type="application/x-ndjson",
+            )
+        except Exception as e:
+            self._error = e
+            # Débloque le producteur s'il attend de la place dans le tampon
+            while True:
+                try:
+                    self._chunks.get_nowait()
+                except queue.Empty:
+                    break
+
+    # --------------------------------------------------------------------------
+    # Écriture
+    # --------------------------------------------------------------------------
+    def _send(self, item):
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    def _feed(self, data):
+        if self._thread is None:
+            self._start()
+        if self._error is not None:
+            raise self._error
+
+        self.raw_bytes += len(data)
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        if not data:
+            return
+
+        self._pending.append(data)
+        self._pending_size += len(data)
+
+        if self._pending_size >= CHUNK_SIZE:
+            self._flush_pending()
+
+    def _flush_pending(self):
+        if not self._pending:
+            return
+        chunk = b"".join(self._pending)
+        self._pending, self._pending_size = [], 0
+        self.sent_bytes += len(chunk)
+        self._send(chunk)
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        self._feed(line.encode("utf-8"))
+        self.records += 1
+
+    def write_frame(self, df, chunksize=10_000):
+        """Écrit un DataFrame par tranches, sans le sérialiser en entier."""
+        for start in range(0, len(df), chunksize):
+            part = df.iloc[start:start + chunksize]
+            lines = part.to_json(orient="records", lines=True, date_format="iso", force_ascii=False)
+            if not lines.endswith("\n"):
+                lines += "\n"
+            self._feed(lines.encode("utf-8"))
+            self.records += len(part)
+
+    def close(self):
+        """Publie l'objet en cours (rien si aucune écriture depuis le dernier close)."""
+        if self._thread is None:
+            return
+
+        if self._compressor is not None:
+            tail = self._compressor.flush()
+            if tail:
+                self._pending.append(tail)
+        self._flush_pending()
+        self._send(_EOF)
+        self._thread.join()
+        self._thread = None
+
+        if self._error is not None:
+            raise self._error
+
+        self.objects.append(self.object_name)
+        records, raw_bytes, sent_bytes = (
+            now - before for now, before in zip((self.records, self.raw_bytes, self.sent_bytes), self._started_at)
+        )
+        ratio = raw_bytes / sent_bytes if sent_bytes else 0
+        logger.info(
+            f"Uploaded {records} records to {self.bucket}/{self.object_name} "
+            f"({raw_bytes} → {sent_bytes} bytes, x{ratio:.1f})"
+        )
+
+    def rotate(self, object_prefix):
+        """Publie l'objet en cours ; les écritures suivantes vont dans <object_prefix>."""
+        self.close()
+        self.object_name = f"{object_prefix}.ndjson{EXTENSIONS[self.compression]}"
+
+    def abort(self):
+        """Abandonne l'objet en cours : rien n'est publié pour ses enregistrements."""
+        if self._thread is None:
+            return
+        try:
+            self._send(_ABORT)
+        except Exception:
+            pass
+        self._thread.join()
+        self._thread = None
+        logger.warning(f"Upload of {self.bucket}/{self.object_name} aborted")
@@ -0,0 +1,119 @@
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from utils.logger import get_logger, run_dir
+
+# ===============================================================================
+# Script Purpose:
+#     Mode profilage du pipeline (pipeline.py --profile step|tasks)
+#     Pour chaque tâche profilée, écrit dans logs/<run_id>/profiles/<run>/
+#     (à côté de pipeline.log, cf. utils.logger) :
+#       - <tâche>.prof        : profil cProfile brut (snakeviz, pstats, ...)
+#       - <tâche>_hot.txt     : fonctions les plus coûteuses (tottime / cumtime)
+#       - <tâche>_alloc.txt   : principaux sites d'allocation (tracemalloc) + pic
+#     et summary.txt : tâches classées par durée.
+#
+#     profile_task() ne fait rien tant que enable() n'a pas été appelé :
+#     les modules peuvent donc l'utiliser sans condition.
+# ===============================================================================
+
+logger = get_logger("profiling")
+
+TOP_N = 30
+TRACEMALLOC_FRAMES = 10
+
+LEVELS = ("step", "tasks")
+
+_state = {"level": None, "out_dir": None, "summary": []}
+
+
+def enable(level, run_name, log_dir=None):
+    if level not in LEVELS:
+        raise ValueError(f"Invalid profile level. Use: {' | '.join(LEVELS)}")
+
+    out_dir = os.path.join(run_dir(log_dir), "profiles", run_name)
+    os.makedirs(out_dir, exist_ok=True)
+
+    _state.update(level=level, out_dir=out_dir, summary=[])
+    logger.info(f"Profiling enabled (level={level}) → {out_dir}")
+    return out_dir
+
+
+def _hot_functions(profiler):
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs()
+
+    out.write("=== Top functions by own time (tottime) ===\n")
+    stats.sort_stats("tottime").print_stats(TOP_N)
+    out.write("\n=== Top functions by cumulative time (cumtime) ===\n")
+    stats.sort_stats("cumtime").print_stats(TOP_N)
+
+    return out.getvalue()
+
+
+def _allocation_sites(snapshot, peak):
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+
+    lines = [f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB", ""]
+    for stat in snapshot.statistics("traceback")[:TOP_N]:
+        lines.append(f"{stat.size / 1024:.1f} KiB in {stat.count} blocks")
+        lines.extend(f"    {line}" for line in stat.traceback.format(limit=3))
+
+    return "\n".join(lines)
+
+
+def _write(name, suffix, content):
+    with open(os.path.join(_state["out_dir"], f"{name}{suffix}"), "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def _write_summary():
+    rows = sorted(_state["summary"], key=lambda r: r[1], reverse=True)
+    lines = [f"{'task':<40} {'seconds':>10} {'peak MiB':>10}"]
+    lines += [f"{name:<40} {elapsed:>10.2f} {peak / 1024 / 1024:>10.1f}" for name, elapsed, peak in rows]
+    _write("summary", ".txt", "\n".join(lines) + "\n")
+
+
+@contextmanager
+def profile_task(name, level="tasks"):
+    """Profile le bloc si le profilage est actif au niveau demandé."""
+    if _state["level"] != level:
+        yield
+        return
+
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    tracemalloc.reset_peak()
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+
+        profiler.dump_stats(os.path.join(_state["out_dir"], f"{name}.prof"))
+        _write(name, "_hot.txt", _hot_functions(profiler))
+        _write(name, "_alloc.txt", _allocation_sites(snapshot, peak))
+
+        _state["summary"].append((name, elapsed, peak))
+        _write_summary()
+
+        logger.info(f"Profiled {name}: {elapsed:.2f}s, peak {peak / 1024 / 1024:.1f} MiB")
@@ -0,0 +1,108 @@
+import os
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_logger
+
+# ===============================================================================
+# Script Purpose:
+#     Pseudonymisation RGPD déterministe et vectorisée
+#     - hash à clé (BLAKE2b en mode MAC) : stable d'une exécution à l'autre,
+#       contrairement à hash() qui est randomisé par processus
+#     - calcul sur les valeurs distinctes de la colonne, par lots,
+#       puis ré-expansion vectorisée sur toutes les lignes
+#     - politique RGPD déclarée colonne par colonne (RGPD_POLICY)
+# ===============================================================================
+
+logger = get_logger("rgpd.pseudonymization")
+
+# Clé secrète : obligatoire, fournie via l'environnement.
+# La même clé doit être utilisée à chaque exécution pour garder des jointures stables.
+PSEUDO_KEY_ENV = "RGPD_PSEUDO_KEY"
+
+# Développement seulement : DATAPULSE_ALLOW_DEV_KEY=1 autorise la clé publique
+# ci-dessous (committée, donc inutile pour protéger des données réelles)
+DEV_KEY_FLAG_ENV = "DATAPULSE_ALLOW_DEV_KEY"
+DEV_PSEUDO_KEY = "datapulse-dev-key"
+
+PSEUDO_PREFIX = "user_"
+DIGEST_SIZE = 8          # 64 bits → collisions négligeables
+BATCH_SIZE = 100_000
+
+# Politique RGPD par table et par colonne :
+#     "drop"         → colonne supprimée dès la couche Silver
+#     "pseudonymize" → colonne remplacée par un pseudonyme à clé
+RGPD_POLICY = {
+    "librairies": {
+        "contact_email": "drop",
+        "contact_telephone": "drop",
+        "contact_nom": "pseudonymize",
+    },
+}
+
+
+def get_pseudo_key(allow_dev=False):
+    """Clé BLAKE2b dérivée de RGPD_PSEUDO_KEY ; erreur si elle manque (sauf mode dev explicite)."""
+    key = os.getenv(PSEUDO_KEY_ENV)
+
+    if not key:
+        if not (allow_dev or os.getenv(DEV_KEY_FLAG_ENV) == "1"):
+            raise RuntimeError(
+                f"{PSEUDO_KEY_ENV} is not set: refusing to pseudonymize with the public "
+                f"development key (set {DEV_KEY_FLAG_ENV}=1 for local development)"
+            )
+        logger.warning(f"{PSEUDO_KEY_ENV} not set – using development key ({DEV_KEY_FLAG_ENV}=1)")
+        key = DEV_PSEUDO_KEY
+
+    # BLAKE2b accepte une clé de 64 octets maximum
+    return hashlib.sha256(key.encode("utf-8")).digest()
+
+
+def pseudonymize_values(values, key, prefix=PSEUDO_PREFIX):
+    """Pseudonymise une séquence de chaînes (sans valeurs nulles)."""
+    blake2b = hashlib.blake2b
+
+    return [
+        prefix + blake2b(v.encode("utf-8"), key=key, digest_size=DIGEST_SIZE).hexdigest()
+        for v in values
+    ]
+
+
+def pseudonymize_series(series, key=None, prefix=PSEUDO_PREFIX, batch_size=BATCH_SIZE):
+    """Pseudonymise une colonne entière ; les valeurs nulles restent nulles."""
+    if key is None:
+        key = get_pseudo_key()
+
+    # Une seule empreinte par valeur distincte
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = np.asarray(uniques, dtype=object).astype(str)
+
+    hashed = np.empty(len(uniques), dtype=object)
+    for start in range(0, len(uniques), batch_size):
+        batch = uniques[start:start + batch_size]
+        hashed[start:start + batch_size] = pseudonymize_values(batch, key, prefix)
+
+    result = np.full(len(codes), None, dtype=object)
+    mask = codes >= 0
+    result[mask] = hashed[codes[mask]]
+
+    return pd.Series(result, index=series.index, name=series.name)
+
+
+def apply_rgpd_policy(df, table, key=None):
+    """Applique RGPD_POLICY[table] au DataFrame (colonnes absentes ignorées)."""
+    policy = RGPD_POLICY.get(table, {})
+
+    to_drop = [c for c, rule in policy.items() if rule == "drop" and c in df.columns]
+    if to_drop:
+        df = df.drop(columns=to_drop)
+
+    for col, rule in policy.items():
+        if rule == "pseudonymize" and col in df.columns:
+            if key is None:
+                key = get_pseudo_key()
+            df[col] = pseudonymize_series(df[col], key=key)
+
+    return df
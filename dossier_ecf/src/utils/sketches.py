@@ -0,0 +1,416 @@
+import argparse
+import json
+import math
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_logger
+
+# ===============================================================================
+# Script Purpose:
+#     Sketches probabilistes fusionnables, par source et par jour
+#     - HyperLogLog : nombre de valeurs distinctes (auteurs, titres, titres
+#       par catégorie...) ; erreur type ≈ 1.04 / sqrt(2^HLL_PRECISION)
+#     - TopK (Count-Min + candidats) : valeurs les plus fréquentes
+#       (auteurs, tags, catégories) ; sur-estimation ≤ e · total / CMS_WIDTH
+#       (error_bound()), donc fiable pour les valeurs vraiment fréquentes
+#     Mises à jour vectorisées (hash numpy de tout un lot), fusion exacte
+#     (max des registres HLL, somme des compteurs Count-Min).
+#
+#     Stockage : table <schema>.sketches à côté des tables sources
+#       - Bronze : incréments (chaque page ingérée s'ajoute au jour)
+#       - Silver : photo du jour (la table est recalculée à chaque exécution)
+#     Requêtes sur une période [start, end] :
+#       - distinct : fusion des jours (union HLL, valide pour les deux stockages)
+#       - top      : Bronze → somme des jours ; Silver → photo du dernier jour
+#         de la période (additionner des photos compterait chaque ligne une
+#         fois par jour)
+#
+# Usage (depuis src/) :
+#     python -m utils.sketches distinct silver.quotes author
+#     python -m utils.sketches distinct silver.books title --by category=Poetry
+#     python -m utils.sketches top silver.quotes tags -k 10
+# ===============================================================================
+
+logger = get_logger("sketches")
+
+DB_URI = "postgresql+psycopg2://admin:admin@db:5432/datapulse"
+
+HLL_PRECISION = 12          # 4096 registres (4 Kio), erreur ≈ 1.6 %
+CMS_WIDTH = 2048
+CMS_DEPTH = 4
+TOPK_CAPACITY = 100         # candidats suivis par TopK
+
+HASH_KEY = "datapulse-hll-00"
+CMS_HASH_KEYS = [f"datapulse-cms-{d:02d}" for d in range(CMS_DEPTH)]
+
+# (type, colonne[, colonne de regroupement]) par source
+SKETCH_METRICS = {
+    "bronze.books_raw": [("distinct", "title"), ("top", "category")],
+    "bronze.quotes_raw": [("distinct", "author"), ("top", "author"), ("top", "tags")],
+    "silver.books": [("distinct", "title"), ("distinct", "title", "category"), ("top", "category")],
+    "silver.quotes": [("distinct", "author"), ("top", "author"), ("top", "tags")],
+    "silver.products_clean": [("distinct", "product_name"), ("top", "category")],
+}
+
+# Sources enregistrées en photo complète (record_snapshot) : compteurs non additifs
+SNAPSHOT_SOURCES = {source for source in SKETCH_METRICS if source.startswith("silver.")}
+
+# Colonnes multi-valuées : une valeur par élément
+MULTI_VALUE_SEPARATORS = {"tags": ","}
+
+SKETCHES_DDL = """
+    CREATE SCHEMA IF NOT EXISTS {schema};
+
+    CREATE TABLE IF NOT EXISTS {schema}.sketches (
+        source TEXT NOT NULL,
+        day DATE NOT NULL,
+        metric TEXT NOT NULL,
+        kind TEXT NOT NULL,
+        payload BYTEA NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (source, day, metric)
+    );
+"""
+
+
+# ==============================================================================
+# HASH
+# ==============================================================================
+def hash_values(values, hash_key=HASH_KEY):
+    """Hash 64 bits de chaque valeur non nulle (catégories : hashées une seule fois)."""
+    s = pd.Series(values).dropna()
+
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        categories = s.cat.categories.astype(str).to_numpy(dtype=object)
+        return pd.util.hash_array(categories, hash_key=hash_key)[s.cat.codes.to_numpy()]
+
+    return pd.util.hash_array(s.astype(str).to_numpy(dtype=object), hash_key=hash_key)
+
+
+def _leading_zeros(x):
+    x = x.copy()
+    zeros = np.zeros(len(x), dtype=np.uint8)
+
+    for shift in (32, 16, 8, 4, 2, 1):
+        top = (x >> np.uint64(64 - shift)) == 0
+        zeros[top] += shift
+        x[top] <<= np.uint64(shift)
+
+    zeros[x == 0] = 64
+    return zeros
+
+
+# ==============================================================================
+# SKETCHES
+# ==============================================================================
+class HyperLogLog:
+    kind = "hll"
+
+    def __init__(self, p=HLL_PRECISION, registers=None):
+        self.p = p
+        self.m = 1 << p
+        self.registers = registers if registers is not None else np.zeros(self.m, dtype=np.uint8)
+
+    def add(self, values):
+        hashes = hash_values(values)
+        if len(hashes) == 0:
+            return self
+
+        index = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        rank = np.minimum(_leading_zeros(hashes << np.uint64(self.p)), 64 - self.p) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m ** 2 / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+
+        # Petites cardinalités : comptage linéaire des registres vides
+        empty = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * self.m and empty:
+            estimate = self.m * math.log(self.m / empty)
+
+        return int(round(estimate))
+
+    def header(self):
+        return {"p": self.p}
+
+    def array(self):
+        return self.registers
+
+    @classmethod
+    def restore(cls, header, array):
+        return cls(header["p"], array.astype(np.uint8))
+
+
+class CountMinSketch:
+    def __init__(self, width=CMS_WIDTH, depth=CMS_DEPTH, table=None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, values, d):
+        return (hash_values(values, CMS_HASH_KEYS[d]) % np.uint64(self.width)).astype(np.intp)
+
+    def add(self, values, counts):
+        for d in range(self.depth):
+            np.add.at(self.table[d], self._columns(values, d), counts)
+
+    def estimate(self, values):
+        return np.min([self.table[d][self._columns(values, d)] for d in range(self.depth)], axis=0)
+
+    def merge(self, other):
+        self.table += other.table
+
+
+class TopK:
+    """Count-Min pour les fréquences + liste bornée des candidats les plus fréquents."""
+
+    kind = "topk"
+
+    def __init__(self, capacity=TOPK_CAPACITY, cms=None, candidates=None, total=0):
+        self.capacity = capacity
+        self.cms = cms or CountMinSketch()
+        self.candidates = candidates or []
+        self.total = total
+
+    def _refresh(self, new_candidates):
+        items = list(dict.fromkeys([*self.candidates, *new_candidates]))
+        if not items:
+            return
+
+        estimates = self.cms.estimate(pd.Series(items, dtype=object))
+        order = np.argsort(-estimates, kind="stable")[:self.capacity]
+        self.candidates = [items[i] for i in order]
+
+    def add(self, values):
+        # Comptage exact du lot, puis une mise à jour Count-Min par valeur distincte
+        counts = pd.Series(values).dropna().astype(str).value_counts()
+        if counts.empty:
+            return self
+
+        self.cms.add(pd.Series(counts.index, dtype=object), counts.to_numpy())
+        self.total += int(counts.sum())
+        self._refresh(list(counts.index[:self.capacity]))
+        return self
+
+    def merge(self, other):
+        self.cms.merge(other.cms)
+        self.total += other.total
+        self._refresh(other.candidates)
+        return self
+
+    def error_bound(self):
+        return math.e * self.total / self.cms.width
+
+    def top(self, k=10):
+        if not self.candidates:
+            return []
+        estimates = self.cms.estimate(pd.Series(self.candidates, dtype=object))
+        ranked = sorted(zip(self.candidates, estimates.tolist()), key=lambda x: -x[1])
+        return ranked[:k]
+
+    def header(self):
+        return {"capacity": self.capacity, "width": self.cms.width, "depth": self.cms.depth,
+                "total": self.total, "candidates": self.candidates}
+
+    def array(self):
+        return self.cms.table
+
+    @classmethod
+    def restore(cls, header, array):
+        table = array.astype(np.int64).reshape(header["depth"], header["width"])
+        cms = CountMinSketch(header["width"], header["depth"], table)
+        return cls(header["capacity"], cms, header["candidates"], header["total"])
+
+
+SKETCH_TYPES = {cls.kind: cls for cls in (HyperLogLog, TopK)}
+
+
+# ==============================================================================
+# SÉRIALISATION : longueur de l'en-tête JSON + en-tête + tableau numpy brut
+# ==============================================================================
+def to_bytes(sketch):
+    array = sketch.array()
+    header = json.dumps({**sketch.header(), "dtype": array.dtype.str}).encode("utf-8")
+    return len(header).to_bytes(4, "big") + header + array.tobytes()
+
+
+def from_bytes(kind, payload):
+    payload = bytes(payload)
+    size = int.from_bytes(payload[:4], "big")
+    header = json.loads(payload[4:4 + size])
+    array = np.frombuffer(payload[4 + size:], dtype=np.dtype(header["dtype"])).copy()
+    return SKETCH_TYPES[kind].restore(header, array)
+
+
+# ==============================================================================
+# MISE À JOUR PAR SOURCE / JOUR
+# ==============================================================================
+def metric_name(kind, column, by=None, group=None):
+    name = f"{kind}:{column}"
+    return f"{name}|{by}={group}" if by else name
+
+
+def _column_values(df, column):
+    values = df[column].dropna()
+    sep = MULTI_VALUE_SEPARATORS.get(column)
+    if sep:
+        values = values.astype(str).str.split(sep).explode().str.strip()
+        values = values[values != ""]
+    return values
+
+
+class SketchSet:
+    """
+    Sketches d'une source pour un jour, mis à jour lot par lot puis
+    enregistrés par save(conn) (connexion DB-API, transaction de l'appelant).
+    snapshot=True : la source est recalculée en entier → remplace le jour.
+    """
+
+    def __init__(self, source, day=None, snapshot=False):
+        self.source = source
+        self.schema = source.split(".")[0]
+        self.day = day or date.today()
+        self.snapshot = snapshot
+        self.sketches = {}
+
+    def _sketch(self, name, cls):
+        if name not in self.sketches:
+            self.sketches[name] = cls()
+        return self.sketches[name]
+
+    def update(self, data):
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        if df.empty:
+            return self
+
+        for kind, column, *by in SKETCH_METRICS[self.source]:
+            if column not in df.columns:
+                continue
+            cls = HyperLogLog if kind == "distinct" else TopK
+
+            if by and by[0] in df.columns:
+                for group, sub in df.groupby(by[0], observed=True):
+                    self._sketch(metric_name(kind, column, by[0], group), cls).add(_column_values(sub, column))
+            elif not by:
+                self._sketch(metric_name(kind, column), cls).add(_column_values(df, column))
+
+        return self
+
+    def save(self, conn):
+        with conn.cursor() as cur:
+            cur.execute(SKETCHES_DDL.format(schema=self.schema))
+
+            if self.snapshot:
+                cur.execute(
+                    f"DELETE FROM {self.schema}.sketches WHERE source = %s AND day = %s",
+                    (self.source, self.day)
+                )
+
+            for name, sketch in self.sketches.items():
+                if not self.snapshot:
+                    cur.execute(
+                        f"SELECT payload FROM {self.schema}.sketches "
+                        "WHERE source = %s AND day = %s AND metric = %s FOR UPDATE",
+                        (self.source, self.day, name)
+                    )
+                    row = cur.fetchone()
+                    if row is not None:
+                        sketch = from_bytes(sketch.kind, row[0]).merge(sketch)
+
+                cur.execute(f"""
+                    INSERT INTO {self.schema}.sketches (source, day, metric, kind, payload, updated_at)
+                    VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                    ON CONFLICT (source, day, metric) DO UPDATE SET
+                        payload = EXCLUDED.payload,
+                        updated_at = EXCLUDED.updated_at
+                """, (self.source, self.day, name, sketch.kind, to_bytes(sketch)))
+
+        logger.info(f"{self.source}: {len(self.sketches)} sketches saved for {self.day}")
+        # Bronze : les lots suivants repartent de zéro (déjà fusionnés en base)
+        self.sketches = {}
+
+
+def record_snapshot(engine, source, df, day=None):
+    """Photo du jour d'une table Silver (appelée après son écriture)."""
+    conn = engine.raw_connection()
+    try:
+        SketchSet(source, day, snapshot=True).update(df).save(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+# ==============================================================================
+# REQUÊTES
+# ==============================================================================
+def _load(conn, source, metric, start=None, end=None, latest=False):
+    """
+    Fusion des sketches du metric sur [start, end] ; par défaut le dernier jour disponible.
+    latest=True : seulement le dernier jour de la période.
+    """
+    schema = source.split(".")[0]
+    latest = latest or (start is None and end is None)
+
+    with conn.cursor() as cur:
+        cur.execute(f"""
+            SELECT kind, payload FROM {schema}.sketches
+            WHERE source = %s AND metric = %s
+              AND day >= COALESCE(%s, '-infinity'::DATE) AND day <= COALESCE(%s, 'infinity'::DATE)
+            {"ORDER BY day DESC LIMIT 1" if latest else ""}
+        """, (source, metric, start, end))
+        rows = cur.fetchall()
+
+    merged = None
+    for kind, payload in rows:
+        sketch = from_bytes(kind, payload)
+        merged = sketch if merged is None else merged.merge(sketch)
+    return merged
+
+
+def distinct_count(conn, source, column, by=None, group=None, start=None, end=None):
+    sketch = _load(conn, source, metric_name("distinct", column, by, group), start, end)
+    return None if sketch is None else sketch.count()
+
+
+def top_k(conn, source, column, k=10, start=None, end=None):
+    """Photos Silver : fréquences du dernier jour de la période, pas leur somme."""
+    latest = source in SNAPSHOT_SOURCES
+    sketch = _load(conn, source, metric_name("top", column), start, end, latest)
+    return [] if sketch is None else sketch.top(k)
+
+
+if __name__ == "__main__":
+    from sqlalchemy import create_engine
+
+    parser = argparse.ArgumentParser(description="Approximate answers from the stored sketches")
+    parser.add_argument("command", choices=["distinct", "top"])
+    parser.add_argument("source", choices=list(SKETCH_METRICS))
+    parser.add_argument("column")
+    parser.add_argument("--by", help="Group filter for distinct counts, e.g. category=Poetry")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--start", type=date.fromisoformat)
+    parser.add_argument("--end", type=date.fromisoformat)
+    parser.add_argument("--db-uri", default=DB_URI)
+    args = parser.parse_args()
+
+    conn = create_engine(args.db_uri).raw_connection()
+    try:
+        if args.command == "distinct":
+            by, group = args.by.split("=", 1) if args.by else (None, None)
+            print(distinct_count(conn, args.source, args.column, by, group, args.start, args.end))
+        else:
+            for value, count in top_k(conn, args.source, args.column, args.k, args.start, args.end):
+                print(f"{count:>10}  {value}")
+    finally:
+        conn.close()
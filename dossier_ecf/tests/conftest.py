@@ -0,0 +1,35 @@
+import os
+import sys
+
+# Les modules s'importent depuis src (utils.x, transformation.x), comme dans les conteneurs
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+
+import pytest  # noqa: E402
+
+
+class FakeMinio:
+    """Lit le flux par parts de part_size, comme put_object(length=-1) de minio."""
+
+    def __init__(self):
+        self.objects = {}
+        self.parts = []
+        self.calls = []
+
+    def put_object(self, bucket_name, object_name, data, length, part_size, **kwargs):
+        self.calls.append({"bucket": bucket_name, "object": object_name, "length": length, **kwargs})
+        parts = []
+        while True:
+            part = data.read(part_size)
+            if part:
+                parts.append(part)
+            if len(part) < part_size:
+                break
+        # Objet visible seulement une fois toutes les parts reçues
+        self.parts = parts
+        self.objects[(bucket_name, object_name)] = b"".join(parts)
+
+
+@pytest.fixture
+def fake_minio():
+    return FakeMinio()
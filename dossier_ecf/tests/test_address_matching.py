@@ -0,0 +1,127 @@
+# ===============================================================================
+# Script Purpose:
+#     Rapprochement librairies ↔ géocodage : normalisation des adresses,
+#     blocage par code postal, seuil de score, suffixes _x / _y
+# ===============================================================================
+
+import numpy as np
+import pandas as pd
+
+from transformation.address_matching import AddressIndex, address_key, match_addresses
+
+
+def s(*values):
+    return pd.Series(values, dtype=object)
+
+
+def test_address_key_accents_hyphens_and_street_types():
+    keys = address_key(
+        s("12 Bd Saint-Germain", "3 r. de l'Église", "8 AV. DES CHAMPS-ÉLYSÉES"),
+    )
+
+    assert list(keys) == [
+        "12 boulevard saint germain",
+        "3 rue eglise",
+        "8 avenue champs elysees",
+    ]
+
+
+def test_address_key_drops_trailing_city():
+    keys = address_key(s("15 rue des Francs Bourgeois Paris"), s("Paris"))
+
+    assert list(keys) == ["15 rue francs bourgeois"]
+
+
+def test_exact_match_after_normalization():
+    index = AddressIndex(s("12 boulevard Saint Germain"), postal_codes=s("75005"))
+
+    positions, scores = index.match(s("12 Bd Saint-Germain"), postal_codes=s("75005"))
+
+    assert list(positions) == [0]
+    assert list(scores) == [1.0]
+
+
+def test_postal_code_blocking():
+    index = AddressIndex(
+        s("5 rue de la Paix", "5 rue de la Paix"),
+        postal_codes=s("75002", "69002"),
+    )
+
+    positions, _ = index.match(s("5 rue de la Paix", "5 rue de la Paix"), postal_codes=s("69002", "13001"))
+
+    # Même adresse dans un autre code postal : jamais de correspondance hors du bloc
+    assert list(positions) == [1, -1]
+
+
+def test_postal_code_is_normalized_before_blocking():
+    index = AddressIndex(s("1 place Bellecour"), postal_codes=s(69002))
+
+    positions, _ = index.match(s("1 pl. Bellecour"), postal_codes=s("F-69002"))
+
+    assert list(positions) == [0]
+
+
+def test_city_is_the_block_without_postal_code():
+    index = AddressIndex(s("1 place Bellecour", "1 place Bellecour"), cities=s("Lyon", "Paris"))
+
+    positions, _ = index.match(s("1 place Bellecour"), cities=s("LYON"))
+
+    assert list(positions) == [0]
+
+
+def test_score_threshold():
+    index = AddressIndex(s("10 rue Victor Hugo", "10 avenue Foch"), postal_codes=s("33000", "33000"))
+
+    positions, scores = index.match(s("10 rue Victor Hugi"), postal_codes=s("33000"))
+    assert list(positions) == [0]
+    assert 0.85 <= scores[0] < 1.0
+
+    positions, scores = index.match(s("10 rue Victor Hugi"), postal_codes=s("33000"), threshold=0.99)
+    assert list(positions) == [-1]
+    assert list(scores) == [0.0]
+
+    positions, _ = index.match(s("10 impasse des Lilas"), postal_codes=s("33000"))
+    assert list(positions) == [-1]
+
+
+def test_different_street_numbers_never_match():
+    index = AddressIndex(s("10 rue Victor Hugo"), postal_codes=s("33000"))
+
+    positions, _ = index.match(s("12 rue Victor Hugo"), postal_codes=s("33000"))
+
+    assert list(positions) == [-1]
+
+
+def test_match_addresses_suffixes_overlapping_columns():
+    librairies = pd.DataFrame({
+        "nom": ["Librairie A", "Librairie B"],
+        "adresse": ["12 Bd Saint-Germain", "99 rue Inconnue"],
+        "code_postal": ["75005", "75005"],
+        "ville": ["Paris", "Paris"],
+    }, index=[10, 20])
+    geocoding = pd.DataFrame({
+        "adresse": ["12 boulevard Saint Germain"],
+        "code_postal": ["75005"],
+        "latitude": [48.85],
+        "longitude": [2.34],
+    })
+
+    result = match_addresses(
+        librairies, geocoding,
+        ("adresse", "code_postal", "ville"),
+        ("adresse", "code_postal", None),
+    )
+
+    assert list(result.index) == [10, 20]
+    assert list(result.columns) == [
+        "nom", "adresse_x", "code_postal_x", "ville",
+        "adresse_y", "code_postal_y", "latitude", "longitude",
+        "match_score",
+    ]
+    assert result.loc[10, "adresse_y"] == "12 boulevard Saint Germain"
+    assert result.loc[10, "latitude"] == 48.85
+    assert result.loc[10, "match_score"] == 1.0
+
+    # Sans correspondance : colonnes de droite vides, score NaN
+    assert pd.isna(result.loc[20, "adresse_y"])
+    assert np.isnan(result.loc[20, "match_score"])
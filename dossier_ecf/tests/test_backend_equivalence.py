@@ -0,0 +1,115 @@
+# ===============================================================================
+# Script Purpose:
+#     Les deux backends Bronze → Silver appliquent les mêmes règles :
+#     chaque transform_* (pandas) et son *_plan (Polars) tournent sur les
+#     mêmes frames Bronze et doivent rendre le même résultat.
+# ===============================================================================
+
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+pl = pytest.importorskip("polars")
+
+from transformation import bronze_to_silver, polars_backend
+from transformation.schemas import apply_schema
+from utils.pseudonymization import PSEUDO_KEY_ENV, get_pseudo_key
+
+
+def run_pandas(transform, raw, table, **kwargs):
+    # Même typage que read_table (SCHEMAS) avant la transformation
+    return transform(apply_schema(raw.copy(), table), **kwargs)
+
+
+def run_polars(plan, raw, **kwargs):
+    return plan(pl.from_pandas(raw).lazy(), **kwargs).collect().to_pandas()
+
+
+def normalise(df):
+    # category / string[pyarrow] (pandas) vs object (Polars) : on compare les valeurs
+    df = df.reset_index(drop=True)
+    for col in df.columns:
+        if isinstance(df[col].dtype, (pd.CategoricalDtype, pd.StringDtype)) or df[col].dtype == object:
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+    return df
+
+
+def assert_same(pandas_df, polars_df):
+    assert_frame_equal(normalise(pandas_df), normalise(polars_df), check_dtype=False)
+
+
+BOOKS = pd.DataFrame({
+    "title": [" A Light ", "Dune", "Dune", "Emma", "Ulysses", None, "Zero"],
+    "price": ["£51.77", "£10.00", "£12.50", "€3", "n/a", "£1.00", None],
+    "rating": ["Three", "One", "Two", "Five", "One", "Two", "Four"],
+    "category": ["Books", None, "Books", "Books", "Books", "Books", "Books"],
+    "ingestion_date": [
+        datetime(2024, 1, 1), datetime(2024, 1, 1), datetime(2024, 1, 2),
+        datetime(2024, 1, 1), datetime(2024, 1, 1), datetime(2024, 1, 1), datetime(2024, 1, 1),
+    ],
+    "source": ["books.toscrape.com"] * 7,
+})
+
+QUOTES = pd.DataFrame({
+    "quote": ["q1", "q2", "q1", "q3"],
+    "author": [" Albert Einstein", "Jane Austen ", "Albert Einstein", "Mark Twain"],
+    "tags": ["Love, life,love", "", "life", None],
+})
+
+LIBRAIRIES = pd.DataFrame({
+    "nom_librairie": ["La Plume", "Le Livre"],
+    "adresse": ["1 rue de la Paix", "2 place Bellecour"],
+    "code_postal": ["1000", "69002"],
+    "ville": ["Bourg", "Lyon"],
+    "contact_nom": ["Marie Curie", None],
+    "contact_email": ["marie@example.com", "x@example.com"],
+    "contact_telephone": ["0102030405", "0607080910"],
+    "ca_annuel": ["385 000", "1 250,6"],
+    "date_partenariat": ["15/03/2021", "2022-06-01"],
+    "specialite": ["BD", "Jeunesse"],
+    "source": ["excel_partenaire"] * 2,
+})
+
+ECOMMERCE = pd.DataFrame({
+    "product_name": [" Laptop ", "Laptop", "Phone", None, "Tablet"],
+    "price": [999.0, 999.0, 499.5, 10.0, None],
+    "description": ["d1", "d1", "d2", "d3", "d4"],
+    "category": ["Computers", "Computers", "Phones", "Phones", "Tablets"],
+    "source": ["webscraper.io"] * 5,
+})
+
+
+def test_books():
+    pandas_df = run_pandas(bronze_to_silver.transform_books, BOOKS, "bronze.books_raw")
+    polars_df = run_polars(polars_backend.books_plan, BOOKS)
+
+    assert_same(pandas_df, polars_df)
+    assert pandas_df.set_index("title").loc["Dune", "price"] == 12.5
+
+
+def test_quotes():
+    assert_same(
+        run_pandas(bronze_to_silver.transform_quotes, QUOTES, "bronze.quotes_raw"),
+        run_polars(polars_backend.quotes_plan, QUOTES),
+    )
+
+
+def test_librairies(monkeypatch):
+    # Même clé des deux côtés : transform_librairies la lit dans l'environnement
+    monkeypatch.setenv(PSEUDO_KEY_ENV, "test-key")
+    pandas_df = run_pandas(bronze_to_silver.transform_librairies, LIBRAIRIES, "bronze.librairies_raw")
+    polars_df = run_polars(polars_backend.librairies_plan, LIBRAIRIES, key=get_pseudo_key())
+
+    assert_same(pandas_df, polars_df)
+    assert "contact_email" not in pandas_df.columns
+    assert list(pandas_df["code_postal"]) == ["01000", "69002"]
+    assert list(pandas_df["ca_annuel"]) == [385000, 1251]
+
+
+def test_ecommerce():
+    assert_same(
+        run_pandas(bronze_to_silver.transform_ecommerce, ECOMMERCE, "bronze.ecommerce_raw"),
+        run_polars(polars_backend.ecommerce_plan, ECOMMERCE),
+    )
@@ -0,0 +1,143 @@
+# ===============================================================================
+# Script Purpose:
+#     Checkpoint + dump MinIO : un crash en cours de scraping puis --resume
+#     laisse Bronze (lignes commitées) et MinIO (objets publiés) identiques,
+#     sans trou ni doublon.
+# ===============================================================================
+
+import gzip
+import json
+
+import pytest
+
+from utils.checkpoint import Checkpoint
+from utils.minio_sink import MinioNDJSONSink
+
+
+class FakeConnection:
+    """
+    Connexion DB-API minimale : bronze.crawl_checkpoints et une table de lignes,
+    écritures visibles après commit() ; une nouvelle connexion sur la même
+    base ne voit que l'état commité (crash = transaction perdue).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.checkpoints = dict(db["checkpoints"])
+        self.rows = list(db["rows"])
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.db["checkpoints"], self.db["rows"] = dict(self.checkpoints), list(self.rows)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+        if sql.startswith("SELECT cursor, records, status FROM bronze.crawl_checkpoints"):
+            self.result = self.conn.checkpoints.get(params[0])
+        elif sql.startswith("INSERT INTO bronze.crawl_checkpoints"):
+            source, cursor, records, status = params
+            self.conn.checkpoints[source] = (json.loads(cursor), records, status)
+        elif sql.startswith("INSERT INTO bronze.items"):
+            self.conn.rows.append(params[0])
+
+    def fetchone(self):
+        return self.result
+
+
+class Crash(Exception):
+    pass
+
+
+PREFIX = "items/items_raw"
+
+
+def crawl(db, client, resume, crash_at=None, total=10):
+    """Même schéma que scrape_books : un item par « page », curseur = dernier item."""
+    conn = FakeConnection(db)
+    checkpoint = Checkpoint(conn, "items", commit_every=3)
+    start = checkpoint.load(resume).get("item", -1) + 1
+
+    with MinioNDJSONSink(client, "bronze", checkpoint.object_prefix(PREFIX)) as sink:
+        checkpoint.add_sink(sink, PREFIX)
+        for i in range(start, total):
+            if i == crash_at:
+                raise Crash(i)
+            sink.write({"item": i})
+            with conn.cursor() as cur:
+                cur.execute("INSERT INTO bronze.items (item) VALUES (%s)", (i,))
+            checkpoint.advance({"item": i}, 1)
+
+    checkpoint.complete()
+
+
+def dumped_items(client):
+    items = []
+    for blob in client.objects.values():
+        items += [json.loads(line)["item"] for line in gzip.decompress(blob).decode("utf-8").splitlines()]
+    return sorted(items)
+
+
+def test_crash_then_resume_keeps_bronze_and_minio_aligned(fake_minio):
+    db = {"checkpoints": {}, "rows": []}
+
+    with pytest.raises(Crash):
+        crawl(db, fake_minio, resume=False, crash_at=7)
+
+    # Commits après 3 et 6 items : les mêmes lignes en base et dans MinIO
+    assert db["rows"] == list(range(6))
+    assert dumped_items(fake_minio) == list(range(6))
+    assert sorted(name for _, name in fake_minio.objects) == [
+        f"{PREFIX}_00000000.ndjson.gz",
+        f"{PREFIX}_00000003.ndjson.gz",
+    ]
+
+    crawl(db, fake_minio, resume=True)
+
+    assert db["rows"] == list(range(10))
+    assert dumped_items(fake_minio) == list(range(10))
+    assert db["checkpoints"]["items"][2] == "done"
+
+    # Source terminée : une nouvelle reprise ne refait rien
+    conn = FakeConnection(db)
+    checkpoint = Checkpoint(conn, "items")
+    checkpoint.load(resume=True)
+    assert checkpoint.completed
+
+
+def test_failed_items_are_retried_on_resume():
+    db = {"checkpoints": {}, "rows": []}
+
+    conn = FakeConnection(db)
+    checkpoint = Checkpoint(conn, "pages", commit_every=1)
+    checkpoint.load(resume=False)
+    for page in (1, 2, 3):
+        if page == 2:
+            checkpoint.fail(page)
+            continue
+        checkpoint.advance({"page": page}, 1)
+    checkpoint.complete()
+    assert db["checkpoints"]["pages"][2] == "partial"
+
+    checkpoint = Checkpoint(FakeConnection(db), "pages", commit_every=1)
+    cursor = checkpoint.load(resume=True)
+    assert not checkpoint.completed
+    assert checkpoint.failed == [2]
+    assert cursor == {"page": 3}
+
+    checkpoint.retried(2)
+    checkpoint.complete()
+    assert db["checkpoints"]["pages"][2] == "done"
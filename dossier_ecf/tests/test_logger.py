@@ -0,0 +1,62 @@
+# ===============================================================================
+# Script Purpose:
+#     Logs d'une exécution : stderr + <log_dir>/<run_id>/pipeline.log, dans le
+#     même répertoire que les profils (utils.profiling)
+# ===============================================================================
+
+import io
+import os
+
+import pytest
+
+from utils import logger as log
+from utils import profiling
+
+
+@pytest.fixture
+def restore_logging():
+    state = {k: log._state[k] for k in ("run_id", "log_dir")}
+    yield
+    log._state.update(state)
+    log.setup_logging()
+
+
+def test_run_log_file(tmp_path, restore_logging):
+    stream = io.StringIO()
+    log.setup_logging(run_id="run42", stream=stream, log_dir=str(tmp_path))
+    log.get_logger("test").info("hello")
+    log.shutdown()
+
+    path = tmp_path / "run42" / log.LOG_FILE
+    assert "| run42 | test | hello" in path.read_text(encoding="utf-8")
+    assert "hello" in stream.getvalue()
+
+
+def test_reconfigure_keeps_log_file(tmp_path, restore_logging):
+    log.setup_logging(run_id="run42", stream=io.StringIO(), log_dir=str(tmp_path))
+    # Ex. processus de travail : seul le run_id est repassé
+    log.setup_logging(run_id="run42", stream=io.StringIO())
+    log.get_logger("test").info("after")
+    log.shutdown()
+
+    assert "after" in (tmp_path / "run42" / log.LOG_FILE).read_text(encoding="utf-8")
+
+
+def test_profiles_next_to_run_log(tmp_path, restore_logging, monkeypatch):
+    monkeypatch.setattr(profiling, "_state", dict(profiling._state))
+    log.setup_logging(run_id="run42", stream=io.StringIO(), log_dir=str(tmp_path))
+
+    out_dir = profiling.enable("step", "gold")
+
+    assert out_dir == os.path.join(str(tmp_path), "run42", "profiles", "gold")
+    assert os.path.isdir(out_dir)
+
+
+def test_no_file_without_log_dir(tmp_path, restore_logging, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    log._state["log_dir"] = None
+    log.setup_logging(stream=io.StringIO())
+    log.get_logger("test").info("stderr only")
+    log.shutdown()
+
+    assert os.listdir(tmp_path) == []
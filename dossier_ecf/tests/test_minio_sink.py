@@ -0,0 +1,122 @@
+# ===============================================================================
+# Script Purpose:
+#     MinioNDJSONSink avec un faux client (put_object seul, comme MinIO) :
+#     découpage multipart, aller-retour gzip / zstd, parts envoyées une à une,
+#     abort() sans objet publié.
+# ===============================================================================
+
+import gzip
+import json
+
+import pytest
+
+from utils import minio_sink
+from utils.minio_sink import MinioNDJSONSink
+
+
+class FailingClient:
+    def put_object(self, data, **kwargs):
+        data.read(1)
+        raise ConnectionError("minio down")
+
+
+RECORDS = [{"id": i, "title": f"Livre n°{i}", "price": i * 1.5} for i in range(5000)]
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # Blocs compressés courts → plusieurs parts sans générer des Mo de données
+    monkeypatch.setattr(minio_sink, "CHUNK_SIZE", 1024)
+
+
+def read_ndjson(blob):
+    return [json.loads(line) for line in gzip.decompress(blob).decode("utf-8").splitlines()]
+
+
+def test_multipart_gzip_round_trip(fake_minio):
+    client = fake_minio
+
+    with MinioNDJSONSink(client, "bronze", "books/books_raw", part_size=4096) as sink:
+        for record in RECORDS:
+            sink.write(record)
+
+    blob = client.objects[("bronze", "books/books_raw.ndjson.gz")]
+    assert len(client.parts) > 1
+    assert all(len(part) == 4096 for part in client.parts[:-1])
+    assert client.calls[0]["length"] == -1
+    assert read_ndjson(blob) == RECORDS
+    assert sink.records == len(RECORDS)
+    assert sink.sent_bytes == len(blob)
+
+
+def test_write_frame_round_trip(fake_minio):
+    pd = pytest.importorskip("pandas")
+    client = fake_minio
+    df = pd.DataFrame(RECORDS)
+
+    with MinioNDJSONSink(client, "bronze", "ecommerce/products", part_size=4096) as sink:
+        sink.write_frame(df, chunksize=700)
+
+    assert read_ndjson(client.objects[("bronze", "ecommerce/products.ndjson.gz")]) == RECORDS
+
+
+def test_abort_on_error_publishes_nothing(fake_minio):
+    client = fake_minio
+
+    with pytest.raises(RuntimeError, match="scraping failed"):
+        with MinioNDJSONSink(client, "bronze", "books/books_raw", part_size=4096) as sink:
+            for record in RECORDS[:2000]:
+                sink.write(record)
+            raise RuntimeError("scraping failed")
+
+    assert client.objects == {}
+
+
+def test_explicit_abort(fake_minio):
+    client = fake_minio
+    sink = MinioNDJSONSink(client, "bronze", "books/books_raw", part_size=4096).open()
+    sink.write(RECORDS[0])
+    sink.abort()
+
+    assert client.objects == {}
+    assert isinstance(sink._error, IOError)
+
+
+def test_upload_error_reaches_producer():
+    sink = MinioNDJSONSink(FailingClient(), "bronze", "books/books_raw").open()
+
+    with pytest.raises(ConnectionError):
+        for record in RECORDS * 4:
+            sink.write(record)
+        sink.close()
+
+
+def test_rotate_publishes_one_object_per_segment(fake_minio):
+    with MinioNDJSONSink(fake_minio, "bronze", "books/books_raw_00000000") as sink:
+        sink.write(RECORDS[0])
+        sink.rotate("books/books_raw_00000001")
+        sink.rotate("books/books_raw_00000001")  # segment vide : aucun objet
+        sink.write(RECORDS[1])
+
+    assert sink.objects == ["books/books_raw_00000000.ndjson.gz", "books/books_raw_00000001.ndjson.gz"]
+    assert read_ndjson(fake_minio.objects[("bronze", "books/books_raw_00000001.ndjson.gz")]) == [RECORDS[1]]
+
+
+def test_zstd_round_trip(fake_minio):
+    zstandard = pytest.importorskip("zstandard")
+
+    with MinioNDJSONSink(fake_minio, "bronze", "quotes/quotes_raw", compression="zstd", part_size=4096) as sink:
+        for record in RECORDS:
+            sink.write(record)
+
+    blob = fake_minio.objects[("bronze", "quotes/quotes_raw.ndjson.zst")]
+    lines = zstandard.ZstdDecompressor().decompressobj().decompress(blob).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == RECORDS
+
+
+def test_parts_uploaded_serially_by_default(fake_minio):
+    # Parallèle : minio garde en file chaque part lue, sans borne mémoire
+    with MinioNDJSONSink(fake_minio, "bronze", "books/books_raw") as sink:
+        sink.write(RECORDS[0])
+
+    assert fake_minio.calls[0]["num_parallel_uploads"] == 1
@@ -0,0 +1,61 @@
+# ===============================================================================
+# Script Purpose:
+#     Pseudonymisation RGPD : clé obligatoire, déterminisme, dépendance à la clé
+# ===============================================================================
+
+import pandas as pd
+import pytest
+
+from utils.pseudonymization import (
+    DEV_KEY_FLAG_ENV,
+    PSEUDO_KEY_ENV,
+    apply_rgpd_policy,
+    get_pseudo_key,
+    pseudonymize_series,
+)
+
+NAMES = pd.Series(["Marie Curie", "Victor Hugo", None, "Marie Curie"], name="contact_nom")
+
+
+@pytest.fixture
+def no_key(monkeypatch):
+    monkeypatch.delenv(PSEUDO_KEY_ENV, raising=False)
+    monkeypatch.delenv(DEV_KEY_FLAG_ENV, raising=False)
+
+
+def test_missing_key_raises(no_key):
+    with pytest.raises(RuntimeError, match=PSEUDO_KEY_ENV):
+        get_pseudo_key()
+
+    with pytest.raises(RuntimeError):
+        apply_rgpd_policy(pd.DataFrame({"contact_nom": NAMES}), "librairies")
+
+
+def test_dev_flag_allows_dev_key(no_key, monkeypatch):
+    monkeypatch.setenv(DEV_KEY_FLAG_ENV, "1")
+    assert get_pseudo_key() == get_pseudo_key(allow_dev=True)
+
+
+def test_deterministic(monkeypatch):
+    monkeypatch.setenv(PSEUDO_KEY_ENV, "secret-a")
+    first = pseudonymize_series(NAMES)
+    second = pseudonymize_series(NAMES, key=get_pseudo_key())
+
+    assert first.equals(second)
+    assert first[0] == first[3]
+    assert first[0] != first[1]
+    assert pd.isna(first[2])
+    assert first[0].startswith("user_")
+
+
+def test_depends_on_key(monkeypatch):
+    monkeypatch.setenv(PSEUDO_KEY_ENV, "secret-a")
+    key_a = get_pseudo_key()
+    monkeypatch.setenv(PSEUDO_KEY_ENV, "secret-b")
+    key_b = get_pseudo_key()
+
+    hashed_a = pseudonymize_series(NAMES, key=key_a)
+    hashed_b = pseudonymize_series(NAMES, key=key_b)
+
+    assert key_a != key_b
+    assert not (hashed_a.dropna() == hashed_b.dropna()).any()
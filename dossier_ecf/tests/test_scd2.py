@@ -0,0 +1,177 @@
+# ===============================================================================
+# Script Purpose:
+#     Historique SCD2 : préparation du lot (dédoublonnage, hash) et diff
+#     contre les lignes courantes, sans Postgres ; merge() complet sur une
+#     base de test si DATAPULSE_TEST_DB_URI est défini.
+# ===============================================================================
+
+import os
+
+import pandas as pd
+import pytest
+
+from transformation.scd2 import SCD2_TABLES, diff_current, merge, prepare_batch
+
+KEY = SCD2_TABLES["books"]["key"]
+T0 = pd.Timestamp("2026-01-01")
+T1 = pd.Timestamp("2026-01-02")
+
+TEST_DB_URI = os.getenv("DATAPULSE_TEST_DB_URI")
+
+
+def books(*rows):
+    return pd.DataFrame(
+        [
+            {"title": t, "price": p, "rating": 3, "category": "Poetry", "source": "books.toscrape.com"}
+            for t, p in rows
+        ]
+    )
+
+
+def current_of(batch):
+    """Lignes courantes telles que merge() les relit : clé + row_hash."""
+    return batch[KEY + ["row_hash"]].reset_index(drop=True)
+
+
+def test_prepare_batch_adds_validity_columns():
+    batch = prepare_batch("books", books(("A", 10.0), ("B", 20.0)), T0)
+
+    assert list(batch["title"]) == ["A", "B"]
+    assert batch["is_current"].all()
+    assert (batch["valid_from"] == T0).all()
+    assert batch["valid_to"].isna().all()
+    assert batch["row_hash"].nunique() == 2
+
+
+def test_initial_load_inserts_everything():
+    batch = prepare_batch("books", books(("A", 10.0), ("B", 20.0)), T0)
+
+    to_close, to_insert, stats = diff_current(batch, current_of(batch.iloc[0:0]), KEY)
+
+    assert to_close.empty
+    assert sorted(to_insert["title"]) == ["A", "B"]
+    assert stats == {"inserted": 2, "changed": 0, "closed": 0, "unchanged": 0}
+
+
+def test_unchanged_rerun_writes_nothing():
+    first = prepare_batch("books", books(("A", 10.0), ("B", 20.0)), T0)
+    second = prepare_batch("books", books(("B", 20.0), ("A", 10.0)), T1)
+
+    to_close, to_insert, stats = diff_current(second, current_of(first), KEY)
+
+    assert to_close.empty
+    assert to_insert.empty
+    assert stats == {"inserted": 0, "changed": 0, "closed": 0, "unchanged": 2}
+
+
+def test_changed_tracked_column_closes_one_inserts_one():
+    first = prepare_batch("books", books(("A", 10.0), ("B", 20.0)), T0)
+    second = prepare_batch("books", books(("A", 12.5), ("B", 20.0)), T1)
+
+    to_close, to_insert, stats = diff_current(second, current_of(first), KEY)
+
+    assert list(to_close["title"]) == ["A"]
+    assert list(to_insert["title"]) == ["A"]
+    assert to_insert["price"].iloc[0] == 12.5
+    assert to_insert["valid_from"].iloc[0] == T1
+    assert stats == {"inserted": 0, "changed": 1, "closed": 0, "unchanged": 1}
+
+
+def test_untracked_column_change_is_ignored():
+    first = prepare_batch("books", books(("A", 10.0)).assign(ingestion_date=T0), T0)
+    second = prepare_batch("books", books(("A", 10.0)).assign(ingestion_date=T1), T1)
+
+    to_close, to_insert, _ = diff_current(second, current_of(first), KEY)
+
+    assert to_close.empty and to_insert.empty
+
+
+def test_key_missing_from_batch_is_closed():
+    first = prepare_batch("books", books(("A", 10.0), ("B", 20.0)), T0)
+    second = prepare_batch("books", books(("A", 10.0)), T1)
+
+    to_close, to_insert, stats = diff_current(second, current_of(first), KEY)
+
+    assert list(to_close["title"]) == ["B"]
+    assert to_insert.empty
+    assert stats == {"inserted": 0, "changed": 0, "closed": 1, "unchanged": 1}
+
+
+def test_duplicate_keys_keep_latest_ingestion():
+    raw = books(("A", 11.0), ("A", 10.0), ("B", 20.0), ("A", 12.0))
+    raw["ingestion_date"] = [T1, T0, T0, pd.NaT]
+
+    batch = prepare_batch("books", raw, T1)
+
+    assert sorted(batch["title"]) == ["A", "B"]
+    assert batch.loc[batch["title"] == "A", "price"].item() == 11.0
+
+
+def test_null_keys_are_dropped():
+    raw = books(("A", 10.0), (None, 20.0))
+
+    batch = prepare_batch("books", raw, T0)
+
+    assert list(batch["title"]) == ["A"]
+
+
+def test_composite_key():
+    key = SCD2_TABLES["products_clean"]["key"]
+    rows = pd.DataFrame({
+        "product_name": ["Laptop", "Laptop"],
+        "category": ["computers", "laptops"],
+        "price": [900.0, 900.0],
+        "description": ["x", "x"],
+        "source": ["webscraper.io", "webscraper.io"],
+    })
+    first = prepare_batch("products_clean", rows, T0)
+    changed = rows.assign(price=[900.0, 950.0])
+    second = prepare_batch("products_clean", changed, T1)
+
+    to_close, to_insert, _ = diff_current(second, first[key + ["row_hash"]], key)
+
+    assert to_close.to_dict("records") == [{"product_name": "Laptop", "category": "laptops"}]
+    assert list(to_insert["price"]) == [950.0]
+
+
+@pytest.fixture
+def engine():
+    if not TEST_DB_URI:
+        pytest.skip("DATAPULSE_TEST_DB_URI non défini")
+
+    from sqlalchemy import create_engine, text
+
+    from benchmarks.synthetic_data import check_not_production
+
+    engine = create_engine(TEST_DB_URI)
+    check_not_production(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA IF EXISTS silver CASCADE"))
+        conn.execute(text("CREATE SCHEMA silver"))
+    yield engine
+    engine.dispose()
+
+
+def history(engine):
+    return pd.read_sql(
+        "SELECT title, price, is_current, valid_from, valid_to FROM silver.books ORDER BY title, valid_from",
+        engine
+    )
+
+
+def test_merge_on_postgres(engine):
+    merge(engine, "books", books(("A", 10.0), ("B", 20.0)), loaded_at=T0)
+    merge(engine, "books", books(("A", 10.0), ("B", 20.0)), loaded_at=T1)
+    assert len(history(engine)) == 2
+
+    merge(engine, "books", books(("A", 12.5)), loaded_at=pd.Timestamp("2026-01-03"))
+    rows = history(engine)
+
+    assert len(rows) == 3
+    current = rows[rows["is_current"]]
+    assert current.to_dict("records")[0]["price"] == 12.5
+    assert list(current["title"]) == ["A"]
+
+    closed = rows[~rows["is_current"]]
+    assert sorted(closed["title"]) == ["A", "B"]
+    assert (closed["valid_to"] == pd.Timestamp("2026-01-03")).all()
@@ -0,0 +1,282 @@
+# ===============================================================================
+# Script Purpose:
+#     Sketches : bornes d'erreur HyperLogLog, Count-Min jamais en dessous du
+#     compte exact, TopK sur un flux asymétrique, fusion et sérialisation,
+#     stockage Bronze (incréments sommés) / Silver (photo du dernier jour).
+#     Le stockage tourne sur une connexion simulée, et aussi sur Postgres
+#     si DATAPULSE_TEST_DB_URI est défini.
+# ===============================================================================
+
+import os
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.sketches import (
+    HLL_PRECISION,
+    CountMinSketch,
+    HyperLogLog,
+    SketchSet,
+    TopK,
+    distinct_count,
+    from_bytes,
+    to_bytes,
+    top_k,
+)
+
+TEST_DB_URI = os.getenv("DATAPULSE_TEST_DB_URI")
+
+DAY1 = date(2026, 1, 1)
+DAY2 = date(2026, 1, 2)
+
+
+def zipf_stream(n, values, seed=0):
+    rng = np.random.default_rng(seed)
+    ranks = rng.zipf(1.3, size=n * 2)
+    ranks = ranks[ranks <= values][:n]
+    return pd.Series([f"v{r}" for r in ranks], dtype=object)
+
+
+def batches(stream, n):
+    size = -(-len(stream) // n)
+    return [stream.iloc[i:i + size] for i in range(0, len(stream), size)]
+
+
+# ==============================================================================
+# HYPERLOGLOG
+# ==============================================================================
+@pytest.mark.parametrize("cardinality", [500, 20_000, 200_000])
+def test_hll_error_within_bounds(cardinality):
+    standard_error = 1.04 / np.sqrt(1 << HLL_PRECISION)
+    values = pd.Series([f"id-{i}" for i in range(cardinality)], dtype=object)
+
+    # Doublons et valeurs nulles : sans effet sur le compte
+    sketch = HyperLogLog().add(values).add(values.iloc[: cardinality // 2]).add(pd.Series([None, None]))
+
+    assert abs(sketch.count() - cardinality) / cardinality < 4 * standard_error
+
+
+def test_hll_categorical_hashes_like_strings():
+    values = pd.Series(["a", "b", "c", "a"])
+
+    plain = HyperLogLog().add(values)
+    categorical = HyperLogLog().add(values.astype("category"))
+
+    assert np.array_equal(plain.registers, categorical.registers)
+
+
+def test_hll_merge_equals_union():
+    left = pd.Series([f"id-{i}" for i in range(0, 6000)], dtype=object)
+    right = pd.Series([f"id-{i}" for i in range(4000, 10_000)], dtype=object)
+
+    merged = HyperLogLog().add(left).merge(HyperLogLog().add(right))
+    union = HyperLogLog().add(pd.concat([left, right]))
+
+    assert np.array_equal(merged.registers, union.registers)
+
+
+def test_hll_merge_rejects_other_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(p=10).merge(HyperLogLog(p=12))
+
+
+# ==============================================================================
+# COUNT-MIN / TOPK
+# ==============================================================================
+def test_cms_never_undercounts():
+    stream = zipf_stream(100_000, 5000)
+    exact = stream.value_counts()
+
+    cms = CountMinSketch(width=256)
+    for batch in batches(stream, 10):
+        counts = batch.value_counts()
+        cms.add(pd.Series(counts.index, dtype=object), counts.to_numpy())
+
+    estimates = cms.estimate(pd.Series(exact.index, dtype=object))
+
+    assert (estimates >= exact.to_numpy()).all()
+
+
+def test_topk_matches_exact_counts_on_skewed_stream():
+    stream = zipf_stream(200_000, 5000)
+    exact = stream.value_counts()
+
+    sketch = TopK()
+    for batch in batches(stream, 20):
+        sketch.add(batch)
+
+    top = sketch.top(10)
+
+    assert [value for value, _ in top] == list(exact.index[:10])
+    for value, estimate in top:
+        assert exact[value] <= estimate <= exact[value] + sketch.error_bound()
+    assert sketch.total == len(stream)
+
+
+def test_topk_merge_equals_single_pass():
+    stream = zipf_stream(50_000, 2000)
+    left, right = stream.iloc[:20_000], stream.iloc[20_000:]
+
+    merged = TopK().add(left).merge(TopK().add(right))
+    single = TopK().add(stream)
+
+    assert np.array_equal(merged.cms.table, single.cms.table)
+    assert merged.total == single.total
+    assert merged.top(10) == single.top(10)
+
+
+# ==============================================================================
+# SÉRIALISATION
+# ==============================================================================
+def test_hll_round_trip():
+    sketch = HyperLogLog().add(pd.Series([f"id-{i}" for i in range(3000)], dtype=object))
+
+    restored = from_bytes(sketch.kind, memoryview(to_bytes(sketch)))
+
+    assert restored.p == sketch.p
+    assert np.array_equal(restored.registers, sketch.registers)
+    assert restored.count() == sketch.count()
+
+
+def test_topk_round_trip():
+    sketch = TopK(capacity=20).add(zipf_stream(10_000, 500))
+
+    restored = from_bytes(sketch.kind, to_bytes(sketch))
+
+    assert restored.capacity == 20
+    assert restored.total == sketch.total
+    assert restored.candidates == sketch.candidates
+    assert np.array_equal(restored.cms.table, sketch.cms.table)
+    assert restored.top(5) == sketch.top(5)
+
+    # Le sketch restauré reste modifiable (tableau copié, pas une vue en lecture seule)
+    restored.add(pd.Series(["v1"]))
+    assert restored.total == sketch.total + 1
+
+
+# ==============================================================================
+# STOCKAGE : INCRÉMENTS BRONZE / PHOTOS SILVER
+# ==============================================================================
+class FakeConnection:
+    """Connexion DB-API minimale pour <schema>.sketches (clé source, day, metric)."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+    def commit(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=()):
+        sql = " ".join(sql.split())
+
+        if sql.startswith("CREATE SCHEMA"):
+            self.result = []
+        elif sql.startswith("DELETE FROM"):
+            source, day = params
+            for key in [k for k in self.rows if k[:2] == (source, day)]:
+                del self.rows[key]
+        elif sql.startswith("SELECT payload"):
+            row = self.rows.get(tuple(params))
+            self.result = [] if row is None else [(row[1],)]
+        elif sql.startswith("INSERT INTO"):
+            source, day, metric, kind, payload = params
+            self.rows[(source, day, metric)] = (kind, payload)
+        elif sql.startswith("SELECT kind, payload"):
+            source, metric, start, end = params
+            days = sorted(
+                (day for s, day, m in self.rows
+                 if s == source and m == metric
+                 and (start is None or day >= start) and (end is None or day <= end)),
+                reverse=True,
+            )
+            if "LIMIT 1" in sql:
+                days = days[:1]
+            self.result = [self.rows[(source, day, metric)] for day in days]
+        else:
+            raise AssertionError(f"Unexpected SQL: {sql}")
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+
+@pytest.fixture(params=["fake", "postgres"])
+def conn(request):
+    if request.param == "fake":
+        yield FakeConnection()
+        return
+
+    if not TEST_DB_URI:
+        pytest.skip("DATAPULSE_TEST_DB_URI non défini")
+
+    from sqlalchemy import create_engine
+
+    from benchmarks.synthetic_data import check_not_production
+
+    engine = create_engine(TEST_DB_URI)
+    check_not_production(engine)
+    raw = engine.raw_connection()
+    with raw.cursor() as cur:
+        cur.execute("DROP TABLE IF EXISTS bronze.sketches; DROP TABLE IF EXISTS silver.sketches")
+    raw.commit()
+    yield raw
+    raw.close()
+    engine.dispose()
+
+
+QUOTES = pd.DataFrame({
+    "author": ["Albert Einstein", "Albert Einstein", "Jane Austen"],
+    "tags": ["life,love", "life", "love"],
+})
+
+
+def test_bronze_increments_are_summed(conn):
+    sketches = SketchSet("bronze.quotes_raw", DAY1)
+    sketches.update(QUOTES).save(conn)
+    # Deuxième lot du même jour : fusionné avec l'incrément déjà enregistré
+    sketches.update(QUOTES.iloc[:1]).save(conn)
+    SketchSet("bronze.quotes_raw", DAY2).update(QUOTES).save(conn)
+    conn.commit()
+
+    assert top_k(conn, "bronze.quotes_raw", "author", start=DAY1, end=DAY2) == [
+        ("Albert Einstein", 5), ("Jane Austen", 2),
+    ]
+    assert top_k(conn, "bronze.quotes_raw", "tags", start=DAY1, end=DAY1) == [
+        ("life", 3), ("love", 3),
+    ]
+    assert distinct_count(conn, "bronze.quotes_raw", "author", start=DAY1, end=DAY2) == 2
+
+
+def test_silver_top_k_uses_latest_snapshot(conn):
+    # Silver est recalculé en entier : chaque jour enregistre une photo complète
+    SketchSet("silver.quotes", DAY1, snapshot=True).update(QUOTES).save(conn)
+    SketchSet("silver.quotes", DAY2, snapshot=True).update(QUOTES).save(conn)
+    # Ré-exécution du même jour : la photo est remplacée, pas ajoutée
+    SketchSet("silver.quotes", DAY2, snapshot=True).update(QUOTES).save(conn)
+    conn.commit()
+
+    # Additionner les deux photos doublerait chaque compte
+    assert top_k(conn, "silver.quotes", "author", start=DAY1, end=DAY2) == [
+        ("Albert Einstein", 2), ("Jane Austen", 1),
+    ]
+    assert top_k(conn, "silver.quotes", "author") == [("Albert Einstein", 2), ("Jane Austen", 1)]
+    assert distinct_count(conn, "silver.quotes", "author", start=DAY1, end=DAY2) == 2